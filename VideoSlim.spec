@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('./tools/ffmpeg.exe', 'tools'), ('./tools/icon.ico', 'tools')],
+    datas=[('./tools/ffmpeg.exe', 'tools'), ('./tools/ffprobe.exe', 'tools'), ('./tools/icon.ico', 'tools')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,543 @@
+"""
+编码基准测试
+
+使用 lavfi 的合成信号源（testsrc2、noise、mandelbrot）生成确定性的测试视频，
+按 config.json 中的每个配置调用 VideoService.process_single_file 压缩，
+记录耗时、CPU 时间、峰值内存、实时倍速、输出大小以及可选的画质指标，
+结果写入 JSON 报告。compare 子命令比较两份报告，列出退化的条目。
+
+每个压缩在独立的子进程中运行，CPU 时间和峰值内存只统计该次压缩启动的 ffmpeg 进程
+（Windows 上没有 resource 模块，这两项为空）。
+
+用法（在项目根目录运行）:
+    python scripts/benchmark.py run --suite quick -o before.json
+    python scripts/benchmark.py run --config default --metric ssim -o after.json
+    python scripts/benchmark.py compare before.json after.json
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from typing import Literal, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel, Field  # noqa: E402
+
+from src import meta  # noqa: E402
+from src.model.encoder import create_encoder  # noqa: E402
+from src.model.quality import QualityMetric, measure_quality  # noqa: E402
+from src.model.video import TaskStatus, VideoFile  # noqa: E402
+from src.service.config import ConfigService  # noqa: E402
+from src.service.media import MediaService  # noqa: E402
+from src.service.video import VideoService  # noqa: E402
+from src.utils import get_cpu_count  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+type ClipSource = Literal["testsrc2", "noise", "mandelbrot"]
+
+SOURCES: list[ClipSource] = ["testsrc2", "noise", "mandelbrot"]
+
+# 预设的测试集：信号源 × 分辨率 × 时长（秒）
+SUITES: dict[str, tuple[list[str], list[int]]] = {
+    "quick": (["640x360"], [5]),
+    "standard": (["640x360", "1280x720"], [10]),
+    "full": (["640x360", "1280x720", "1920x1080"], [10, 30]),
+}
+
+# 比较报告时各画质指标允许的下降幅度
+QUALITY_TOLERANCES: dict[str, float] = {"psnr": 0.1, "ssim": 0.001, "vmaf": 0.5}
+
+
+class ClipSpec(BaseModel):
+    """
+    合成测试视频的规格
+    """
+
+    source: ClipSource
+    size: str
+    fps: int = 30
+    duration: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.source}_{self.size}_{self.fps}fps_{self.duration}s"
+
+    def lavfi(self) -> str:
+        """
+        生成 lavfi 信号源的滤镜描述，固定随机种子保证每次生成的内容相同
+
+        Returns:
+            str: 滤镜描述
+        """
+        match self.source:
+            case "noise":
+                return (
+                    f"color=c=gray:size={self.size}:rate={self.fps},"
+                    "noise=alls=40:allf=t+u:all_seed=42"
+                )
+            case "mandelbrot":
+                return f"mandelbrot=size={self.size}:rate={self.fps}"
+            case _:
+                return f"testsrc2=size={self.size}:rate={self.fps}"
+
+
+class CaseResult(BaseModel):
+    """
+    单个测试视频在单个配置下的结果，多次运行时耗时取中位数
+    """
+
+    clip: str
+    config: str
+    status: str
+    duration: float = Field(description="测试视频时长（秒）")
+    wall_time: float = Field(description="压缩耗时（秒）")
+    cpu_time: Optional[float] = Field(
+        default=None, description="ffmpeg 的 CPU 时间（秒）"
+    )
+    peak_rss: Optional[int] = Field(
+        default=None, description="ffmpeg 的峰值内存（字节）"
+    )
+    speed: float = Field(description="实时倍速，视频时长除以压缩耗时")
+    output_size: Optional[int] = Field(default=None, description="输出大小（字节）")
+    quality: dict[str, float] = Field(default_factory=dict, description="画质指标")
+
+
+class BenchmarkReport(BaseModel):
+    """
+    基准测试报告
+    """
+
+    created: str
+    host: dict[str, str | int]
+    results: list[CaseResult]
+
+
+def generate_clip(path: str, spec: ClipSpec):
+    """
+    生成测试视频，使用高码率编码使其明显大于任何配置的输出
+
+    Args:
+        path: 输出文件路径
+        spec: 测试视频规格
+    """
+    temp_path = f"{path}.part.mp4"
+    subprocess.run(
+        [
+            meta.FFMPEG_PATH,
+            "-y",
+            "-nostdin",
+            "-f",
+            "lavfi",
+            "-i",
+            spec.lavfi(),
+            "-t",
+            str(spec.duration),
+            "-pix_fmt",
+            "yuv420p",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-crf",
+            "12",
+            temp_path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    os.replace(temp_path, path)
+
+
+def prepare_clips(directory: str, specs: list[ClipSpec]) -> dict[str, str]:
+    """
+    生成测试视频，目录中已存在的同名视频直接复用
+
+    Args:
+        directory: 测试视频目录
+        specs: 测试视频规格
+
+    Returns:
+        dict[str, str]: 测试视频名称到路径的映射
+    """
+    os.makedirs(directory, exist_ok=True)
+    clips = {}
+    for spec in specs:
+        path = os.path.join(directory, f"{spec.name}.mp4")
+        if not os.path.exists(path):
+            print(f"生成测试视频 {spec.name}")
+            generate_clip(path, spec)
+        clips[spec.name] = path
+    return clips
+
+
+def _children_usage() -> tuple[Optional[float], Optional[int]]:
+    """
+    获取已结束的子进程累计的 CPU 时间和峰值内存
+
+    Returns:
+        tuple[Optional[float], Optional[int]]: CPU 时间（秒）和峰值内存（字节），
+                                               不支持时为None
+    """
+    if resource is None:
+        return None, None
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # macOS 上 ru_maxrss 的单位是字节，Linux 上是 KB
+    scale = 1 if sys.platform == "darwin" else 1024
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * scale
+
+
+def run_case(
+    clip_path: str, config_name: str, threads: Optional[int], output_dir: str
+) -> dict:
+    """
+    压缩一个测试视频，在独立的子进程中运行
+
+    Args:
+        clip_path: 测试视频路径
+        config_name: 压缩配置名称
+        threads: 分配给 ffmpeg 的线程数，为None时使用配置或ffmpeg的默认值
+        output_dir: 输出目录，测试视频会先复制到该目录，避免输出互相覆盖
+
+    Returns:
+        dict: 状态、耗时、资源占用和输出路径
+    """
+    logging.basicConfig(level=logging.WARNING)
+
+    config = ConfigService.get_instance().get_config(config_name)
+    if config is None:
+        raise ValueError(f"配置 {config_name} 不存在")
+
+    source = os.path.join(output_dir, os.path.basename(clip_path))
+    if not os.path.exists(source):
+        try:
+            os.link(clip_path, source)
+        except OSError:
+            shutil.copy(clip_path, source)
+
+    video_file = VideoFile(source)
+    video_file.media_info = MediaService.get_instance().probe(source)
+    encoder = create_encoder(config.encoder)
+    video_file.output_suffix = encoder.suffix
+    video_file.output_ext = encoder.output_extension(video_file.ext)
+
+    # 读取媒体信息的 ffprobe 不计入 CPU 时间
+    cpu_before, _ = _children_usage()
+    start_time = time.perf_counter()
+    status = VideoService.process_single_file(
+        video_file, config_name, False, False, threads
+    )
+    wall_time = time.perf_counter() - start_time
+    cpu_time, peak_rss = _children_usage()
+    if cpu_time is not None and cpu_before is not None:
+        cpu_time -= cpu_before
+
+    return {
+        "status": status.name,
+        "duration": video_file.media_info.duration,
+        "wall_time": wall_time,
+        "cpu_time": cpu_time,
+        "peak_rss": peak_rss,
+        "output_path": video_file.output_path if status == TaskStatus.SUCCESS else None,
+    }
+
+
+def run_benchmark(
+    clips: dict[str, str],
+    config_names: list[str],
+    metrics: list[QualityMetric],
+    repeat: int,
+    threads: Optional[int],
+) -> list[CaseResult]:
+    """
+    在每个配置下压缩每个测试视频
+
+    Args:
+        clips: 测试视频名称到路径的映射
+        config_names: 压缩配置名称
+        metrics: 需要计算的画质指标
+        repeat: 每个组合的运行次数
+        threads: 分配给 ffmpeg 的线程数
+
+    Returns:
+        list[CaseResult]: 每个组合的结果
+    """
+    results = []
+    # 每个压缩使用全新的子进程，资源统计互不影响
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="videoslim_bench_") as output_dir:
+        for (clip_name, clip_path), config_name in product(clips.items(), config_names):
+            runs = []
+            for index in range(repeat):
+                with ProcessPoolExecutor(
+                    max_workers=1, mp_context=context, max_tasks_per_child=1
+                ) as executor:
+                    run = executor.submit(
+                        run_case, clip_path, config_name, threads, output_dir
+                    ).result()
+                runs.append(run)
+
+                # 只保留最后一次的输出用于计算体积和画质
+                if run["output_path"] is not None and index < repeat - 1:
+                    os.remove(run["output_path"])
+
+            last = runs[-1]
+            output_path = last["output_path"]
+            wall_time = statistics.median(r["wall_time"] for r in runs)
+            result = CaseResult(
+                clip=clip_name,
+                config=config_name,
+                status=last["status"],
+                duration=last["duration"],
+                wall_time=wall_time,
+                cpu_time=None
+                if last["cpu_time"] is None
+                else statistics.median(r["cpu_time"] for r in runs),
+                peak_rss=None
+                if last["peak_rss"] is None
+                else max(r["peak_rss"] for r in runs),
+                speed=last["duration"] / wall_time,
+            )
+
+            if output_path is not None:
+                result.output_size = os.path.getsize(output_path)
+                for metric in metrics:
+                    result.quality[metric] = measure_quality(
+                        output_path, clip_path, metric
+                    )
+                os.remove(output_path)
+
+            print(format_result(result))
+            results.append(result)
+
+    return results
+
+
+def format_result(result: CaseResult) -> str:
+    """
+    格式化单个结果用于输出
+
+    Args:
+        result: 单个组合的结果
+
+    Returns:
+        str: 一行文本
+    """
+    parts = [
+        f"{result.clip} / {result.config}: {result.status}",
+        f"{result.wall_time:.2f}s",
+        f"{result.speed:.2f}x",
+    ]
+    if result.cpu_time is not None:
+        parts.append(f"CPU {result.cpu_time:.2f}s")
+    if result.peak_rss is not None:
+        parts.append(f"RSS {result.peak_rss / 1024 / 1024:.0f}MB")
+    if result.output_size is not None:
+        parts.append(f"{result.output_size / 1024:.0f}KB")
+    parts += [f"{metric} {value:.4f}" for metric, value in result.quality.items()]
+    return "，".join(parts)
+
+
+def host_info() -> dict[str, str | int]:
+    """
+    收集运行环境的信息，比较报告时用于提示环境差异
+
+    Returns:
+        dict[str, str | int]: 运行环境信息
+    """
+    try:
+        ffmpeg_version = subprocess.run(
+            [meta.FFMPEG_PATH, "-version"],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+        ).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        ffmpeg_version = ""
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": get_cpu_count(),
+        "python": platform.python_version(),
+        "ffmpeg": ffmpeg_version,
+        "videoslim": meta.VERSION,
+    }
+
+
+def compare_reports(
+    base: BenchmarkReport, current: BenchmarkReport, tolerance: float
+) -> list[str]:
+    """
+    比较两份报告，找出退化的条目
+
+    耗时、CPU 时间、峰值内存和输出大小超过基准值的 (1 + tolerance) 倍视为退化，
+    画质指标的下降超过 QUALITY_TOLERANCES 中的幅度视为退化。
+
+    Args:
+        base: 基准报告
+        current: 待比较的报告
+        tolerance: 允许的相对增长
+
+    Returns:
+        list[str]: 退化的条目描述
+    """
+    base_results = {(r.clip, r.config): r for r in base.results}
+    regressions = []
+
+    for result in current.results:
+        key = (result.clip, result.config)
+        label = f"{result.clip} / {result.config}"
+        old = base_results.get(key)
+        if old is None:
+            print(f"{label}: 基准报告中没有该条目")
+            continue
+        if old.status != result.status:
+            regressions.append(f"{label}: 状态 {old.status} -> {result.status}")
+            continue
+
+        for field in ("wall_time", "cpu_time", "peak_rss", "output_size"):
+            old_value = getattr(old, field)
+            new_value = getattr(result, field)
+            if not old_value or new_value is None:
+                continue
+            change = new_value / old_value - 1
+            line = (
+                f"{label}: {field} {old_value:.6g} -> {new_value:.6g} ({change:+.1%})"
+            )
+            print(line)
+            if change > tolerance:
+                regressions.append(line)
+
+        for metric, new_value in result.quality.items():
+            old_value = old.quality.get(metric)
+            if old_value is None:
+                continue
+            line = f"{label}: {metric} {old_value:.4f} -> {new_value:.4f}"
+            print(line)
+            if old_value - new_value > QUALITY_TOLERANCES[metric]:
+                regressions.append(line)
+
+    return regressions
+
+
+def command_run(args: argparse.Namespace):
+    """
+    执行 run 子命令
+    """
+    config_names = args.config or ConfigService.get_instance().get_config_name_list()
+
+    sizes, durations = SUITES[args.suite]
+    specs = [
+        ClipSpec(source=source, size=size, duration=duration)
+        for source, size, duration in product(args.source or SOURCES, sizes, durations)
+    ]
+    clips = prepare_clips(args.clips_dir, specs)
+
+    print(
+        f"CPU 核心数: {get_cpu_count()}，测试视频: {len(clips)}，配置: {', '.join(config_names)}"
+    )
+    results = run_benchmark(clips, config_names, args.metric, args.repeat, args.threads)
+
+    report = BenchmarkReport(
+        created=datetime.now().isoformat(timespec="seconds"),
+        host=host_info(),
+        results=results,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(report.model_dump_json(indent=4))
+    print(f"报告已写入 {args.output}")
+
+
+def command_compare(args: argparse.Namespace) -> int:
+    """
+    执行 compare 子命令
+
+    Returns:
+        int: 有退化时返回1，否则返回0
+    """
+    reports = []
+    for path in (args.base, args.current):
+        with open(path, "r", encoding="utf-8") as f:
+            reports.append(BenchmarkReport.model_validate_json(f.read()))
+    base, current = reports
+
+    if base.host != current.host:
+        print("注意: 两份报告的运行环境不同，耗时的差异可能与代码无关")
+
+    regressions = compare_reports(base, current, args.tolerance)
+    if not regressions:
+        print("没有发现退化")
+        return 0
+
+    print(f"\n发现 {len(regressions)} 处退化:")
+    for line in regressions:
+        print(f"  {line}")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="使用合成测试视频对各压缩配置进行基准测试"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行基准测试并写入报告")
+    run_parser.add_argument("-o", "--output", required=True, help="报告文件路径")
+    run_parser.add_argument(
+        "--suite", choices=SUITES.keys(), default="quick", help="测试视频集"
+    )
+    run_parser.add_argument(
+        "--source", action="append", choices=SOURCES, help="只使用指定的信号源，可重复"
+    )
+    run_parser.add_argument(
+        "--config", action="append", help="只测试指定的配置，可重复，默认测试全部配置"
+    )
+    run_parser.add_argument(
+        "--metric",
+        action="append",
+        default=[],
+        choices=["psnr", "ssim", "vmaf"],
+        help="计算的画质指标，可重复",
+    )
+    run_parser.add_argument("--repeat", type=int, default=1, help="每个组合的运行次数")
+    run_parser.add_argument("--threads", type=int, help="分配给 ffmpeg 的线程数")
+    run_parser.add_argument(
+        "--clips-dir",
+        default=os.path.join(tempfile.gettempdir(), "videoslim_bench_clips"),
+        help="测试视频目录，已生成的视频会被复用",
+    )
+
+    compare_parser = subparsers.add_parser("compare", help="比较两份报告")
+    compare_parser.add_argument("base", help="基准报告")
+    compare_parser.add_argument("current", help="待比较的报告")
+    compare_parser.add_argument(
+        "--tolerance", type=float, default=0.05, help="耗时、内存和体积允许的相对增长"
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == "compare":
+        sys.exit(command_compare(args))
+    command_run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+线程预算基准测试
+
+生成一段合成测试视频并复制多份，分别在开启和关闭线程预算的情况下
+并行压缩这些文件，比较总体的编码帧率。
+
+用法（在项目根目录运行）:
+    python scripts/benchmark_thread_budget.py --files 8 --jobs 4
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import meta  # noqa: E402
+from src.model.encoder import create_encoder  # noqa: E402
+from src.model.video import Task, TaskInfo  # noqa: E402
+from src.service.config import ConfigService  # noqa: E402
+from src.service.media import MediaService  # noqa: E402
+from src.service.store import StoreService  # noqa: E402
+from src.service.video import VideoService  # noqa: E402
+from src.utils import get_cpu_count  # noqa: E402
+
+
+def isolate_state(directory: str):
+    """
+    把任务台账、任务队列、缓存和任务指标的路径指向临时目录
+
+    基准测试不应改动项目目录中的运行记录；必须在任何服务初始化之前调用。
+    配置文件仍然从当前目录读取。
+
+    Args:
+        directory: 保存运行记录的临时目录
+    """
+    meta.STORE_PATH = os.path.join(directory, "store")
+    meta.LEDGER_PATH = os.path.join(directory, "ledger.jsonl")
+    meta.JOBS_DB_PATH = os.path.join(directory, "jobs.db")
+    meta.MEDIA_CACHE_PATH = os.path.join(directory, "media_cache.json")
+    meta.CRF_CACHE_PATH = os.path.join(directory, "crf_cache.json")
+    meta.METRICS_DIR = os.path.join(directory, "metrics")
+
+
+def generate_clip(path: str, duration: int, size: str, fps: int):
+    """
+    使用 lavfi 的 testsrc2 生成确定性的测试视频
+
+    Args:
+        path: 输出文件路径
+        duration: 时长（秒）
+        size: 分辨率，如 "1280x720"
+        fps: 帧率
+    """
+    subprocess.run(
+        [
+            meta.FFMPEG_PATH,
+            "-y",
+            "-nostdin",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate={fps}:duration={duration}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-crf",
+            "18",
+            path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def run_once(directory: str, config_name: str, jobs: int, thread_budget: bool) -> float:
+    """
+    压缩目录中的所有测试视频，返回耗时
+
+    Args:
+        directory: 测试视频所在目录
+        config_name: 使用的压缩配置名称
+        jobs: 并行压缩的文件数量
+        thread_budget: 是否开启线程预算
+
+    Returns:
+        float: 压缩耗时（秒）
+    """
+    config_service = ConfigService.get_instance()
+    config_service.configs_model.thread_budget = thread_budget
+    config = config_service.get_config(config_name)
+    if config is None:
+        raise SystemExit(f"配置 {config_name} 不存在")
+    encoder = create_encoder(config.encoder)
+
+    # 与正式任务一样读取媒体信息，但不使用任务台账，两轮都处理全部文件
+    task = Task(
+        TaskInfo(
+            targets=[
+                os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            ],
+            process_config_name=config_name,
+            max_parallel_jobs=jobs,
+        ),
+        probe=MediaService.get_instance().probe,
+        encoder=encoder,
+    )
+
+    start_time = time.perf_counter()
+    VideoService.process_task(task)
+    elapsed = time.perf_counter() - start_time
+
+    # 删除输出文件，保证下一轮的输入相同
+    for name in os.listdir(directory):
+        if os.path.splitext(name)[0].endswith(f"_{encoder.suffix}"):
+            os.remove(os.path.join(directory, name))
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="比较开启/关闭线程预算时的总体编码帧率"
+    )
+    parser.add_argument("--files", type=int, default=8, help="测试文件数量")
+    parser.add_argument("--jobs", type=int, default=4, help="并行压缩的文件数量")
+    parser.add_argument("--duration", type=int, default=20, help="测试视频时长（秒）")
+    parser.add_argument("--size", default="1280x720", help="测试视频分辨率")
+    parser.add_argument("--fps", type=int, default=30, help="测试视频帧率")
+    parser.add_argument("--config", default="default", help="使用的压缩配置名称")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    total_frames = args.files * args.duration * args.fps
+    print(f"CPU 核心数: {get_cpu_count()}，文件数: {args.files}，并行数: {args.jobs}")
+
+    with (
+        tempfile.TemporaryDirectory(prefix="videoslim_bench_") as directory,
+        tempfile.TemporaryDirectory(prefix="videoslim_bench_state_") as state_dir,
+    ):
+        isolate_state(state_dir)
+
+        source = os.path.join(directory, "source.mp4")
+        generate_clip(source, args.duration, args.size, args.fps)
+        for index in range(args.files):
+            shutil.copy(source, os.path.join(directory, f"clip_{index:03d}.mp4"))
+        os.remove(source)
+
+        results = {}
+        for thread_budget in (False, True):
+            elapsed = run_once(directory, args.config, args.jobs, thread_budget)
+            results[thread_budget] = total_frames / elapsed
+            label = "开启预算" if thread_budget else "默认线程"
+            print(f"{label}: {elapsed:.2f}s，总体帧率 {results[thread_budget]:.1f} fps")
+
+        # 删除临时目录前关闭任务队列的数据库连接
+        StoreService.get_instance().get_job_queue().close()
+
+    print(f"加速比: {results[True] / results[False]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
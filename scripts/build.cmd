@@ -15,6 +15,7 @@ pyinstaller --onefile ^
     --noconsole ^
     --icon "./tools/icon.ico" ^
     --add-data "./tools/ffmpeg.exe;tools" ^
+    --add-data "./tools/ffprobe.exe;tools" ^
     --add-data "./tools/icon.ico;tools" ^
     --distpath %DIST_DIR% ^
     --workpath %BUILD_TMP_DIR% ^
@@ -0,0 +1,413 @@
+"""
+压缩参数扫描
+
+从一组有代表性的视频中截取若干个短片段，在 crf、preset、参考帧数和B帧数的网格上
+并行编码这些片段，测量输出体积、编码速度和画质（VMAF 或 SSIM），
+找出帕累托最优（没有其他参数组合在三项上都不差且至少一项更好）的参数组合，
+作为新的命名配置写入 config.json。
+
+只编码片段而不是完整文件，在 32 核的机器上通常几分钟即可完成。
+同一类内容（如屏幕录制、手机拍摄）分别扫描，用 --name 区分生成的配置。
+
+用法（在项目根目录运行）:
+    python scripts/sweep.py D:/samples/screen --name screen
+    python scripts/sweep.py a.mp4 b.mp4 --crf 20 23 26 --preset fast medium slow --write
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel  # noqa: E402
+
+from src import meta  # noqa: E402
+from src.model.command import segment_encode_command  # noqa: E402
+from src.model.config import ConfigModel, X264ConfigModel  # noqa: E402
+from src.model.quality import (  # noqa: E402
+    QualityMetric,
+    libvmaf_available,
+    measure_quality,
+)
+from src.model.sample import extract_excerpts, sample_offsets  # noqa: E402
+from src.service.config import ConfigService  # noqa: E402
+from src.service.media import MediaService  # noqa: E402
+from src.utils import get_cpu_count, get_creationflags, iter_directory  # noqa: E402
+
+
+class Excerpt(BaseModel):
+    """
+    用于扫描的视频片段
+    """
+
+    path: str
+    duration: float
+
+
+class VariantResult(BaseModel):
+    """
+    单个参数组合在所有片段上的结果
+    """
+
+    name: str
+    encoder: X264ConfigModel
+    size: int = 0
+    encode_time: float = 0
+    duration: float = 0
+    quality: float = 0
+
+    @property
+    def speed(self) -> float:
+        """
+        编码速度，片段总时长与编码耗时之比
+        """
+        return self.duration / self.encode_time if self.encode_time > 0 else 0
+
+    def dominates(self, other: "VariantResult") -> bool:
+        """
+        判断该结果是否支配另一个结果：体积不更大、速度和画质不更低，且至少一项严格更好
+
+        Args:
+            other: 另一个结果
+
+        Returns:
+            bool: 支配时返回True
+        """
+        no_worse = (
+            self.size <= other.size
+            and self.speed >= other.speed
+            and self.quality >= other.quality
+        )
+        better = (
+            self.size < other.size
+            or self.speed > other.speed
+            or self.quality > other.quality
+        )
+        return no_worse and better
+
+
+def pareto_front(results: list[VariantResult]) -> list[VariantResult]:
+    """
+    找出不被任何其他结果支配的结果
+
+    Args:
+        results: 所有参数组合的结果
+
+    Returns:
+        list[VariantResult]: 帕累托最优的结果，按体积从小到大排列
+    """
+    front = [r for r in results if not any(o.dominates(r) for o in results)]
+    return sorted(front, key=lambda r: r.size)
+
+
+def collect_inputs(targets: list[str], max_files: int) -> list[str]:
+    """
+    收集用于扫描的视频文件，文件过多时均匀地选取其中一部分
+
+    Args:
+        targets: 文件或目录路径
+        max_files: 最多使用的文件数量
+
+    Returns:
+        list[str]: 视频文件路径
+    """
+    files = []
+    for target in targets:
+        if os.path.isdir(target):
+            files += sorted(
+                entry.path
+                for entry in iter_directory(target, meta.SUPPORTED_VIDEO_EXTENSIONS)
+            )
+        else:
+            files.append(target)
+
+    step = max(1, len(files) // max_files)
+    return files[::step][:max_files]
+
+
+def prepare_excerpts(
+    files: list[str], directory: str, count: int, length: float, jobs: int
+) -> list[Excerpt]:
+    """
+    从每个视频中截取片段
+
+    Args:
+        files: 视频文件路径
+        directory: 片段的输出目录
+        count: 每个视频截取的片段数量
+        length: 每个片段的时长（秒）
+        jobs: 并行截取的文件数量
+
+    Returns:
+        list[Excerpt]: 所有片段
+    """
+    media_service = MediaService.get_instance()
+
+    def extract(index: int, path: str) -> list[str]:
+        offsets = sample_offsets(media_service.probe(path).duration, count, length)
+        # 不同目录中可能有同名文件，每个文件使用独立的子目录
+        excerpt_dir = os.path.join(directory, f"{index:03d}")
+        os.makedirs(excerpt_dir)
+        return extract_excerpts(path, excerpt_dir, offsets, length)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        paths = executor.map(extract, range(len(files)), files)
+        excerpts = [path for group in paths for path in group]
+
+    return [
+        Excerpt(path=path, duration=media_service.probe(path).duration)
+        for path in excerpts
+    ]
+
+
+def build_variants(
+    base: X264ConfigModel,
+    prefix: str,
+    crfs: list[float],
+    presets: list[str],
+    refs: list[int],
+    bframes: list[int],
+) -> list[VariantResult]:
+    """
+    在参数网格上生成编码器配置，其余参数沿用基础配置
+
+    Args:
+        base: 基础编码器配置
+        prefix: 生成的配置名称的前缀
+        crfs: CRF 取值
+        presets: preset 取值
+        refs: 参考帧数取值
+        bframes: B帧数取值
+
+    Returns:
+        list[VariantResult]: 每个参数组合的空结果
+    """
+    variants = []
+    for preset, crf, r, b in product(presets, crfs, refs, bframes):
+        encoder = X264ConfigModel.model_validate(
+            {**base.model_dump(), "preset": preset, "crf": crf, "r": r, "b": b}
+        )
+        variants.append(
+            VariantResult(
+                name=f"{prefix}_{preset}_crf{crf:g}_r{r}_b{b}", encoder=encoder
+            )
+        )
+    return variants
+
+
+def encode_excerpt(
+    variant: VariantResult,
+    excerpt: Excerpt,
+    output_path: str,
+    threads: int,
+    metric: QualityMetric,
+) -> tuple[int, float, float]:
+    """
+    使用一个参数组合编码一个片段
+
+    Args:
+        variant: 参数组合
+        excerpt: 片段
+        output_path: 编码输出路径，测量后删除
+        threads: 编码和计算画质使用的线程数
+        metric: 画质指标
+
+    Returns:
+        tuple[int, float, float]: 输出大小（字节）、编码耗时（秒）和画质指标
+    """
+    command = segment_encode_command(
+        excerpt.path, output_path, ConfigModel(encoder=variant.encoder), threads
+    )
+
+    start_time = time.perf_counter()
+    subprocess.run(
+        command,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        check=True,
+        creationflags=get_creationflags(),
+    )
+    encode_time = time.perf_counter() - start_time
+
+    try:
+        size = os.path.getsize(output_path)
+        quality = measure_quality(output_path, excerpt.path, metric, threads)
+    finally:
+        os.remove(output_path)
+
+    return size, encode_time, quality
+
+
+def run_sweep(
+    variants: list[VariantResult],
+    excerpts: list[Excerpt],
+    directory: str,
+    jobs: int,
+    metric: QualityMetric,
+):
+    """
+    并行编码所有参数组合和片段的组合，结果累加到 variants 中
+
+    画质按片段时长加权平均。
+
+    Args:
+        variants: 参数组合
+        excerpts: 片段
+        directory: 编码输出的临时目录
+        jobs: 并行编码的数量
+        metric: 画质指标
+    """
+    threads = max(1, get_cpu_count() // jobs)
+    total = len(variants) * len(excerpts)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                encode_excerpt,
+                variant,
+                excerpt,
+                os.path.join(directory, f"{index:06d}.mkv"),
+                threads,
+                metric,
+            ): (variant, excerpt)
+            for index, (variant, excerpt) in enumerate(product(variants, excerpts))
+        }
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            variant, excerpt = futures[future]
+            size, encode_time, quality = future.result()
+
+            variant.size += size
+            variant.encode_time += encode_time
+            variant.quality += quality * excerpt.duration
+            variant.duration += excerpt.duration
+
+            if done % max(1, total // 20) == 0 or done == total:
+                print(f"已完成 {done}/{total}")
+
+    for variant in variants:
+        if variant.duration > 0:
+            variant.quality /= variant.duration
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="在参数网格上编码视频片段，把帕累托最优的参数组合写为新的配置"
+    )
+    parser.add_argument("targets", nargs="+", help="有代表性的视频文件或目录")
+    parser.add_argument(
+        "--name", default="sweep", help="内容类别名称，作为生成的配置名称的前缀"
+    )
+    parser.add_argument(
+        "--base-config", default="default", help="网格之外的参数沿用该配置"
+    )
+    parser.add_argument(
+        "--crf", nargs="+", type=float, default=[20, 23, 26], help="CRF 取值"
+    )
+    parser.add_argument(
+        "--preset",
+        nargs="+",
+        default=["veryfast", "medium", "slower"],
+        help="preset 取值",
+    )
+    parser.add_argument(
+        "--refs", nargs="+", type=int, default=[2, 4], help="参考帧数取值"
+    )
+    parser.add_argument("--bframes", nargs="+", type=int, default=[3], help="B帧数取值")
+    parser.add_argument("--max-files", type=int, default=8, help="最多使用的视频数量")
+    parser.add_argument("--samples", type=int, default=3, help="每个视频截取的片段数量")
+    parser.add_argument("--length", type=float, default=8, help="每个片段的时长（秒）")
+    parser.add_argument(
+        "--metric",
+        choices=["vmaf", "ssim", "psnr"],
+        help="画质指标，默认在 ffmpeg 支持 libvmaf 时使用 vmaf，否则使用 ssim",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=max(1, get_cpu_count() // 4),
+        help="并行编码的数量，每个编码平分CPU线程",
+    )
+    parser.add_argument("--report", help="把所有参数组合的结果写入该 JSON 文件")
+    parser.add_argument(
+        "--write", action="store_true", help="把帕累托最优的参数组合写入 config.json"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    config_service = ConfigService.get_instance()
+    base_config = config_service.get_config(args.base_config)
+    if base_config is None or not isinstance(base_config.encoder, X264ConfigModel):
+        parser.error(f"配置 {args.base_config} 不存在或不是 x264 配置")
+
+    metric: QualityMetric = args.metric or ("vmaf" if libvmaf_available() else "ssim")
+
+    files = collect_inputs(args.targets, args.max_files)
+    if not files:
+        parser.error("没有找到视频文件")
+
+    variants = build_variants(
+        base_config.encoder.model_copy(update={"threads": None}),
+        args.name,
+        args.crf,
+        args.preset,
+        args.refs,
+        args.bframes,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="videoslim_sweep_") as directory:
+        excerpts = prepare_excerpts(
+            files, directory, args.samples, args.length, args.jobs
+        )
+        print(
+            f"视频: {len(files)}，片段: {len(excerpts)}，参数组合: {len(variants)}，"
+            f"并行数: {args.jobs}，画质指标: {metric}"
+        )
+
+        start_time = time.perf_counter()
+        run_sweep(variants, excerpts, directory, args.jobs, metric)
+        print(f"扫描耗时 {time.perf_counter() - start_time:.1f}s")
+
+    front = pareto_front(variants)
+    front_names = {v.name for v in front}
+
+    print(f"\n{'配置':<36}{'体积(KB)':>12}{'速度':>10}{metric:>10}")
+    for variant in sorted(variants, key=lambda v: v.size):
+        mark = "*" if variant.name in front_names else " "
+        print(
+            f"{mark}{variant.name:<35}{variant.size / 1024:>12.0f}"
+            f"{variant.speed:>9.2f}x{variant.quality:>10.4f}"
+        )
+    print("\n* 为帕累托最优")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(
+                [{**v.model_dump(), "speed": v.speed} for v in variants],
+                f,
+                ensure_ascii=False,
+                indent=4,
+            )
+
+    configs = [
+        base_config.model_copy(update={"name": v.name, "encoder": v.encoder})
+        for v in front
+    ]
+    if args.write:
+        config_service.save_configs(configs)
+        print(f"已写入 {len(configs)} 个配置到 {meta.CONFIG_FILE_PATH}")
+    else:
+        print("使用 --write 把以上帕累托最优的配置写入配置文件")
+
+
+if __name__ == "__main__":
+    main()
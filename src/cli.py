@@ -0,0 +1,465 @@
+"""
+VideoSlim 命令行入口
+
+不创建图形界面，直接根据命令行参数或清单文件创建压缩任务，
+并把 MessageService 中的进度消息输出到终端或以 JSON Lines 的形式输出，
+适合在没有图形环境的服务器上批量压缩。
+使用 --watch 时进入监视模式，持续压缩监视文件夹中新出现的视频文件。
+
+该模块不会导入 tkinter、windnd 和 requests，保证启动速度。
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+from functools import partial
+from typing import Callable, Optional, TextIO
+
+from src import meta
+from src.model import message
+from src.model.video import Task, TaskInfo
+from src.service.adaptive import AdaptiveCrfService
+from src.service.config import ConfigService
+from src.service.media import MediaService
+from src.service.message import MessageService
+from src.service.store import StoreService
+from src.service.video import VideoService
+from src.service.watch import WatchService
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+
+class TerminalRenderer:
+    """
+    终端进度输出类，将压缩消息格式化为便于阅读的文本
+
+    输出到终端时，当前文件的进度会在同一行刷新；
+    输出被重定向时只输出文件开始和结束等事件。
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        """
+        Args:
+            stream: 输出流
+        """
+        self.stream = stream
+        self.interactive = stream.isatty()
+        # 正在处理的文件，用于区分文件开始和结束时的总进度消息
+        self._active: set[str] = set()
+        self._progress_line = False
+
+    def render(self, msg: message.IMessage):
+        """
+        输出一条消息
+
+        Args:
+            msg: 消息服务中的消息
+        """
+        match msg:
+            case message.CompressionStartMessage():
+                self._write("开始压缩")
+            case message.CompressionTotalProgressMessage(
+                current=current, total=total, file_name=file_name
+            ):
+                total_str = str(total) if msg.scan_finished else f"已发现 {total}"
+                if file_name in self._active:
+                    self._active.discard(file_name)
+                    self._write(f"[{current}/{total_str}] 完成：{file_name}")
+                else:
+                    self._active.add(file_name)
+                    self._write(f"[{current}/{total_str}] 开始：{file_name}")
+            case message.CompressionCurrentProgressMessage() if self.interactive:
+                self._write_progress(msg)
+            case message.CompressionSkippedMessage(file_name=file_name, reason=reason):
+                self._write(f"跳过：{file_name}（{reason}）")
+            case message.CompressionErrorMessage(title=t, message=m):
+                self._write(f"{t}：{m}")
+            case message.CompressionFinishedMessage(
+                total=total, skipped=skipped, discarded=discarded
+            ):
+                self._write(
+                    f"处理完成！已经处理 {total} 个文件，"
+                    f"跳过 {skipped} 个，丢弃 {discarded} 个"
+                )
+
+    def _write(self, line: str):
+        """
+        输出一行文本，并清除之前的进度行
+
+        Args:
+            line: 输出的文本
+        """
+        if self._progress_line:
+            self.stream.write("\r\033[K")
+            self._progress_line = False
+        self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def _write_progress(self, msg: message.CompressionCurrentProgressMessage):
+        """
+        在同一行刷新当前文件的进度
+
+        Args:
+            msg: 当前文件的进度消息
+        """
+        parts = []
+        if msg.total > 0:
+            parts.append(f"{msg.current / msg.total * 100:5.1f}%")
+        if msg.speed is not None:
+            parts.append(f"{msg.speed:.2f}x")
+        if msg.eta is not None:
+            parts.append(f"剩余 {_format_seconds(msg.eta)}")
+        if msg.task_eta is not None:
+            parts.append(f"任务剩余 {_format_seconds(msg.task_eta)}")
+
+        self.stream.write(f"\r\033[K{msg.file_name} {' '.join(parts)}")
+        self.stream.flush()
+        self._progress_line = True
+
+
+class JsonLinesRenderer:
+    """
+    JSON Lines 输出类，每条消息输出为一行 JSON，便于其他程序解析
+
+    每行包含 event 字段（消息类名去掉 Message 后缀）以及消息的所有属性。
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        """
+        Args:
+            stream: 输出流
+        """
+        self.stream = stream
+
+    def render(self, msg: message.IMessage):
+        """
+        输出一条消息
+
+        Args:
+            msg: 消息服务中的消息
+        """
+        event = type(msg).__name__.removesuffix("Message")
+        self.stream.write(
+            json.dumps({"event": event, **vars(msg)}, ensure_ascii=False) + "\n"
+        )
+        self.stream.flush()
+
+
+def _format_seconds(seconds: float) -> str:
+    """
+    将秒数格式化为 H:MM:SS 或 M:SS
+
+    Args:
+        seconds: 秒数
+
+    Returns:
+        str: 格式化后的时间
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def read_manifest(path: str) -> list[str]:
+    """
+    读取清单文件中的路径
+
+    清单文件每行一个文件或文件夹路径，空行和以 # 开头的行会被忽略。
+
+    Args:
+        path: 清单文件路径，为 "-" 时从标准输入读取
+
+    Returns:
+        list[str]: 路径列表
+
+    Raises:
+        OSError: 当清单文件无法读取时抛出
+    """
+    if path == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+
+    targets = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            targets.append(line)
+    return targets
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    创建命令行参数解析器
+
+    Returns:
+        argparse.ArgumentParser: 命令行参数解析器
+    """
+    parser = argparse.ArgumentParser(
+        prog="videoslim",
+        description="VideoSlim 命令行模式：批量压缩视频文件",
+    )
+    parser.add_argument("paths", nargs="*", help="待压缩的文件或文件夹路径")
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        help='清单文件，每行一个路径，为 "-" 时从标准输入读取',
+    )
+    parser.add_argument("-c", "--config", help="压缩配置名称，默认使用第一个配置")
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", help="递归处理文件夹中的视频文件"
+    )
+    parser.add_argument(
+        "--delete-audio", action="store_true", help="删除视频中的音频轨道"
+    )
+    parser.add_argument(
+        "--delete-source", action="store_true", help="压缩完成后删除源文件"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="同时压缩的文件数量，默认使用配置文件中的 max_parallel_jobs",
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="监视模式：持续监视指定的文件夹（默认为配置文件中的 watch.directories），"
+        "自动压缩新出现的视频文件，直到按下 Ctrl+C",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="先继续处理上次被中断（崩溃或被停止）的任务，再处理指定的路径",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="以 JSON Lines 的形式输出进度消息"
+    )
+    parser.add_argument("--log-file", help="日志文件路径，默认输出到标准错误")
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="输出更详细的日志，可重复使用",
+    )
+    parser.add_argument("--version", action="version", version=meta.VERSION)
+    return parser
+
+
+def setup_logging(log_file: Optional[str], verbose: int):
+    """
+    配置日志记录功能
+
+    Args:
+        log_file: 日志文件路径，为None时输出到标准错误
+        verbose: 日志详细程度，0 为 WARNING，1 为 INFO，2 及以上为 DEBUG
+    """
+    levels = [logging.WARNING, logging.INFO, logging.DEBUG]
+    level = levels[min(verbose, len(levels) - 1)]
+
+    logging.basicConfig(
+        level=level,
+        filename=log_file,
+        filemode="w",
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        encoding="utf-8",
+    )
+
+
+def run_tasks(tasks: list[Task], render: Callable[[message.IMessage], None]) -> int:
+    """
+    在后台线程中依次执行压缩任务，并在当前线程中输出进度消息
+
+    Args:
+        tasks: 压缩任务列表
+        render: 输出单条消息的函数
+
+    Returns:
+        int: 退出码，所有文件都处理成功（或被跳过）时为 EXIT_OK
+    """
+
+    def process_all():
+        for task in tasks:
+            VideoService.process_task(task)
+            if VideoService.is_stopped():
+                return
+
+    return _run(process_all, render, len(tasks), watch=False)
+
+
+def run_watch(info: TaskInfo, render: Callable[[message.IMessage], None]) -> int:
+    """
+    在后台线程中监视文件夹，并在当前线程中输出进度消息，直到收到中断信号
+
+    Args:
+        info: 任务配置信息，targets 为监视的文件夹
+        render: 输出单条消息的函数
+
+    Returns:
+        int: 退出码，正常停止时为 EXIT_OK
+    """
+    return _run(partial(WatchService.get_instance().run, info), render, 1, watch=True)
+
+
+def _run(
+    target: Callable[[], None],
+    render: Callable[[message.IMessage], None],
+    tasks_num: int,
+    watch: bool,
+) -> int:
+    """
+    在后台线程中执行 target，并在当前线程中输出进度消息
+
+    Args:
+        target: 执行压缩的函数
+        render: 输出单条消息的函数
+        tasks_num: 预期的任务完成消息数量
+        watch: 是否为监视模式，监视模式被中断时视为正常停止
+
+    Returns:
+        int: 退出码
+    """
+    message_service = MessageService.get_instance()
+    worker = threading.Thread(target=target, name="TaskRunner")
+
+    errors_num = 0
+    finished_num = 0
+    try:
+        worker.start()
+        while worker.is_alive() or not message_service.queue.empty():
+            msg = message_service.receive_message(timeout=0.5)
+            if msg is None:
+                continue
+
+            render(msg)
+            match msg:
+                case message.CompressionErrorMessage():
+                    errors_num += 1
+                case message.CompressionFinishedMessage():
+                    finished_num += 1
+    except KeyboardInterrupt:
+        logging.info("收到中断信号，停止压缩")
+        if watch:
+            WatchService.get_instance().stop()
+        # 被中断的文件会留在持久化任务队列中，可以使用 --resume 继续处理
+        VideoService.get_instance().stop_process()
+        worker.join()
+        return EXIT_OK if watch else EXIT_INTERRUPTED
+    finally:
+        StoreService.get_instance().dump()
+        MediaService.get_instance().dump()
+        AdaptiveCrfService.get_instance().dump()
+
+    if finished_num < tasks_num or errors_num > 0:
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    命令行模式的主入口函数
+
+    该函数会：
+    1. 解析命令行参数，读取清单文件
+    2. 初始化压缩所需的服务（配置、消息、存储、媒体信息）
+    3. 检查压缩配置是否存在
+    4. 执行压缩任务（或监视文件夹）并输出进度
+
+    Args:
+        argv: 命令行参数，为None时使用 sys.argv
+
+    Returns:
+        int: 退出码，0 表示全部成功（或监视模式正常停止），1 表示有文件处理失败，
+             2 表示参数错误，130 表示被中断
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    setup_logging(args.log_file, args.verbose)
+
+    config_service = ConfigService.get_instance()
+    if config_service.load_error is not None:
+        parser.error(
+            f"配置文件 {meta.CONFIG_FILE_PATH} 无效:\n{config_service.load_error}"
+        )
+    watch_config = config_service.configs_model.watch
+
+    targets = list(args.paths)
+    if args.manifest:
+        try:
+            targets.extend(read_manifest(args.manifest))
+        except OSError as e:
+            parser.error(f"无法读取清单文件 {args.manifest}: {e}")
+    if args.watch:
+        targets = targets or list(watch_config.directories)
+        for target in targets:
+            if not os.path.isdir(target):
+                parser.error(f"监视的路径 {target} 不是文件夹")
+    if not targets and not args.resume:
+        parser.error("没有指定待压缩的文件或文件夹")
+    if args.watch and args.resume:
+        parser.error("--watch 不能与 --resume 同时使用")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs 必须大于 0")
+
+    config_names = config_service.get_config_name_list()
+    config_name = args.config or (config_names[0] if config_names else "")
+    if config_service.get_config(config_name) is None:
+        parser.error(
+            f"压缩配置 {config_name} 不存在，可用的配置: {', '.join(config_names)}"
+        )
+
+    message_service = MessageService.get_instance()
+    # 丢弃初始化服务时产生的配置加载消息
+    while message_service.try_receive_message() is not None:
+        pass
+
+    renderer = (
+        JsonLinesRenderer(sys.stdout) if args.json else TerminalRenderer(sys.stdout)
+    )
+
+    info = TaskInfo(
+        targets=targets,
+        process_config_name=config_name,
+        delete_audio=args.delete_audio,
+        delete_source=args.delete_source,
+        recursive=args.recursive or (args.watch and watch_config.recursive),
+        max_parallel_jobs=args.jobs,
+        scan_workers=config_service.configs_model.scan_workers,
+    )
+
+    # 以服务方式运行时，按照 Ctrl+C 的方式处理 SIGTERM
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    if args.watch:
+        return run_watch(info, renderer.render)
+
+    batches = StoreService.get_instance().get_job_queue().interrupted_batches()
+    tasks = []
+    if args.resume:
+        tasks = [VideoService.create_task(batch.info, batch) for batch in batches]
+    elif batches:
+        logging.warning(f"有 {len(batches)} 个被中断的任务，可以使用 --resume 继续处理")
+    if targets:
+        tasks.append(VideoService.create_task(info))
+    if not tasks:
+        logging.warning("没有需要继续处理的任务")
+        return EXIT_OK
+
+    return run_tasks(tasks, renderer.render)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
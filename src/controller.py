@@ -1,7 +1,10 @@
 import threading
 
 from src.model import message
-from src.model.video import Task, TaskInfo
+from src.model.video import TaskInfo
+from src.service.adaptive import AdaptiveCrfService
+from src.service.config import ConfigService
+from src.service.media import MediaService
 from src.service.message import MessageService
 from src.service.store import StoreService
 from src.service.updater import UpdateService
@@ -20,13 +23,44 @@ class Controller:
         """
         初始化控制器
 
-        启动一个后台线程检查应用程序更新，确保用户始终使用最新版本。
+        启动一个后台线程检查应用程序更新，确保用户始终使用最新版本；
+        如果上次运行时有被中断的压缩任务，通知视图询问用户是否继续。
         """
         threading.Thread(
             target=UpdateService.check_for_updates,
             daemon=True,
         ).start()
 
+        batches = StoreService.get_instance().get_job_queue().interrupted_batches()
+        if batches:
+            MessageService.get_instance().send_message(
+                message.ResumeTaskMessage(
+                    len(batches), sum(batch.pending_num for batch in batches)
+                )
+            )
+
+    def resume_tasks(self):
+        """
+        在后台线程中依次继续处理上次被中断的压缩任务
+        """
+
+        def run():
+            jobs = StoreService.get_instance().get_job_queue()
+            for batch in jobs.interrupted_batches():
+                VideoService.process_task(VideoService.create_task(batch.info, batch))
+                if VideoService.is_stopped():
+                    return
+
+        threading.Thread(target=run).start()
+
+    def discard_interrupted_tasks(self):
+        """
+        放弃上次被中断的压缩任务
+        """
+        jobs = StoreService.get_instance().get_job_queue()
+        for batch in jobs.interrupted_batches():
+            jobs.close_batch(batch.id)
+
     def close(self):
         """
         关闭应用程序
@@ -34,9 +68,11 @@ class Controller:
         1. 停止所有视频处理任务
         2. 清理临时文件
         3. 发送退出消息通知视图关闭
-        4.  dump 配置到文件
+        4.  dump 配置、媒体信息缓存和自适应 CRF 缓存到文件
         """
         StoreService.get_instance().dump()
+        MediaService.get_instance().dump()
+        AdaptiveCrfService.get_instance().dump()
         MessageService.get_instance().send_message(message.ExitMessage())
         VideoService.get_instance().stop_process()
         VideoService.get_instance().clean_temp_files()
@@ -53,6 +89,7 @@ class Controller:
         压缩视频文件
 
         创建视频压缩任务，并在后台线程中执行。
+        之前已经使用相同参数处理完成的文件会根据任务台账略过。
 
         Args:
             config_name: 要使用的压缩配置名称
@@ -62,17 +99,18 @@ class Controller:
             recurse: 如果路径是目录，是否递归处理其中的所有视频文件
         """
 
-        task = Task(
-            info=TaskInfo(
-                targets=file_paths,
-                process_config_name=config_name,
-                delete_audio=delete_audio,
-                delete_source=delete_source,
-                recursive=recurse,
-            ),
+        info = TaskInfo(
+            targets=file_paths,
+            process_config_name=config_name,
+            delete_audio=delete_audio,
+            delete_source=delete_source,
+            recursive=recurse,
+            scan_workers=ConfigService.get_instance().configs_model.scan_workers,
         )
 
-        threading.Thread(
-            target=VideoService.process_task,
-            args=(task,),
-        ).start()
+        def run():
+            # 任务会在后台边扫描文件、读取媒体信息边压缩，
+            # 发现的文件会记录到持久化任务队列，程序中断后可以继续处理
+            VideoService.process_task(VideoService.create_task(info))
+
+        threading.Thread(target=run).start()
@@ -1,3 +1,6 @@
+import os
+import shutil
+
 from src import utils
 
 """
@@ -13,14 +16,57 @@ CHECK_UPDATE_URL = "https://api.github.com/repos/DongGuoZheng/VideoSlim/releases
 # 支持的视频文件扩展名列表
 SUPPORTED_VIDEO_EXTENSIONS = [".mp4", ".mkv", ".mov", ".avi"]
 
+# 任务中已发现但尚未开始处理的文件的最大数量
+TASK_QUEUE_SIZE = 64
+
 # 配置文件路径
 CONFIG_FILE_PATH = "config.json"
 
 # 存储文件路径
 STORE_PATH = "store"
 
-# 临时文件路径列表
-TEMP_FILES = ["./pre_temp.mp4"]
+# 压缩任务台账文件路径
+LEDGER_PATH = "ledger.jsonl"
+
+# 媒体信息缓存文件路径
+MEDIA_CACHE_PATH = "media_cache.json"
+
+# 媒体信息缓存最多保存的文件数量
+MEDIA_CACHE_MAX_ENTRIES = 50000
+
+# 自适应 CRF 的搜索结果缓存文件路径
+CRF_CACHE_PATH = "crf_cache.json"
+
+# 自适应 CRF 的搜索结果缓存最多保存的文件数量
+CRF_CACHE_MAX_ENTRIES = 50000
+
+# 持久化任务队列的数据库路径
+JOBS_DB_PATH = "jobs.db"
+
+# 监视模式的文件队列路径
+WATCH_QUEUE_PATH = "watch_queue.jsonl"
+
+# 任务指标记录的保存目录
+METRICS_DIR = "metrics"
+
+
+def get_tool_path(name: str) -> str:
+    """
+    获取 tools 目录中自带的可执行文件的路径
+
+    自带的文件不存在时（例如在 Linux 服务器上运行命令行模式），
+    使用 PATH 中同名的程序。
+
+    Args:
+        name: 程序名称，不包含扩展名，如 "ffmpeg"
+
+    Returns:
+        str: 可执行文件的路径
+    """
+    path = utils.get_path(f"./tools/{name}.exe")
+    if not os.path.exists(path):
+        return shutil.which(name) or path
+    return path
 
 
 def get_ffmpeg_path() -> str:
@@ -30,7 +76,19 @@ def get_ffmpeg_path() -> str:
     Returns:
         str: FFmpeg可执行文件的路径
     """
-    return utils.get_path("./tools/ffmpeg.exe")
+    return get_tool_path("ffmpeg")
+
+
+def get_ffprobe_path() -> str:
+    """
+    获取FFprobe可执行文件的路径
+
+    Returns:
+        str: FFprobe可执行文件的路径
+    """
+    return get_tool_path("ffprobe")
 
 
 FFMPEG_PATH = get_ffmpeg_path()
+
+FFPROBE_PATH = get_ffprobe_path()
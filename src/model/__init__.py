@@ -5,7 +5,23 @@ VideoSlim - 数据模型模块
 """
 
 # 导入所有模型模块，使它们可以通过src.model直接访问
+from . import adaptive
+from . import audio
+from . import budget
+from . import command
 from . import config
+from . import encoder
+from . import estimate
+from . import jobs
+from . import ledger
+from . import media
 from . import message
+from . import metrics
+from . import progress
+from . import quality
+from . import sample
+from . import scale
+from . import staging
 from . import store
 from . import video
+from . import watch
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from src.model.config import ConfigModel
+
+
+def adaptive_params_hash(config: ConfigModel) -> str:
+    """
+    计算影响自适应 CRF 搜索结果的参数的哈希值
+
+    Args:
+        config: 压缩配置
+
+    Returns:
+        str: 编码器配置、缩放配置和自适应 CRF 配置的哈希值
+    """
+    content = json.dumps(
+        {
+            "encoder": config.encoder.model_dump(mode="json"),
+            "scale": config.scale.model_dump(mode="json"),
+            "adaptive": config.adaptive.model_dump(mode="json"),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def search_crf(
+    measure: Callable[[int], float],
+    target: float,
+    min_crf: int,
+    max_crf: int,
+    max_probes: int,
+) -> tuple[int, Optional[float]]:
+    """
+    二分查找画质达到目标的最大 CRF
+
+    画质随 CRF 增大而单调下降。尝试次数用完时返回已经确认达标的最大 CRF；
+    所有尝试都不达标时返回 min_crf。
+
+    Args:
+        measure: 以指定 CRF 试编码并返回画质的函数
+        target: 目标画质
+        min_crf: 搜索的最小 CRF
+        max_crf: 搜索的最大 CRF
+        max_probes: 最多尝试的次数
+
+    Returns:
+        tuple[int, Optional[float]]: 选择的 CRF 和该 CRF 下测得的画质，
+                                     没有测量过该 CRF 时画质为None
+    """
+    low, high = min_crf, max_crf
+    best: tuple[int, Optional[float]] = (min_crf, None)
+
+    for _ in range(max_probes):
+        if low > high:
+            break
+        crf = (low + high) // 2
+        score = measure(crf)
+        logging.debug(f"试编码 CRF {crf}: 画质 {score:.4f}")
+        if score >= target:
+            best = (crf, score)
+            low = crf + 1
+        else:
+            high = crf - 1
+
+    return best
+
+
+class CrfCache:
+    """
+    自适应 CRF 缓存类，把每个文件的搜索结果持久化到 JSON 文件
+
+    缓存以文件路径为键，同时记录文件大小、修改时间（纳秒）和参数哈希，
+    三者都未变化时才认为缓存有效，重新运行时不需要再次试编码。
+    超过容量时淘汰最久未使用的条目。该类是线程安全的。
+    """
+
+    def __init__(self, file_path: str, max_entries: int):
+        """
+        初始化自适应 CRF 缓存
+
+        Args:
+            file_path: 缓存文件路径
+            max_entries: 最多保存的条目数量
+        """
+        self._file_path = file_path
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._dirty = False
+
+    @property
+    def file_path(self) -> str:
+        """
+        获取缓存文件路径
+
+        Returns:
+            str: 缓存文件路径
+        """
+        return self._file_path
+
+    def open(self):
+        """
+        加载缓存文件中的数据，文件不存在或损坏时使用空缓存
+        """
+        with self._lock:
+            self._entries = OrderedDict()
+
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    for entry in json.load(f):
+                        self._entries[entry["path"]] = entry
+            except FileNotFoundError:
+                logging.info(f"CRF 缓存 {self.file_path} 不存在，使用空缓存")
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"CRF 缓存 {self.file_path} 已损坏，已忽略: {e}")
+                self._entries = OrderedDict()
+
+    def get(
+        self, path: str, size: int, mtime_ns: int, params_hash: str
+    ) -> Optional[int]:
+        """
+        获取缓存的 CRF
+
+        Args:
+            path: 文件路径
+            size: 文件当前大小（字节）
+            mtime_ns: 文件当前修改时间（纳秒）
+            params_hash: 当前参数的哈希值
+
+        Returns:
+            Optional[int]: 缓存有效时返回 CRF，否则返回None
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+
+            if (
+                entry["size"] != size
+                or entry["mtime_ns"] != mtime_ns
+                or entry["params"] != params_hash
+            ):
+                return None
+
+            self._entries.move_to_end(path)
+            return entry["crf"]
+
+    def set(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        params_hash: str,
+        crf: int,
+        score: Optional[float],
+    ):
+        """
+        保存搜索结果到缓存
+
+        Args:
+            path: 文件路径
+            size: 文件大小（字节）
+            mtime_ns: 文件修改时间（纳秒）
+            params_hash: 参数的哈希值
+            crf: 选择的 CRF
+            score: 该 CRF 下测得的画质
+        """
+        with self._lock:
+            self._entries[path] = {
+                "path": path,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "params": params_hash,
+                "crf": crf,
+                "score": score,
+            }
+            self._entries.move_to_end(path)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            self._dirty = True
+
+    def dump(self):
+        """
+        保存缓存到文件
+
+        先写入临时文件再替换，避免写入过程中断导致缓存文件损坏。
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            temp_path = f"{self.file_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.values()), f)
+            os.replace(temp_path, self.file_path)
+
+            self._dirty = False
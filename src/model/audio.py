@@ -0,0 +1,134 @@
+import math
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from src.model.config import AudioConfigModel
+from src.model.media import MediaInfo, StreamInfo
+
+# 源音频码率超过配置码率不到该比例时仍然直接复制，AAC 的实际码率通常略高于标称值
+COPY_BIT_RATE_TOLERANCE = 0.1
+
+
+class AudioStreamPlan(BaseModel):
+    """
+    单条音频流的处理方式
+
+    Attributes:
+        index: 音频流在源文件中的序号
+        action: copy 直接复制，encode 重新编码为 AAC
+        bit_rate: 输出码率（kbps），直接复制时为源码率
+        channels: 缩混后的声道数，不需要缩混时为None
+        sample_rate: 降低后的采样率（Hz），不需要降低时为None
+    """
+
+    index: int
+    action: Literal["copy", "encode"]
+    bit_rate: int
+    channels: Optional[int] = None
+    sample_rate: Optional[int] = None
+
+
+def _can_copy(stream: StreamInfo, config: AudioConfigModel) -> bool:
+    """
+    判断音频流是否已经满足要求，可以直接复制
+
+    码率、声道数或采样率未知而配置了对应的限制时，无法确认是否满足要求，不复制。
+
+    Args:
+        stream: 源音频流
+        config: 音频配置
+
+    Returns:
+        bool: 可以直接复制时返回True
+    """
+    if config.policy != "auto" or stream.codec_name not in config.copy_codecs:
+        return False
+
+    max_bit_rate = config.bitrate * 1000 * (1 + COPY_BIT_RATE_TOLERANCE)
+    if stream.bit_rate is None or stream.bit_rate > max_bit_rate:
+        return False
+
+    if config.max_channels is not None and (
+        stream.channels is None or stream.channels > config.max_channels
+    ):
+        return False
+
+    if config.max_sample_rate is not None and (
+        stream.sample_rate is None or stream.sample_rate > config.max_sample_rate
+    ):
+        return False
+
+    return True
+
+
+def plan_audio(media: MediaInfo, config: AudioConfigModel) -> list[AudioStreamPlan]:
+    """
+    根据媒体信息为每条音频流选择处理方式
+
+    该方法会：
+    1. 编码格式、码率、声道数和采样率都满足要求的音频流直接复制，避免重复有损编码
+    2. 其余音频流重新编码为 AAC，源码率低于配置码率时使用源码率，不浪费体积
+    3. 声道数或采样率超过限制时缩混或重新采样
+
+    Args:
+        media: 源文件的媒体信息
+        config: 音频配置
+
+    Returns:
+        list[AudioStreamPlan]: 按源文件中的顺序排列的每条音频流的处理方式
+    """
+    plans = []
+    for stream in media.audio_streams:
+        if _can_copy(stream, config):
+            bit_rate = math.ceil(stream.bit_rate / 1000)
+            plans.append(
+                AudioStreamPlan(index=stream.index, action="copy", bit_rate=bit_rate)
+            )
+            continue
+
+        bit_rate = config.bitrate
+        if stream.bit_rate:
+            bit_rate = max(min(bit_rate, math.ceil(stream.bit_rate / 1000)), 16)
+
+        channels = None
+        if (
+            config.max_channels is not None
+            and stream.channels is not None
+            and stream.channels > config.max_channels
+        ):
+            channels = config.max_channels
+
+        sample_rate = None
+        if (
+            config.max_sample_rate is not None
+            and stream.sample_rate is not None
+            and stream.sample_rate > config.max_sample_rate
+        ):
+            sample_rate = config.max_sample_rate
+
+        plans.append(
+            AudioStreamPlan(
+                index=stream.index,
+                action="encode",
+                bit_rate=bit_rate,
+                channels=channels,
+                sample_rate=sample_rate,
+            )
+        )
+
+    return plans
+
+
+def output_audio_bit_rate(media: MediaInfo, config: AudioConfigModel) -> int:
+    """
+    预测所有输出音频流的总码率
+
+    Args:
+        media: 源文件的媒体信息
+        config: 音频配置
+
+    Returns:
+        int: 总码率（bit/s）
+    """
+    return sum(plan.bit_rate * 1000 for plan in plan_audio(media, config))
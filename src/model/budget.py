@@ -0,0 +1,60 @@
+import threading
+
+
+class ThreadBudget:
+    """
+    线程预算类，用于在同时运行的多个编码进程之间分配CPU线程
+
+    多个ffmpeg进程各自使用默认线程数时会过度占用CPU，导致频繁的上下文切换和缓存抖动。
+    该类把可用的线程总数按照剩余的并行槽位平均分配给新启动的任务，
+    任务结束后归还的线程会分配给之后启动的任务。
+    """
+
+    def __init__(self, total_threads: int, max_jobs: int) -> None:
+        """
+        初始化线程预算
+
+        Args:
+            total_threads: 可分配的线程总数，通常为可用的CPU核心数
+            max_jobs: 同时运行的最大任务数
+        """
+        self.total_threads = max(1, total_threads)
+        self.max_jobs = max(1, max_jobs)
+
+        self._lock = threading.Lock()
+        self._allocated = 0
+        self._active_jobs = 0
+
+    def acquire(self, queued_jobs: int) -> int:
+        """
+        为一个即将启动的任务分配线程
+
+        Args:
+            queued_jobs: 尚未启动的任务数量（包括当前任务）
+
+        Returns:
+            int: 分配给该任务的线程数，至少为1
+        """
+        with self._lock:
+            free_threads = self.total_threads - self._allocated
+            free_slots = self.max_jobs - self._active_jobs
+
+            # 只在确实会被占用的槽位之间平分，队列末尾的任务可以拿到更多线程
+            sharing_jobs = max(1, min(free_slots, queued_jobs))
+            threads = max(1, free_threads // sharing_jobs)
+
+            self._active_jobs += 1
+            self._allocated += threads
+
+            return threads
+
+    def release(self, threads: int):
+        """
+        归还任务占用的线程
+
+        Args:
+            threads: 任务结束时归还的线程数，即acquire的返回值
+        """
+        with self._lock:
+            self._active_jobs -= 1
+            self._allocated -= threads
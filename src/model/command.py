@@ -0,0 +1,390 @@
+import os
+import subprocess
+from typing import Callable, Optional
+
+from src import meta
+from src.model.audio import plan_audio
+from src.model.config import ConfigModel
+from src.model.encoder import PassSettings, create_encoder
+from src.model.media import MediaInfo
+from src.utils import get_creationflags
+
+# 执行一条命令并等待结束的函数，返回捕获的文本输出，失败时抛出 CalledProcessError
+type CommandRunner = Callable[[list[str]], subprocess.CompletedProcess[str]]
+
+
+class FFmpegCommand:
+    """
+    ffmpeg 命令构造器，生成可以直接传给 subprocess 的参数列表
+
+    ffmpeg 的选项与位置有关：输入选项（如 -hwaccel）必须位于对应的 -i 之前，
+    输出选项位于所有输入之后、输出路径之前。该类按照这个顺序组装参数，
+    调用方只需要声明选项属于哪个输入或输出，不再需要拼接和转义字符串。
+
+    生成的命令会通过 -progress 把结构化的进度输出到 stdout，并关闭 stderr 中的统计行；
+    ffmpeg 不会读取标准输入。
+    """
+
+    def __init__(self, executable: Optional[str] = None):
+        """
+        Args:
+            executable: ffmpeg 可执行文件路径，为None时使用 meta.FFMPEG_PATH
+        """
+        self.executable = executable or meta.FFMPEG_PATH
+
+        self._inputs: list[list[str]] = []
+        self._output_args: list[str] = []
+        self._output: Optional[str] = None
+
+    def input(self, path: str, *options: str) -> "FFmpegCommand":
+        """
+        添加一个输入文件
+
+        Args:
+            path: 输入文件路径
+            options: 该输入的选项，会放在 -i 之前
+
+        Returns:
+            FFmpegCommand: 构造器自身，便于链式调用
+        """
+        self._inputs.append([*options, "-i", path])
+        return self
+
+    def args(self, *options: str) -> "FFmpegCommand":
+        """
+        追加输出选项
+
+        Args:
+            options: 输出选项，会放在所有输入之后
+
+        Returns:
+            FFmpegCommand: 构造器自身，便于链式调用
+        """
+        self._output_args.extend(options)
+        return self
+
+    def output(self, path: str) -> "FFmpegCommand":
+        """
+        设置输出文件路径
+
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            FFmpegCommand: 构造器自身，便于链式调用
+        """
+        self._output = path
+        return self
+
+    def build(self) -> list[str]:
+        """
+        生成完整的参数列表
+
+        Returns:
+            list[str]: 参数列表，第一个元素为可执行文件路径
+
+        Raises:
+            ValueError: 当没有输入或没有设置输出路径时抛出
+        """
+        if not self._inputs or self._output is None:
+            raise ValueError("ffmpeg 命令必须包含输入和输出")
+
+        # -nostdin：ffmpeg 不读取终端输入，命令行和监视模式下的按键不会中断编码，
+        # 在后台运行时也不会因为读取终端而被 SIGTTIN 暂停
+        command = [
+            self.executable,
+            "-y",
+            "-nostdin",
+            "-nostats",
+            "-progress",
+            "pipe:1",
+        ]
+        for input_args in self._inputs:
+            command.extend(input_args)
+        command.extend(self._output_args)
+        command.append(self._output)
+        return command
+
+
+def run_command(command: list[str]) -> subprocess.CompletedProcess[str]:
+    """
+    执行一条命令并等待其结束，捕获文本输出
+
+    Args:
+        command: 命令的参数列表
+
+    Returns:
+        subprocess.CompletedProcess[str]: 执行结果，包含 stdout 和 stderr
+
+    Raises:
+        subprocess.CalledProcessError: 当命令执行失败时抛出
+    """
+    return subprocess.run(
+        command,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        errors="replace",
+        check=True,
+        creationflags=get_creationflags(),
+    )
+
+
+def audio_args(config: ConfigModel, media: Optional[MediaInfo] = None) -> list[str]:
+    """
+    生成映射和处理所有音频流的参数
+
+    有媒体信息时按序号逐条映射音频流，并为每条输出音频流单独指定复制或编码参数；
+    没有媒体信息时映射所有音频流（如果有）并全部编码为 AAC。
+
+    Args:
+        config: 压缩配置
+        media: 源文件的媒体信息
+
+    Returns:
+        list[str]: ffmpeg 的输出参数
+    """
+    if media is None:
+        return ["-map", "0:a?", "-c:a", "aac", "-b:a", f"{config.audio.bitrate}k"]
+
+    plans = plan_audio(media, config.audio)
+    args = []
+    for plan in plans:
+        args.extend(["-map", f"0:{plan.index}"])
+
+    # 输出流的序号按映射的顺序从0开始
+    for output_index, plan in enumerate(plans):
+        if plan.action == "copy":
+            args.extend([f"-c:a:{output_index}", "copy"])
+            continue
+
+        args.extend(
+            [f"-c:a:{output_index}", "aac", f"-b:a:{output_index}", f"{plan.bit_rate}k"]
+        )
+        if plan.channels is not None:
+            args.extend([f"-ac:a:{output_index}", str(plan.channels)])
+        if plan.sample_rate is not None:
+            args.extend([f"-ar:a:{output_index}", str(plan.sample_rate)])
+
+    return args
+
+
+def encode_command(
+    input_path: str,
+    output_path: str,
+    config: ConfigModel,
+    delete_audio: bool,
+    threads: Optional[int] = None,
+    remux: bool = False,
+    two_pass: Optional[PassSettings] = None,
+    video_filter: Optional[str] = None,
+    media: Optional[MediaInfo] = None,
+) -> list[str]:
+    """
+    生成压缩单个文件的命令
+
+    Args:
+        input_path: 输入文件路径
+        output_path: 输出文件路径
+        config: 压缩配置
+        delete_audio: 是否删除音频轨道
+        threads: 分配给编码进程的CPU线程数，为None时使用编码器的默认线程数
+        remux: 是否直接复制视频流而不重新编码
+        two_pass: 两遍编码中第二遍的参数，为None时使用 CRF 单遍编码
+        video_filter: 编码前应用于视频流的滤镜，为None时不使用滤镜，复制视频流时忽略
+        media: 源文件的媒体信息，用于逐条决定音频流复制还是重新编码
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    encoder = create_encoder(config.encoder)
+
+    # 硬件加速解码是输入选项，只在重新编码时有意义
+    input_options = ["-hwaccel", "auto"] if encoder.hwaccel and not remux else []
+
+    command = FFmpegCommand().input(input_path, *input_options)
+
+    # 第一条视频流（不包括封面图片）和所有音频流
+    command.args("-map", "0:V:0")
+    if remux:
+        command.args("-c:v", "copy")
+    else:
+        if video_filter is not None:
+            command.args("-vf", video_filter)
+        command.args(*encoder.video_args(threads, two_pass))
+    if delete_audio:
+        command.args("-an")
+    else:
+        command.args(*audio_args(config, media))
+
+    return command.args("-movflags", "+faststart").output(output_path).build()
+
+
+def first_pass_command(
+    input_path: str,
+    config: ConfigModel,
+    two_pass: PassSettings,
+    threads: Optional[int] = None,
+    video_filter: Optional[str] = None,
+) -> list[str]:
+    """
+    生成两遍编码中第一遍的命令
+
+    第一遍只分析视频并写入统计文件，不处理音频，输出被丢弃。
+
+    Args:
+        input_path: 输入文件路径
+        config: 压缩配置
+        two_pass: 第一遍的参数
+        threads: 分配给编码进程的CPU线程数
+        video_filter: 编码前应用于视频流的滤镜，必须与第二遍相同
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    encoder = create_encoder(config.encoder)
+    input_options = ["-hwaccel", "auto"] if encoder.hwaccel else []
+    command = FFmpegCommand().input(input_path, *input_options).args("-map", "0:V:0")
+    if video_filter is not None:
+        command.args("-vf", video_filter)
+    return (
+        command.args(*encoder.video_args(threads, two_pass))
+        .args("-an", "-f", "null")
+        .output(os.devnull)
+        .build()
+    )
+
+
+def split_command(input_path: str, segment_time: float, pattern: str) -> list[str]:
+    """
+    生成在关键帧处无损切分视频流的命令
+
+    Args:
+        input_path: 输入文件路径
+        segment_time: 每段的目标时长（秒）
+        pattern: 分段文件路径的格式，如 part_%03d.mkv
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    return (
+        FFmpegCommand()
+        .input(input_path)
+        .args("-map", "0:V:0", "-c", "copy")
+        .args("-f", "segment", "-segment_time", f"{segment_time:.3f}")
+        .args("-reset_timestamps", "1")
+        .output(pattern)
+        .build()
+    )
+
+
+def segment_encode_command(
+    input_path: str,
+    output_path: str,
+    config: ConfigModel,
+    threads: Optional[int] = None,
+    video_filter: Optional[str] = None,
+) -> list[str]:
+    """
+    生成编码单个分段的命令，分段只包含视频流
+
+    Args:
+        input_path: 分段文件路径
+        output_path: 编码后的分段文件路径
+        config: 压缩配置
+        threads: 分配给该分段的CPU线程数
+        video_filter: 编码前应用于视频流的滤镜，为None时不使用滤镜
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    encoder = create_encoder(config.encoder)
+    command = FFmpegCommand().input(input_path)
+    if video_filter is not None:
+        command.args("-vf", video_filter)
+    return (
+        command.args(*encoder.video_args(threads))
+        .args("-an")
+        .output(output_path)
+        .build()
+    )
+
+
+def audio_command(
+    input_path: str,
+    output_path: str,
+    config: ConfigModel,
+    media: Optional[MediaInfo] = None,
+) -> list[str]:
+    """
+    生成只处理音频流的命令
+
+    Args:
+        input_path: 输入文件路径
+        output_path: 音频输出文件路径
+        config: 压缩配置
+        media: 源文件的媒体信息，用于逐条决定音频流复制还是重新编码
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    return (
+        FFmpegCommand()
+        .input(input_path)
+        .args("-vn", *audio_args(config, media))
+        .output(output_path)
+        .build()
+    )
+
+
+def concat_command(
+    list_path: str, audio_path: Optional[str], output_path: str
+) -> list[str]:
+    """
+    生成使用 concat demuxer 无损拼接分段并合入音频的命令
+
+    Args:
+        list_path: concat 列表文件路径
+        audio_path: 音频文件路径，为None时输出不包含音频
+        output_path: 输出文件路径
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    command = FFmpegCommand().input(list_path, "-f", "concat", "-safe", "0")
+    if audio_path is not None:
+        command.input(audio_path).args("-map", "0:v", "-map", "1:a")
+    else:
+        command.args("-map", "0:v")
+
+    return (
+        command.args("-c", "copy", "-movflags", "+faststart")
+        .output(output_path)
+        .build()
+    )
+
+
+def excerpt_command(
+    input_path: str, output_path: str, start: float, duration: float
+) -> list[str]:
+    """
+    生成无损截取一段视频流的命令
+
+    截取从 start 之前最近的关键帧开始，不重新编码，输出不包含音频。
+
+    Args:
+        input_path: 输入文件路径
+        output_path: 片段输出路径，建议使用 mkv 以容纳任意编码格式
+        start: 片段的开始时间（秒）
+        duration: 片段时长（秒）
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    return (
+        FFmpegCommand()
+        .input(input_path, "-ss", f"{start:.3f}")
+        .args("-t", f"{duration:.3f}", "-map", "0:V:0", "-c", "copy", "-an")
+        .output(output_path)
+        .build()
+    )
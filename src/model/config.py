@@ -1,6 +1,6 @@
-from typing import Literal
+from typing import Annotated, Any, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 type X264Preset = Literal[
     "ultrafast",
@@ -15,13 +15,37 @@ type X264Preset = Literal[
 ]
 
 
+type X264Tune = Literal[
+    "film", "animation", "grain", "stillimage", "fastdecode", "zerolatency"
+]
+
+type X264MotionEstimation = Literal["dia", "hex", "umh", "esa", "tesa"]
+
+type RemuxPolicy = Literal["off", "auto", "force"]
+
+type AudioPolicy = Literal["auto", "encode"]
+
+type SwscaleFlags = Literal[
+    "fast_bilinear", "bilinear", "bicubic", "area", "lanczos", "spline"
+]
+
+type ZscaleFilter = Literal[
+    "point", "bilinear", "bicubic", "spline16", "spline36", "lanczos"
+]
+
+
 class X264ConfigModel(BaseModel):
     """
     X264编码器配置模型类，用于定义X264视频编码器的参数
 
-    该类封装了X264编码器的核心配置参数，包括质量控制、编码速度、关键帧间隔等。
+    该类封装了X264编码器的配置参数，包括码率控制、运动估计、前瞻、心理视觉优化和线程数等。
+    除 crf、preset 外，其余参数的默认值与之前固定在命令中的取值一致；
+    可选参数为None时使用 preset 的默认值。
     """
 
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["x264"] = Field(default="x264", description="编码器类型")
     crf: float = Field(
         default=23.5, gt=0, lt=51, description="CRF值，范围在0-51之间，值越小质量越高"
     )
@@ -32,32 +56,479 @@ class X264ConfigModel(BaseModel):
     I: int = Field(default=600, description="关键帧间隔，影响视频的可编辑性和压缩率")
     r: int = Field(default=4, description="B帧参考数，影响视频质量和编码速度")
     b: int = Field(default=3, description="B帧数量，影响视频质量和压缩率")
+    tune: Optional[X264Tune] = Field(
+        default=None, description="针对内容类型的调优，为None时不使用"
+    )
+    maxrate: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="最大码率（kbps），与 CRF 一起使用时限制码率峰值，为None时不限制",
+    )
+    bufsize: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="码率控制缓冲区大小（kbps），为None时与 maxrate 相同",
+    )
+    qcomp: float = Field(
+        default=0.5, ge=0, le=1, description="量化器曲线压缩系数，越小码率越平稳"
+    )
+    me: X264MotionEstimation = Field(default="umh", description="运动估计方法")
+    subme: Optional[int] = Field(
+        default=None, ge=0, le=11, description="子像素运动估计的复杂度"
+    )
+    rc_lookahead: Optional[int] = Field(
+        default=None, ge=0, le=250, description="码率控制前瞻的帧数"
+    )
+    sc_threshold: int = Field(default=60, ge=0, description="场景切换检测阈值")
+    b_strategy: int = Field(
+        default=1, ge=0, le=2, description="自适应B帧决策方式，0关闭，1快速，2精确"
+    )
+    psy_rd: float = Field(default=0.3, ge=0, description="心理视觉率失真优化强度")
+    psy_trellis: float = Field(default=0, ge=0, description="心理视觉 trellis 强度")
+    aq_mode: int = Field(default=2, ge=0, le=3, description="自适应量化模式")
+    aq_strength: float = Field(default=0.8, ge=0, description="自适应量化强度")
+    threads: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="编码线程数，为None时由线程预算分配或使用ffmpeg的默认值",
+    )
     opencl_acceleration: bool = Field(
         default=False, description="是否启用OpenCL硬件加速"
     )
 
 
+class X265ConfigModel(BaseModel):
+    """
+    X265编码器配置模型类，用于定义HEVC视频编码器的参数
+
+    相同画质下输出体积通常比x264小三到四成，编码速度较慢。
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["x265"] = Field(default="x265", description="编码器类型")
+    crf: float = Field(
+        default=26, gt=0, lt=51, description="CRF值，范围在0-51之间，值越小质量越高"
+    )
+    preset: X264Preset = Field(default="slow", description="x265编码预设")
+    I: int = Field(default=600, ge=1, description="关键帧间隔")
+    b: int = Field(default=4, ge=0, le=16, description="B帧数量")
+
+
+class SvtAv1ConfigModel(BaseModel):
+    """
+    SVT-AV1编码器配置模型类，用于定义AV1视频编码器的参数
+
+    适合归档：相同画质下输出体积最小，preset 越小越慢、压缩率越高。
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["svt-av1"] = Field(default="svt-av1", description="编码器类型")
+    crf: int = Field(
+        default=35, ge=1, le=63, description="CRF值，范围在1-63之间，值越小质量越高"
+    )
+    preset: int = Field(
+        default=6, ge=0, le=13, description="编码预设，0最慢、压缩率最高，13最快"
+    )
+    I: int = Field(default=600, ge=1, description="关键帧间隔")
+    film_grain: int = Field(
+        default=0, ge=0, le=50, description="胶片颗粒合成强度，为0时不启用"
+    )
+
+
+# 各编码器可以使用的 CRF 范围（x264 和 x265 的 CRF 必须小于51）
+ENCODER_CRF_LIMITS: dict[str, tuple[int, int]] = {
+    "x264": (1, 50),
+    "x265": (1, 50),
+    "svt-av1": (1, 63),
+}
+
+# 自适应 CRF 默认的搜索范围，覆盖各编码器默认 CRF 附近画质可接受的区间
+ADAPTIVE_CRF_RANGES: dict[str, tuple[int, int]] = {
+    "x264": (18, 30),
+    "x265": (20, 32),
+    "svt-av1": (25, 45),
+}
+
+
+type EncoderConfigModel = Annotated[
+    X264ConfigModel | X265ConfigModel | SvtAv1ConfigModel,
+    Field(discriminator="type"),
+]
+
+
+class AudioConfigModel(BaseModel):
+    """
+    音频配置模型类，用于定义保留音频时的处理方式
+
+    每条音频流根据媒体信息单独决定：编码格式、码率、声道数和采样率都已经满足要求时
+    直接复制，否则重新编码为 AAC。
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    bitrate: int = Field(
+        default=128, ge=16, le=512, description="每条音频流的AAC码率（kbps）"
+    )
+    policy: AudioPolicy = Field(
+        default="auto",
+        description="auto 在源音频已经满足要求时直接复制，encode 总是重新编码",
+    )
+    copy_codecs: list[str] = Field(
+        default_factory=lambda: ["aac"],
+        description="可以直接复制的音频编码格式（ffprobe 的 codec_name）",
+    )
+    max_channels: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=8,
+        description="最大声道数，为1时缩混为单声道，为None时不限制",
+    )
+    max_sample_rate: Optional[int] = Field(
+        default=None,
+        ge=8000,
+        le=96000,
+        description="最大采样率（Hz），为None时不限制",
+    )
+
+
+class ScaleConfigModel(BaseModel):
+    """
+    缩放配置模型类，用于定义输出视频的最大分辨率和帧率
+
+    超过限制的视频在编码前缩小到限制之内，保持宽高比；已经在限制之内的视频不经过缩放。
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    max_width: Optional[int] = Field(
+        default=None, ge=16, description="输出视频的最大宽度（像素），为None时不限制"
+    )
+    max_height: Optional[int] = Field(
+        default=None, ge=16, description="输出视频的最大高度（像素），为None时不限制"
+    )
+    max_fps: Optional[float] = Field(
+        default=None, gt=0, description="输出视频的最大帧率，为None时不限制"
+    )
+    scaler: Literal["swscale", "zscale"] = Field(
+        default="swscale",
+        description="缩放滤镜，swscale 为 ffmpeg 内置的 scale，zscale 需要 ffmpeg 编译 zimg",
+    )
+    swscale_flags: SwscaleFlags = Field(
+        default="bicubic", description="使用 swscale 时的缩放算法"
+    )
+    zscale_filter: ZscaleFilter = Field(
+        default="bilinear", description="使用 zscale 时的缩放算法"
+    )
+
+
+class AdaptiveCrfConfigModel(BaseModel):
+    """
+    自适应 CRF 配置模型类，用于定义按内容为每个文件选择 CRF 的参数
+
+    压缩前从文件中截取几个短片段，使用快速预设以不同的 CRF 试编码并测量画质，
+    选择画质达到目标的最大 CRF，再以该 CRF 正式编码。
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    enabled: bool = Field(default=False, description="是否启用自适应 CRF")
+    metric: Literal["auto", "vmaf", "ssim"] = Field(
+        default="auto",
+        description="画质指标，auto 在 ffmpeg 支持 libvmaf 时使用 vmaf，否则使用 ssim",
+    )
+    target_vmaf: float = Field(
+        default=93, gt=0, le=100, description="使用 VMAF 时的目标画质"
+    )
+    target_ssim: float = Field(
+        default=0.985, gt=0, le=1, description="使用 SSIM 时的目标画质"
+    )
+    min_crf: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=63,
+        description="搜索的最小 CRF，为None时使用所选编码器的默认搜索范围",
+    )
+    max_crf: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=63,
+        description="搜索的最大 CRF，为None时使用所选编码器的默认搜索范围",
+    )
+    samples: int = Field(default=3, ge=1, le=10, description="试编码的片段数量")
+    sample_length: float = Field(
+        default=4, gt=0, description="每个试编码片段的时长（秒）"
+    )
+    max_probes: int = Field(default=4, ge=1, le=8, description="最多尝试的 CRF 数量")
+    min_duration: float = Field(
+        default=120,
+        ge=0,
+        description="时长不小于该值（秒）的视频才使用自适应 CRF，较短的视频试编码不划算",
+    )
+
+    def crf_range(self, encoder_type: str) -> tuple[int, int]:
+        """
+        获取 CRF 的搜索范围
+
+        Args:
+            encoder_type: 编码器类型，即 encoder.type
+
+        Returns:
+            tuple[int, int]: 最小和最大 CRF，未设置的一端使用该编码器的默认值
+        """
+        default_min, default_max = ADAPTIVE_CRF_RANGES[encoder_type]
+        return (
+            default_min if self.min_crf is None else self.min_crf,
+            default_max if self.max_crf is None else self.max_crf,
+        )
+
+
 class ConfigModel(BaseModel):
     """
     视频压缩配置模型类，用于定义完整的视频压缩配置
 
-    该类包含配置名称和X264编码器配置，用于完整描述一组视频压缩参数。
+    该类包含配置名称、视频编码器配置和分段编码设置，用于完整描述一组视频压缩参数。
+    编码器通过 encoder.type 选择，旧版配置文件中的 x264 字段会被自动转换。
     """
 
+    model_config = ConfigDict(extra="forbid")
+
     name: str = Field(default="default", description="配置名称，用于标识不同的压缩配置")
-    # TODO: 把编码器抽象出来成为接口，后面支持x265
-    x264: X264ConfigModel = Field(
-        default_factory=X264ConfigModel, description="X264编码器配置参数"
+    encoder: EncoderConfigModel = Field(
+        default_factory=X264ConfigModel,
+        description="视频编码器配置，type 为 x264、x265 或 svt-av1",
+    )
+    audio: AudioConfigModel = Field(
+        default_factory=AudioConfigModel, description="音频编码配置"
+    )
+    segment_count: int = Field(
+        default=1,
+        ge=1,
+        description="长视频分段并行编码的段数，为1时不分段",
+    )
+    segment_min_duration: float = Field(
+        default=1800,
+        ge=0,
+        description="启用分段并行编码的最短视频时长（秒）",
+    )
+    min_savings: float = Field(
+        default=0.1,
+        ge=0,
+        lt=1,
+        description="预计压缩后节省的体积比例低于该值时跳过文件，为0时只跳过预计会变大的文件",
+    )
+    remux: RemuxPolicy = Field(
+        default="off",
+        description="直接复制视频流（只删除或重新编码音频）的策略："
+        "off 总是重新编码，auto 在重新编码收益不足而复制视频流足以节省体积时使用，"
+        "force 总是复制视频流",
+    )
+    target_size_mb: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="目标输出体积（MB），设置后根据时长和音频码率计算视频码率并两遍编码，"
+        "为None时使用 CRF 单遍编码",
+    )
+
+    adaptive: AdaptiveCrfConfigModel = Field(
+        default_factory=AdaptiveCrfConfigModel, description="自适应 CRF 配置"
+    )
+    scale: ScaleConfigModel = Field(
+        default_factory=ScaleConfigModel, description="最大分辨率和帧率配置"
+    )
+
+    @model_validator(mode="after")
+    def _check_target_size(self) -> "ConfigModel":
+        """
+        检查目标体积模式与其他参数是否冲突
+
+        Returns:
+            ConfigModel: 配置自身
+
+        Raises:
+            ValueError: 当编码器不支持两遍编码，同时强制复制视频流，
+                        或同时启用自适应 CRF 时抛出
+        """
+        if self.target_size_mb is None:
+            return self
+        if isinstance(self.encoder, SvtAv1ConfigModel):
+            raise ValueError("svt-av1 编码器不支持目标体积模式（两遍编码）")
+        if self.remux == "force":
+            raise ValueError("目标体积模式不能与 remux=force 同时使用")
+        if self.adaptive.enabled:
+            raise ValueError("目标体积模式不能与自适应 CRF 同时使用")
+        return self
+
+    @model_validator(mode="after")
+    def _check_adaptive_crf(self) -> "ConfigModel":
+        """
+        检查自适应 CRF 的搜索范围是否适用于所选的编码器
+
+        Returns:
+            ConfigModel: 配置自身
+
+        Raises:
+            ValueError: 当搜索范围超出编码器的 CRF 范围，或最小 CRF 大于最大 CRF 时抛出
+        """
+        encoder_type = self.encoder.type
+        min_crf, max_crf = self.adaptive.crf_range(encoder_type)
+        lower, upper = ENCODER_CRF_LIMITS[encoder_type]
+        if min_crf > max_crf:
+            raise ValueError(f"自适应 CRF 的最小值 {min_crf} 不能大于最大值 {max_crf}")
+        if min_crf < lower or max_crf > upper:
+            raise ValueError(
+                f"自适应 CRF 的搜索范围 {min_crf}-{max_crf} 超出 {encoder_type} "
+                f"的 CRF 范围 {lower}-{upper}"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def _check_scale(self) -> "ConfigModel":
+        """
+        检查最大分辨率和帧率限制与复制视频流是否冲突
+
+        Returns:
+            ConfigModel: 配置自身
+
+        Raises:
+            ValueError: 当设置了限制又强制复制视频流时抛出
+        """
+        scale = self.scale
+        limited = any(
+            value is not None
+            for value in (scale.max_width, scale.max_height, scale.max_fps)
+        )
+        if limited and self.remux == "force":
+            raise ValueError("最大分辨率和帧率限制不能与 remux=force 同时使用")
+        return self
+
+    @model_validator(mode="before")
+    @classmethod
+    def _migrate_x264(cls, data: Any) -> Any:
+        """
+        把旧版配置文件中的 x264 字段转换为 encoder 字段
+
+        Args:
+            data: 原始配置数据
+
+        Returns:
+            Any: 转换后的配置数据
+        """
+        if isinstance(data, dict) and "x264" in data and "encoder" not in data:
+            data = dict(data)
+            x264 = data.pop("x264")
+            data["encoder"] = (
+                {**x264, "type": "x264"} if isinstance(x264, dict) else x264
+            )
+        return data
+
+
+def fast_ingest_config() -> ConfigModel:
+    """
+    生成快速导入配置
+
+    适合需要尽快处理大量新素材的场景：使用 veryfast 预设、较少的参考帧、
+    六边形运动估计和较短的码率控制前瞻，编码速度约为 veryslow 的五倍以上，
+    略微降低 CRF 以弥补画质损失，输出体积会比默认配置大一些。
+
+    Returns:
+        ConfigModel: 快速导入配置
+    """
+    return ConfigModel(
+        name="fast_ingest",
+        encoder=X264ConfigModel(
+            crf=22,
+            preset="veryfast",
+            r=2,
+            b=3,
+            me="hex",
+            subme=4,
+            rc_lookahead=20,
+            aq_mode=1,
+        ),
     )
 
 
+class WatchConfigModel(BaseModel):
+    """
+    监视模式配置模型类，用于定义持续监视目录并自动压缩新文件的参数
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    directories: list[str] = Field(
+        default_factory=list,
+        description="监视的目录列表，命令行没有指定目录时使用",
+    )
+    backend: Literal["auto", "inotify", "polling"] = Field(
+        default="auto",
+        description="监视方式，auto 优先使用 inotify，网络挂载目录请使用 polling",
+    )
+    recursive: bool = Field(default=True, description="是否监视子目录")
+    poll_interval: float = Field(
+        default=5, gt=0, description="轮询监视时两次扫描目录的间隔（秒）"
+    )
+    stable_seconds: float = Field(
+        default=10,
+        ge=0,
+        description="文件大小和修改时间保持不变超过该时间（秒）后才开始压缩",
+    )
+
+
+class StagingConfigModel(BaseModel):
+    """
+    本地暂存配置模型类，用于定义源文件和输出文件位于慢速网络存储时的中转参数
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    enabled: bool = Field(
+        default=False,
+        description="是否先把源文件预取到本地暂存目录压缩，再在后台上传输出文件",
+    )
+    directory: str = Field(
+        default="", description="本地暂存目录，为空时使用系统临时目录"
+    )
+    prefetch_count: int = Field(default=2, ge=1, description="最多提前预取的源文件数量")
+    max_size_gb: float = Field(
+        default=20,
+        gt=0,
+        description="暂存目录最多占用的磁盘空间（GB），超过该值一半的文件不暂存",
+    )
+    upload_workers: int = Field(default=1, ge=1, description="并行上传输出文件的线程数")
+
+
 class ConfigsModel(BaseModel):
     """
     配置集合模型类，用于管理多个视频压缩配置
 
     该类包含一个配置列表，用于存储和管理应用程序支持的所有视频压缩配置。
+    默认包含通用的 default 配置和用于快速导入的 fast_ingest 配置。
+    配置文件中出现未知的字段时校验失败，避免拼写错误的参数被悄悄忽略。
     """
 
+    model_config = ConfigDict(extra="forbid")
+
     configs: list[ConfigModel] = Field(
-        default_factory=lambda: [ConfigModel()], description="视频压缩配置列表"
+        default_factory=lambda: [ConfigModel(), fast_ingest_config()],
+        description="视频压缩配置列表",
+    )
+    max_parallel_jobs: int = Field(
+        default=1, ge=1, description="同时进行压缩的最大文件数量"
+    )
+    scan_workers: int = Field(
+        default=4,
+        ge=1,
+        description="递归扫描文件夹时并行列举目录的线程数，网络共享上可适当调大",
+    )
+    thread_budget: bool = Field(
+        default=True,
+        description="是否在并行的压缩任务之间分配CPU线程，关闭后使用ffmpeg的默认线程数",
+    )
+    watch: WatchConfigModel = Field(
+        default_factory=WatchConfigModel, description="监视模式配置"
+    )
+    staging: StagingConfigModel = Field(
+        default_factory=StagingConfigModel, description="本地暂存配置"
     )
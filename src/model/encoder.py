@@ -0,0 +1,367 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.model.config import (
+    EncoderConfigModel,
+    SvtAv1ConfigModel,
+    X264ConfigModel,
+    X265ConfigModel,
+)
+
+# 可以容纳 HEVC 和 AV1 视频流的容器格式，其余格式的输出改为 mkv
+MODERN_CONTAINERS = {".mp4", ".mkv", ".mov"}
+
+
+class PassSettings(BaseModel):
+    """
+    两遍编码中某一遍的参数
+
+    Attributes:
+        bit_rate: 目标视频码率（kbps）
+        pass_num: 当前是第几遍，1 或 2
+        stats_path: 两遍之间共享的统计文件路径（不含扩展名）
+    """
+
+    bit_rate: int
+    pass_num: int
+    stats_path: str
+
+
+def _escape_x265_param(value: str) -> str:
+    """
+    转义 x265-params 中的参数值
+
+    ffmpeg 按冒号分隔参数、按等号分隔键和值，并支持反斜杠转义。
+    Windows 路径中的盘符冒号和反斜杠都需要转义，否则会破坏解析。
+
+    Args:
+        value: 原始参数值
+
+    Returns:
+        str: 转义后的参数值
+    """
+    for char in ("\\", "'", ":", "="):
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+class IEncoder(ABC):
+    """
+    视频编码器接口
+
+    每个编码器根据自己的配置模型生成 ffmpeg 的视频编码参数，
+    并提供预检和输出文件命名所需的信息。
+    """
+
+    @property
+    @abstractmethod
+    def suffix(self) -> str:
+        """
+        获取输出文件名的后缀，例如 x264
+
+        Returns:
+            str: 输出文件名的后缀
+        """
+
+    @property
+    @abstractmethod
+    def codec_name(self) -> str:
+        """
+        获取输出视频流的编码格式名称，与 ffprobe 的 codec_name 一致
+
+        Returns:
+            str: 编码格式名称，如 h264、hevc、av1
+        """
+
+    @property
+    @abstractmethod
+    def x264_crf(self) -> float:
+        """
+        获取画质大致相当的 x264 CRF 值，用于预测输出体积
+
+        Returns:
+            float: 等效的 x264 CRF 值
+        """
+
+    @property
+    def hwaccel(self) -> bool:
+        """
+        判断是否启用硬件加速解码
+
+        Returns:
+            bool: 启用时返回True
+        """
+        return False
+
+    @abstractmethod
+    def video_args(
+        self, threads: Optional[int], two_pass: Optional[PassSettings] = None
+    ) -> list[str]:
+        """
+        生成视频编码参数
+
+        Args:
+            threads: 分配给编码进程的CPU线程数，为None时使用编码器的默认线程数
+            two_pass: 两遍编码的参数，为None时使用 CRF 单遍编码
+
+        Returns:
+            list[str]: 视频编码部分的命令行参数
+        """
+
+    @abstractmethod
+    def probe_config(self, crf: int) -> EncoderConfigModel:
+        """
+        生成自适应 CRF 试编码使用的编码器配置
+
+        试编码使用较快的预设；相同 CRF 下快速预设的画质略低，
+        因此据此选出的 CRF 在正式编码时画质只会更好。
+
+        Args:
+            crf: 试编码的 CRF 值
+
+        Returns:
+            EncoderConfigModel: 使用快速预设和指定 CRF 的编码器配置
+        """
+
+    def output_extension(self, ext: str) -> str:
+        """
+        根据源文件的扩展名确定输出文件的扩展名
+
+        Args:
+            ext: 源文件的扩展名（小写，包含 .）
+
+        Returns:
+            str: 输出文件的扩展名
+        """
+        return ext if ext in MODERN_CONTAINERS else ".mkv"
+
+
+class X264Encoder(IEncoder):
+    """
+    libx264 编码器
+    """
+
+    def __init__(self, config: X264ConfigModel):
+        self.config = config
+
+    @property
+    def suffix(self) -> str:
+        return "x264"
+
+    @property
+    def codec_name(self) -> str:
+        return "h264"
+
+    @property
+    def x264_crf(self) -> float:
+        return self.config.crf
+
+    @property
+    def hwaccel(self) -> bool:
+        return self.config.opencl_acceleration
+
+    def video_args(
+        self, threads: Optional[int], two_pass: Optional[PassSettings] = None
+    ) -> list[str]:
+        config = self.config
+
+        # 配置中指定的线程数优先于线程预算分配的线程数
+        threads = config.threads or threads
+
+        args = ["-c:v", "libx264", "-preset", config.preset]
+        if two_pass is None:
+            args += ["-crf", str(config.crf)]
+        else:
+            # 第一遍只收集统计信息，x264 会自动降低第一遍的分析强度
+            args += [
+                "-b:v",
+                f"{two_pass.bit_rate}k",
+                "-pass",
+                str(two_pass.pass_num),
+                "-passlogfile",
+                two_pass.stats_path,
+            ]
+        if config.tune is not None:
+            args += ["-tune", config.tune]
+
+        # 显式指定线程数，避免并行的多个编码进程抢占CPU
+        # lookahead 线程数沿用 x264 自身的比例（线程数的 1/6）
+        if threads is not None:
+            args += [
+                "-threads",
+                str(threads),
+                "-x264-params",
+                f"lookahead-threads={max(1, threads // 6)}",
+            ]
+
+        if config.maxrate is not None:
+            args += [
+                "-maxrate",
+                f"{config.maxrate}k",
+                "-bufsize",
+                f"{config.bufsize or config.maxrate}k",
+            ]
+
+        args += [
+            "-keyint_min",
+            str(config.I),
+            "-g",
+            str(config.I),
+            "-refs",
+            str(config.r),
+            "-bf",
+            str(config.b),
+            "-me_method",
+            config.me,
+        ]
+        if config.subme is not None:
+            args += ["-subq", str(config.subme)]
+        if config.rc_lookahead is not None:
+            args += ["-rc-lookahead", str(config.rc_lookahead)]
+
+        return args + [
+            "-sc_threshold",
+            str(config.sc_threshold),
+            "-b_strategy",
+            str(config.b_strategy),
+            "-qcomp",
+            str(config.qcomp),
+            "-psy-rd",
+            f"{config.psy_rd}:{config.psy_trellis}",
+            "-aq-mode",
+            str(config.aq_mode),
+            "-aq-strength",
+            str(config.aq_strength),
+        ]
+
+    def probe_config(self, crf: int) -> EncoderConfigModel:
+        return self.config.model_copy(update={"crf": crf, "preset": "veryfast"})
+
+    def output_extension(self, ext: str) -> str:
+        # H.264 几乎可以放入所有容器，保持源文件的格式
+        return ext
+
+
+class X265Encoder(IEncoder):
+    """
+    libx265 (HEVC) 编码器
+    """
+
+    def __init__(self, config: X265ConfigModel):
+        self.config = config
+
+    @property
+    def suffix(self) -> str:
+        return "x265"
+
+    @property
+    def codec_name(self) -> str:
+        return "hevc"
+
+    @property
+    def x264_crf(self) -> float:
+        # x265 的 CRF 比 x264 高约 5 时画质相当
+        return self.config.crf - 5
+
+    def video_args(
+        self, threads: Optional[int], two_pass: Optional[PassSettings] = None
+    ) -> list[str]:
+        config = self.config
+
+        params = [f"keyint={config.I}", f"bframes={config.b}", "log-level=error"]
+        # libx265 不使用 -threads，而是通过线程池大小限制CPU占用
+        if threads is not None:
+            params.append(f"pools={threads}")
+
+        rate_args = ["-crf", str(config.crf)]
+        if two_pass is not None:
+            rate_args = ["-b:v", f"{two_pass.bit_rate}k"]
+            # 使用绝对路径并转义：临时目录与当前目录可能位于不同的盘符，无法使用相对路径
+            stats_path = _escape_x265_param(os.path.abspath(two_pass.stats_path))
+            params += [f"pass={two_pass.pass_num}", f"stats={stats_path}"]
+
+        return [
+            "-c:v",
+            "libx265",
+            *rate_args,
+            "-preset",
+            config.preset,
+            "-x265-params",
+            ":".join(params),
+        ]
+
+    def probe_config(self, crf: int) -> EncoderConfigModel:
+        return self.config.model_copy(update={"crf": crf, "preset": "veryfast"})
+
+
+class SvtAv1Encoder(IEncoder):
+    """
+    libsvtav1 (AV1) 编码器
+    """
+
+    def __init__(self, config: SvtAv1ConfigModel):
+        self.config = config
+
+    @property
+    def suffix(self) -> str:
+        return "av1"
+
+    @property
+    def codec_name(self) -> str:
+        return "av1"
+
+    @property
+    def x264_crf(self) -> float:
+        # SVT-AV1 的 CRF 35 与 x264 的 CRF 23 画质大致相当，每差 2 约相当于 x264 的 1
+        return 23 + (self.config.crf - 35) / 2
+
+    def video_args(
+        self, threads: Optional[int], two_pass: Optional[PassSettings] = None
+    ) -> list[str]:
+        config = self.config
+
+        params = [f"keyint={config.I}"]
+        if config.film_grain > 0:
+            params.append(f"film-grain={config.film_grain}")
+        # 限制逻辑处理器数，避免并行的多个编码进程抢占CPU
+        if threads is not None:
+            params.append(f"lp={threads}")
+
+        return [
+            "-c:v",
+            "libsvtav1",
+            "-crf",
+            str(config.crf),
+            "-preset",
+            str(config.preset),
+            "-svtav1-params",
+            ":".join(params),
+        ]
+
+    def probe_config(self, crf: int) -> EncoderConfigModel:
+        # preset 10 以上的速度与 x264 veryfast 相当
+        return self.config.model_copy(
+            update={"crf": crf, "preset": max(self.config.preset, 10)}
+        )
+
+
+def create_encoder(config: EncoderConfigModel) -> IEncoder:
+    """
+    根据编码器配置创建编码器
+
+    Args:
+        config: 编码器配置
+
+    Returns:
+        IEncoder: 编码器
+    """
+    match config:
+        case X265ConfigModel():
+            return X265Encoder(config)
+        case SvtAv1ConfigModel():
+            return SvtAv1Encoder(config)
+        case _:
+            return X264Encoder(config)
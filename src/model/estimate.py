@@ -0,0 +1,206 @@
+from typing import Optional
+
+from src.model.media import MediaInfo
+
+# x264 在 CRF 23 下压缩 1080p 普通内容时的典型码率（每像素比特数）
+REFERENCE_BITS_PER_PIXEL = 0.065
+
+# 参考分辨率的像素数（1920x1080）
+REFERENCE_PIXELS = 1920 * 1080
+
+# 相同画质下 x264 相对于源编码格式所需的码率倍数
+# 源文件编码越先进，重新编码为 H.264 后越难变小
+CODEC_EFFICIENCY = {
+    "h264": 1.0,
+    "hevc": 1.5,
+    "vp9": 1.4,
+    "av1": 1.8,
+    "mpeg4": 0.7,
+    "mpeg2video": 0.5,
+    "mjpeg": 0.2,
+    "prores": 0.1,
+    "rawvideo": 0.05,
+}
+
+# 压缩后每条音频流的默认码率（bit/s）
+AUDIO_BIT_RATE = 128_000
+
+# 目标体积模式下为容器开销预留的比例
+CONTAINER_OVERHEAD = 0.02
+
+# 目标体积模式下允许的最低视频码率（bit/s），低于该值时画面已无法使用
+MIN_VIDEO_BIT_RATE = 64_000
+
+
+def estimate_output_size(
+    media: MediaInfo,
+    crf: float,
+    delete_audio: bool,
+    codec_name: str = "h264",
+    audio_bit_rate: Optional[int] = None,
+) -> Optional[int]:
+    """
+    预测视频压缩后的文件大小
+
+    预测值取以下两者中较小的一个：
+    1. 按照分辨率、帧率和 CRF 估算的 x264 典型码率
+    2. 源视频码率乘以源编码格式相对于 x264 的效率倍数
+
+    CRF 每增加 6，码率约减半；分辨率越低，每像素需要的比特数越高。
+    输出为其他编码格式时，两者再除以该格式相对于 x264 的效率倍数。
+
+    Args:
+        media: 源文件的媒体信息
+        crf: 压缩使用的 CRF 值，其他编码器需换算为画质相当的 x264 CRF
+        delete_audio: 是否删除音频轨道
+        codec_name: 输出视频流的编码格式
+        audio_bit_rate: 所有音频流的总输出码率（bit/s），为None时每条按 AUDIO_BIT_RATE 计算
+
+    Returns:
+        Optional[int]: 预测的输出文件大小（字节），媒体信息不足时返回None
+    """
+    video = media.video_stream
+    if video is None or not video.width or not video.height or media.duration <= 0:
+        return None
+
+    pixels = video.width * video.height
+    fps = video.fps or 30.0
+
+    bits_per_pixel = (
+        REFERENCE_BITS_PER_PIXEL
+        * (pixels / REFERENCE_PIXELS) ** -0.25
+        * 2 ** ((23 - crf) / 6)
+    )
+    output_efficiency = CODEC_EFFICIENCY.get(codec_name, 1.0)
+    video_bit_rate = bits_per_pixel * pixels * fps / output_efficiency
+
+    source_bit_rate = source_video_bit_rate(media)
+    if source_bit_rate is not None:
+        efficiency = CODEC_EFFICIENCY.get(video.codec_name, 1.0)
+        video_bit_rate = min(
+            video_bit_rate, source_bit_rate * efficiency / output_efficiency
+        )
+
+    total_audio_bit_rate = _total_audio_bit_rate(media, delete_audio, audio_bit_rate)
+
+    return int((video_bit_rate + total_audio_bit_rate) * media.duration / 8)
+
+
+def estimate_remux_size(
+    media: MediaInfo, delete_audio: bool, audio_bit_rate: Optional[int] = None
+) -> Optional[int]:
+    """
+    预测只复制视频流、删除或重新编码音频时的输出文件大小
+
+    Args:
+        media: 源文件的媒体信息
+        delete_audio: 是否删除音频轨道
+        audio_bit_rate: 所有音频流的总输出码率（bit/s），为None时每条按 AUDIO_BIT_RATE 计算
+
+    Returns:
+        Optional[int]: 预测的输出文件大小（字节），媒体信息不足时返回None
+    """
+    video_bit_rate = source_video_bit_rate(media)
+    if video_bit_rate is None or media.duration <= 0:
+        return None
+
+    total_audio_bit_rate = _total_audio_bit_rate(media, delete_audio, audio_bit_rate)
+
+    return int((video_bit_rate + total_audio_bit_rate) * media.duration / 8)
+
+
+def _total_audio_bit_rate(
+    media: MediaInfo, delete_audio: bool, audio_bit_rate: Optional[int]
+) -> int:
+    """
+    计算输出中所有音频流的总码率
+
+    Args:
+        media: 源文件的媒体信息
+        delete_audio: 是否删除音频轨道
+        audio_bit_rate: 所有音频流的总输出码率（bit/s），为None时每条按 AUDIO_BIT_RATE 计算
+
+    Returns:
+        int: 总码率（bit/s）
+    """
+    if delete_audio:
+        return 0
+    if audio_bit_rate is None:
+        return AUDIO_BIT_RATE * len(media.audio_streams)
+    return audio_bit_rate
+
+
+def target_video_bit_rate(
+    target_size: int, duration: float, audio_bit_rate: int
+) -> int:
+    """
+    计算输出达到目标体积所需的视频码率
+
+    从目标体积中扣除容器开销和音频占用的空间，剩余部分平均分配给视频。
+
+    Args:
+        target_size: 目标输出体积（字节）
+        duration: 视频时长（秒）
+        audio_bit_rate: 所有音频流的总码率（bit/s）
+
+    Returns:
+        int: 视频码率（bit/s）
+
+    Raises:
+        ValueError: 当时长未知，或目标体积过小、无法容纳音频和最低视频码率时抛出
+    """
+    if duration <= 0:
+        raise ValueError("目标体积模式需要知道视频时长")
+
+    total_bit_rate = target_size * 8 * (1 - CONTAINER_OVERHEAD) / duration
+    video_bit_rate = int(total_bit_rate - audio_bit_rate)
+    if video_bit_rate < MIN_VIDEO_BIT_RATE:
+        raise ValueError(
+            f"目标体积 {target_size} 字节过小，扣除音频后视频码率只有 "
+            f"{max(video_bit_rate, 0) // 1000} kbps"
+        )
+    return video_bit_rate
+
+
+def source_video_bit_rate(media: MediaInfo) -> Optional[float]:
+    """
+    获取源文件视频流的码率
+
+    视频流没有记录码率时，使用总码率减去音频码率估算。
+
+    Args:
+        media: 源文件的媒体信息
+
+    Returns:
+        Optional[float]: 视频流码率（bit/s），无法获取时返回None
+    """
+    video = media.video_stream
+    if video is not None and video.bit_rate:
+        return float(video.bit_rate)
+
+    total_bit_rate = media.bit_rate
+    if not total_bit_rate and media.size and media.duration > 0:
+        total_bit_rate = int(media.size * 8 / media.duration)
+    if not total_bit_rate:
+        return None
+
+    audio_bit_rate = sum(stream.bit_rate or 0 for stream in media.audio_streams)
+    return float(max(total_bit_rate - audio_bit_rate, 0))
+
+
+def bits_per_pixel(media: MediaInfo) -> Optional[float]:
+    """
+    计算源文件视频流的每像素比特数
+
+    Args:
+        media: 源文件的媒体信息
+
+    Returns:
+        Optional[float]: 每像素比特数，媒体信息不足时返回None
+    """
+    video = media.video_stream
+    bit_rate = source_video_bit_rate(media)
+    if video is None or not video.width or not video.height or bit_rate is None:
+        return None
+
+    return bit_rate / (video.width * video.height * (video.fps or 30.0))
@@ -0,0 +1,352 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional
+
+from pydantic import BaseModel
+
+from src.model.video import TaskInfo, TaskStatus
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    info TEXT NOT NULL,
+    scan_finished INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id INTEGER NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+    input_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    UNIQUE (batch_id, input_path)
+);
+CREATE INDEX IF NOT EXISTS jobs_batch_status ON jobs(batch_id, status, id);
+"""
+
+
+class JobBatch(BaseModel):
+    """
+    压缩批次模型类，对应一次提交的压缩任务
+
+    Attributes:
+        id: 批次编号
+        info: 任务配置信息，用于恢复被中断的批次
+        scan_finished: 批次的文件扫描是否已经完成，
+                       完成后恢复时只需处理队列中剩余的文件，无需重新扫描
+        pending_num: 尚未处理完成的文件数
+    """
+
+    id: int
+    info: TaskInfo
+    scan_finished: bool = False
+    pending_num: int = 0
+
+
+class JobQueue:
+    """
+    持久化的压缩任务队列，基于 SQLite（WAL 模式）
+
+    每个被发现的文件都是一条任务记录，状态与 TaskStatus 一致。
+    领取和完成任务都是单条带条件的 UPDATE，是原子操作；程序崩溃或关闭时
+    处于 PROCESSING 的任务会在下次打开时恢复为 PENDING。
+    通过 (batch_id, status, id) 索引，入队、领取和按状态统计都不需要扫描整张表。
+    该类是线程安全的。
+    """
+
+    def __init__(self, file_path: str):
+        """
+        初始化任务队列
+
+        Args:
+            file_path: 数据库文件路径
+        """
+        self._file_path = file_path
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def file_path(self) -> str:
+        """
+        获取数据库文件路径
+
+        Returns:
+            str: 数据库文件路径
+        """
+        return self._file_path
+
+    def open(self):
+        """
+        打开数据库，并恢复上次运行时被中断的任务
+
+        该方法会：
+        1. 创建数据表（如果不存在）
+        2. 把处于 PROCESSING 状态的任务恢复为 PENDING
+        3. 删除已经全部处理完成的批次
+        """
+        connection = sqlite3.connect(
+            self.file_path, check_same_thread=False, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.executescript(_SCHEMA)
+
+        with self._lock:
+            self._connection = connection
+            recovered = self._execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (TaskStatus.PENDING.value, time.time(), TaskStatus.PROCESSING.value),
+            ).rowcount
+
+        if recovered:
+            logging.info(f"恢复了 {recovered} 个被中断的压缩任务")
+
+        for batch in self._finished_batch_ids():
+            self.close_batch(batch)
+
+    def close(self):
+        """
+        关闭数据库
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def create_batch(self, info: TaskInfo) -> int:
+        """
+        创建一个压缩批次
+
+        Args:
+            info: 任务配置信息
+
+        Returns:
+            int: 批次编号
+        """
+        with self._lock:
+            return self._execute(
+                "INSERT INTO batches (info, created_at) VALUES (?, ?)",
+                (info.model_dump_json(), time.time()),
+            ).lastrowid
+
+    def finish_scan(self, batch_id: int):
+        """
+        标记批次的文件扫描已经完成
+
+        Args:
+            batch_id: 批次编号
+        """
+        with self._lock:
+            self._execute(
+                "UPDATE batches SET scan_finished = 1 WHERE id = ?", (batch_id,)
+            )
+
+    def close_batch(self, batch_id: int):
+        """
+        删除批次及其所有任务记录，批次处理完成或被放弃时调用
+
+        Args:
+            batch_id: 批次编号
+        """
+        with self._lock:
+            self._execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    def enqueue(self, batch_id: int, input_path: str) -> int:
+        """
+        将文件加入批次，文件已经在批次中时返回已有的任务编号
+
+        Args:
+            batch_id: 批次编号
+            input_path: 输入文件路径
+
+        Returns:
+            int: 任务编号
+        """
+        with self._lock:
+            cursor = self._execute(
+                "INSERT OR IGNORE INTO jobs (batch_id, input_path, status, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (batch_id, input_path, TaskStatus.PENDING.value, time.time()),
+            )
+            if cursor.rowcount:
+                return cursor.lastrowid
+
+            return self._execute(
+                "SELECT id FROM jobs WHERE batch_id = ? AND input_path = ?",
+                (batch_id, input_path),
+            ).fetchone()[0]
+
+    def claim(self, job_id: int) -> bool:
+        """
+        领取任务，把任务从 PENDING 改为 PROCESSING
+
+        Args:
+            job_id: 任务编号
+
+        Returns:
+            bool: 领取成功时返回True，任务不存在或不是 PENDING 状态时返回False
+        """
+        with self._lock:
+            return (
+                self._execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ? AND status = ?",
+                    (
+                        TaskStatus.PROCESSING.value,
+                        time.time(),
+                        job_id,
+                        TaskStatus.PENDING.value,
+                    ),
+                ).rowcount
+                == 1
+            )
+
+    def complete(self, job_id: int, status: TaskStatus):
+        """
+        记录任务的处理结果
+
+        Args:
+            job_id: 任务编号
+            status: 处理结果
+        """
+        with self._lock:
+            self._execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (status.value, time.time(), job_id),
+            )
+
+    def release(self, job_id: int):
+        """
+        放回被领取但没有处理的任务，例如处理过程中被停止
+
+        Args:
+            job_id: 任务编号
+        """
+        with self._lock:
+            self._execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (
+                    TaskStatus.PENDING.value,
+                    time.time(),
+                    job_id,
+                    TaskStatus.PROCESSING.value,
+                ),
+            )
+
+    def status_counts(self, batch_id: int) -> dict[TaskStatus, int]:
+        """
+        统计批次中各个状态的任务数量
+
+        Args:
+            batch_id: 批次编号
+
+        Returns:
+            dict[TaskStatus, int]: 状态 -> 任务数量，没有任务的状态不包含在内
+        """
+        with self._lock:
+            rows = self._execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE batch_id = ? GROUP BY status",
+                (batch_id,),
+            ).fetchall()
+        return {TaskStatus(status): count for status, count in rows}
+
+    def iter_pending(self, batch_id: int, page_size: int = 500) -> Iterator[str]:
+        """
+        按照入队顺序迭代批次中尚未处理的文件
+
+        分页读取，不会一次把所有记录加载到内存。
+
+        Args:
+            batch_id: 批次编号
+            page_size: 每次读取的记录数
+
+        Yields:
+            str: 输入文件路径
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._execute(
+                    "SELECT id, input_path FROM jobs "
+                    "WHERE batch_id = ? AND status = ? AND id > ? ORDER BY id LIMIT ?",
+                    (batch_id, TaskStatus.PENDING.value, last_id, page_size),
+                ).fetchall()
+
+            if not rows:
+                return
+
+            for job_id, input_path in rows:
+                last_id = job_id
+                yield input_path
+
+    def interrupted_batches(self) -> list[JobBatch]:
+        """
+        获取被中断的批次，即扫描尚未完成或还有任务没有处理的批次
+
+        Returns:
+            list[JobBatch]: 被中断的批次，按照创建顺序排列
+        """
+        with self._lock:
+            rows = self._execute(
+                "SELECT b.id, b.info, b.scan_finished, "
+                "(SELECT COUNT(*) FROM jobs j WHERE j.batch_id = b.id AND j.status = ?) "
+                "FROM batches b ORDER BY b.id",
+                (TaskStatus.PENDING.value,),
+            ).fetchall()
+
+        batches = []
+        for batch_id, info, scan_finished, pending_num in rows:
+            if scan_finished and pending_num == 0:
+                continue
+            try:
+                batch_info = TaskInfo.model_validate_json(info)
+            except ValueError as e:
+                logging.warning(f"忽略无法解析的压缩批次 {batch_id}: {e}")
+                continue
+            batches.append(
+                JobBatch(
+                    id=batch_id,
+                    info=batch_info,
+                    scan_finished=bool(scan_finished),
+                    pending_num=pending_num,
+                )
+            )
+        return batches
+
+    def _finished_batch_ids(self) -> list[int]:
+        """
+        获取扫描已经完成且所有任务都已处理的批次
+
+        Returns:
+            list[int]: 批次编号列表
+        """
+        with self._lock:
+            rows = self._execute(
+                "SELECT id FROM batches b WHERE scan_finished = 1 AND NOT EXISTS "
+                "(SELECT 1 FROM jobs j WHERE j.batch_id = b.id AND j.status IN (?, ?))",
+                (TaskStatus.PENDING.value, TaskStatus.PROCESSING.value),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        """
+        执行一条 SQL 语句，调用方需持有锁
+
+        Args:
+            sql: SQL 语句
+            parameters: 语句参数
+
+        Returns:
+            sqlite3.Cursor: 执行结果
+
+        Raises:
+            RuntimeError: 当数据库尚未打开时抛出
+        """
+        if self._connection is None:
+            raise RuntimeError("任务队列尚未打开")
+        return self._connection.execute(sql, parameters)
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+from src.model.config import ConfigModel
+from src.model.video import TaskStatus
+
+
+def file_fingerprint(path: str) -> Optional[str]:
+    """
+    计算文件指纹
+
+    指纹由文件大小和修改时间（纳秒）组成，只需要一次 stat 调用，
+    足以判断文件在两次运行之间是否发生了变化。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Optional[str]: 文件指纹，文件不存在时返回None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def job_config_hash(config: ConfigModel, delete_audio: bool) -> str:
+    """
+    计算影响压缩结果的参数的哈希值
+
+    Args:
+        config: 压缩配置
+        delete_audio: 是否删除音频轨道
+
+    Returns:
+        str: 参数的哈希值
+    """
+    content = json.dumps(
+        {"config": config.model_dump(mode="json"), "delete_audio": delete_audio},
+        sort_keys=True,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class JobLedger:
+    """
+    压缩任务台账类，持久化记录已经处理完成的文件
+
+    每条记录包含输入文件指纹、参数哈希、处理结果以及输出文件指纹。
+    记录以 JSON Lines 的形式追加写入文件，进程中途退出也不会丢失已完成的记录；
+    打开时如果文件中过期的记录过多，会重写文件进行压缩。
+    该类是线程安全的。
+    """
+
+    def __init__(self, file_path: str):
+        """
+        初始化压缩任务台账
+
+        Args:
+            file_path: 台账文件路径
+        """
+        self._file_path = file_path
+
+        self._lock = threading.Lock()
+        # 输入文件路径 -> 记录
+        self._entries: dict[str, dict] = {}
+        # 输出文件路径 -> 输入文件路径
+        self._outputs: dict[str, str] = {}
+
+    @property
+    def file_path(self) -> str:
+        """
+        获取台账文件路径
+
+        Returns:
+            str: 台账文件路径
+        """
+        return self._file_path
+
+    def open(self):
+        """
+        加载台账文件中的记录，损坏的行会被忽略
+        """
+        with self._lock:
+            self._entries = {}
+            self._outputs = {}
+
+            lines_num = 0
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        lines_num += 1
+                        try:
+                            self._add_entry(json.loads(line))
+                        except (ValueError, KeyError, TypeError):
+                            logging.warning(f"忽略台账中损坏的记录: {line.strip()}")
+            except FileNotFoundError:
+                logging.info(f"任务台账 {self.file_path} 不存在，使用空台账")
+                return
+
+            if lines_num > 2 * len(self._entries) + 100:
+                self._compact()
+
+    def record(
+        self,
+        input_path: str,
+        input_fingerprint: Optional[str],
+        config_hash: str,
+        status: TaskStatus,
+        output_path: str,
+    ):
+        """
+        记录一个已经处理完成的文件
+
+        Args:
+            input_path: 输入文件路径
+            input_fingerprint: 处理前的输入文件指纹
+            config_hash: 参数哈希值
+            status: 处理结果
+            output_path: 输出文件路径
+        """
+        entry = {
+            "input_path": os.path.abspath(input_path),
+            "input": input_fingerprint,
+            "config_hash": config_hash,
+            "status": status.value,
+            "output_path": os.path.abspath(output_path),
+            "output": file_fingerprint(output_path)
+            if status == TaskStatus.SUCCESS
+            else None,
+        }
+
+        with self._lock:
+            self._add_entry(entry)
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def is_completed(self, path: str, config_hash: str) -> bool:
+        """
+        判断文件是否已经使用相同参数处理完成，无需再次处理
+
+        以下情况视为已完成：
+        1. 输入文件和参数都没有变化，且上次压缩成功、输出文件也没有变化
+        2. 输入文件和参数都没有变化，且上次被跳过或输出被丢弃
+        3. 该文件本身是之前压缩生成的、未被修改的输出文件
+
+        Args:
+            path: 文件路径
+            config_hash: 参数哈希值
+
+        Returns:
+            bool: 已经处理完成时返回True
+        """
+        path = os.path.abspath(path)
+
+        with self._lock:
+            source_path = self._outputs.get(path)
+            if source_path is not None:
+                source = self._entries[source_path]
+                if source["output"] == file_fingerprint(path):
+                    return True
+
+            entry = self._entries.get(path)
+
+        if entry is None or entry["config_hash"] != config_hash:
+            return False
+
+        if entry["input"] != file_fingerprint(path):
+            return False
+
+        if entry["status"] == TaskStatus.SUCCESS.value:
+            return entry["output"] == file_fingerprint(entry["output_path"])
+
+        return True
+
+    def dump(self):
+        """
+        重写台账文件，只保留每个文件最新的记录
+        """
+        with self._lock:
+            self._compact()
+
+    def _add_entry(self, entry: dict):
+        """
+        在内存中添加或覆盖一条记录，调用方需持有锁
+
+        Args:
+            entry: 台账记录
+        """
+        previous = self._entries.get(entry["input_path"])
+        if previous is not None:
+            self._outputs.pop(previous["output_path"], None)
+
+        self._entries[entry["input_path"]] = entry
+        if entry["status"] == TaskStatus.SUCCESS.value:
+            self._outputs[entry["output_path"]] = entry["input_path"]
+
+    def _compact(self):
+        """
+        重写台账文件，调用方需持有锁
+
+        先写入临时文件再替换，避免写入过程中断导致台账损坏。
+        """
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(temp_path, self.file_path)
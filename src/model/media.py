@@ -0,0 +1,329 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class StreamInfo(BaseModel):
+    """
+    媒体流信息模型类，描述媒体文件中的一条视频或音频流
+
+    Attributes:
+        index: 流在文件中的序号
+        codec_type: 流类型，如 video、audio、subtitle
+        codec_name: 编码格式，如 h264、hevc、aac
+        bit_rate: 码率（bit/s），未知时为None
+        width: 视频宽度（像素），仅视频流有效
+        height: 视频高度（像素），仅视频流有效
+        fps: 视频平均帧率，仅视频流有效
+        rotation: 播放时的旋转角度（度），仅视频流有效
+        channels: 音频声道数，仅音频流有效
+        sample_rate: 音频采样率（Hz），仅音频流有效
+    """
+
+    index: int
+    codec_type: str
+    codec_name: str = ""
+    bit_rate: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    rotation: int = 0
+    channels: Optional[int] = None
+    sample_rate: Optional[int] = None
+
+    @property
+    def display_size(self) -> Optional[tuple[int, int]]:
+        """
+        获取播放时的画面尺寸，旋转90度的视频宽高互换
+
+        Returns:
+            Optional[tuple[int, int]]: 宽度和高度（像素），不是视频流或尺寸未知时返回None
+        """
+        if not self.width or not self.height:
+            return None
+        if self.rotation % 180 == 90:
+            return self.height, self.width
+        return self.width, self.height
+
+
+class MediaInfo(BaseModel):
+    """
+    媒体信息模型类，保存一次 ffprobe 调用得到的媒体文件信息
+
+    Attributes:
+        duration: 时长（秒）
+        bit_rate: 总码率（bit/s），未知时为None
+        size: 文件大小（字节）
+        format_name: 容器格式名称
+        streams: 文件中的所有媒体流
+    """
+
+    duration: float = 0.0
+    bit_rate: Optional[int] = None
+    size: int = 0
+    format_name: str = ""
+    streams: list[StreamInfo] = Field(default_factory=list)
+
+    @staticmethod
+    def from_ffprobe(data: dict) -> "MediaInfo":
+        """
+        从 ffprobe 的 JSON 输出构造媒体信息
+
+        Args:
+            data: ffprobe -show_format -show_streams 输出的 JSON 数据
+
+        Returns:
+            MediaInfo: 解析得到的媒体信息
+        """
+        media_format = data.get("format", {})
+
+        streams = []
+        for stream in data.get("streams", []):
+            streams.append(
+                StreamInfo(
+                    index=stream.get("index", len(streams)),
+                    codec_type=stream.get("codec_type", ""),
+                    codec_name=stream.get("codec_name", ""),
+                    bit_rate=_parse_bit_rate(stream),
+                    width=stream.get("width"),
+                    height=stream.get("height"),
+                    fps=_parse_rate(stream.get("avg_frame_rate")),
+                    rotation=_parse_rotation(stream),
+                    channels=stream.get("channels"),
+                    sample_rate=_parse_int(stream.get("sample_rate")),
+                )
+            )
+
+        return MediaInfo(
+            duration=float(media_format.get("duration") or 0.0),
+            bit_rate=_parse_int(media_format.get("bit_rate")),
+            size=_parse_int(media_format.get("size")) or 0,
+            format_name=media_format.get("format_name", ""),
+            streams=streams,
+        )
+
+    @property
+    def video_stream(self) -> Optional[StreamInfo]:
+        """
+        获取第一条视频流
+
+        Returns:
+            Optional[StreamInfo]: 第一条视频流，不存在时返回None
+        """
+        for stream in self.streams:
+            if stream.codec_type == "video":
+                return stream
+        return None
+
+    @property
+    def audio_streams(self) -> list[StreamInfo]:
+        """
+        获取所有音频流
+
+        Returns:
+            list[StreamInfo]: 所有音频流
+        """
+        return [stream for stream in self.streams if stream.codec_type == "audio"]
+
+    @property
+    def has_audio(self) -> bool:
+        """
+        判断是否包含音频流
+
+        Returns:
+            bool: 包含音频流时返回True
+        """
+        return len(self.audio_streams) > 0
+
+
+class MediaInfoCache:
+    """
+    媒体信息缓存类，把 ffprobe 的结果持久化到 JSON 文件
+
+    缓存以文件路径为键，同时记录文件大小和修改时间（纳秒），
+    两者都未变化时才认为缓存有效。超过容量时淘汰最久未使用的条目。
+    该类是线程安全的。
+    """
+
+    def __init__(self, file_path: str, max_entries: int):
+        """
+        初始化媒体信息缓存
+
+        Args:
+            file_path: 缓存文件路径
+            max_entries: 最多保存的条目数量
+        """
+        self._file_path = file_path
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._dirty = False
+
+    @property
+    def file_path(self) -> str:
+        """
+        获取缓存文件路径
+
+        Returns:
+            str: 缓存文件路径
+        """
+        return self._file_path
+
+    def open(self):
+        """
+        加载缓存文件中的数据，文件不存在或损坏时使用空缓存
+        """
+        with self._lock:
+            self._entries = OrderedDict()
+
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    for entry in json.load(f):
+                        self._entries[entry["path"]] = entry
+            except FileNotFoundError:
+                logging.info(f"媒体信息缓存 {self.file_path} 不存在，使用空缓存")
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"媒体信息缓存 {self.file_path} 已损坏，已忽略: {e}")
+                self._entries = OrderedDict()
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[MediaInfo]:
+        """
+        获取缓存的媒体信息
+
+        Args:
+            path: 文件路径
+            size: 文件当前大小（字节）
+            mtime_ns: 文件当前修改时间（纳秒）
+
+        Returns:
+            Optional[MediaInfo]: 缓存有效时返回媒体信息，否则返回None
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+
+            if entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+                return None
+
+            self._entries.move_to_end(path)
+            return MediaInfo.model_validate(entry["info"])
+
+    def set(self, path: str, size: int, mtime_ns: int, info: MediaInfo):
+        """
+        保存媒体信息到缓存
+
+        Args:
+            path: 文件路径
+            size: 文件大小（字节）
+            mtime_ns: 文件修改时间（纳秒）
+            info: 媒体信息
+        """
+        with self._lock:
+            self._entries[path] = {
+                "path": path,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "info": info.model_dump(),
+            }
+            self._entries.move_to_end(path)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            self._dirty = True
+
+    def dump(self):
+        """
+        保存缓存到文件
+
+        先写入临时文件再替换，避免写入过程中断导致缓存文件损坏。
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            temp_path = f"{self.file_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.values()), f)
+            os.replace(temp_path, self.file_path)
+
+            self._dirty = False
+
+
+def _parse_int(value) -> Optional[int]:
+    """
+    解析 ffprobe 输出中以字符串表示的整数
+
+    Args:
+        value: 待解析的值
+
+    Returns:
+        Optional[int]: 解析结果，无法解析时返回None
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_bit_rate(stream: dict) -> Optional[int]:
+    """
+    解析流的码率
+
+    mkv 容器中的流通常没有 bit_rate 字段，mkvmerge 等工具会把码率写在 BPS 标签中。
+
+    Args:
+        stream: ffprobe 输出中的一条流
+
+    Returns:
+        Optional[int]: 码率（bit/s），未知时返回None
+    """
+    bit_rate = _parse_int(stream.get("bit_rate"))
+    if bit_rate is None:
+        tags = stream.get("tags", {})
+        bit_rate = _parse_int(tags.get("BPS") or tags.get("BPS-eng"))
+    return bit_rate
+
+
+def _parse_rotation(stream: dict) -> int:
+    """
+    解析视频流的旋转角度
+
+    新版 ffprobe 把旋转写在 Display Matrix 附加数据中，旧版写在 rotate 标签中。
+
+    Args:
+        stream: ffprobe 输出中的一条流
+
+    Returns:
+        int: 0-359 之间的旋转角度（度），没有旋转信息时返回0
+    """
+    for side_data in stream.get("side_data_list", []):
+        rotation = _parse_int(side_data.get("rotation"))
+        if rotation is not None:
+            return rotation % 360
+
+    return (_parse_int(stream.get("tags", {}).get("rotate")) or 0) % 360
+
+
+def _parse_rate(value) -> Optional[float]:
+    """
+    解析 ffprobe 输出中形如 "30000/1001" 的帧率
+
+    Args:
+        value: 待解析的帧率字符串
+
+    Returns:
+        Optional[float]: 帧率，无法解析或为0时返回None
+    """
+    try:
+        num, den = map(int, str(value).split("/"))
+        return num / den if num and den else None
+    except (TypeError, ValueError):
+        return None
@@ -1,4 +1,5 @@
 from abc import ABC
+from typing import Optional
 
 type ProgressType = float | int
 
@@ -101,6 +102,48 @@ class ConfigLoadMessage(IMessage):
         self.config_names = config_names
 
 
+class ConfigErrorMessage(IMessage):
+    """
+    配置错误消息类，用于提示配置文件无效
+
+    Attributes:
+        file_path: 配置文件路径
+        message: 错误详细内容
+    """
+
+    def __init__(self, file_path: str, message: str):
+        """
+        初始化配置错误消息
+
+        Args:
+            file_path: 配置文件路径
+            message: 错误详细内容
+        """
+        self.file_path = file_path
+        self.message = message
+
+
+class ResumeTaskMessage(IMessage):
+    """
+    恢复任务消息类，用于提示上次运行时有被中断的压缩任务
+
+    Attributes:
+        tasks_num: 被中断的任务数量
+        files_num: 已经发现但尚未处理的文件数量
+    """
+
+    def __init__(self, tasks_num: int, files_num: int):
+        """
+        初始化恢复任务消息
+
+        Args:
+            tasks_num: 被中断的任务数量
+            files_num: 已经发现但尚未处理的文件数量
+        """
+        self.tasks_num = tasks_num
+        self.files_num = files_num
+
+
 class CompressionErrorMessage(IMessage):
     """
     压缩错误消息类，用于传递视频压缩过程中的错误信息
@@ -128,16 +171,43 @@ class CompressionFinishedMessage(IMessage):
 
     Attributes:
         total: 完成的视频文件总数
+        skipped: 预计压缩收益不足而跳过的文件数
+        discarded: 压缩后体积反而变大、已丢弃输出的文件数
     """
 
-    def __init__(self, total: int):
+    def __init__(self, total: int, skipped: int = 0, discarded: int = 0):
         """
         初始化压缩完成消息
 
         Args:
             total: 完成的视频文件总数
+            skipped: 预计压缩收益不足而跳过的文件数
+            discarded: 压缩后体积反而变大、已丢弃输出的文件数
         """
         self.total = total
+        self.skipped = skipped
+        self.discarded = discarded
+
+
+class CompressionSkippedMessage(IMessage):
+    """
+    压缩跳过消息类，用于通知某个文件没有被压缩或压缩结果已被丢弃
+
+    Attributes:
+        file_name: 被跳过的文件路径
+        reason: 跳过的原因
+    """
+
+    def __init__(self, file_name: str, reason: str):
+        """
+        初始化压缩跳过消息
+
+        Args:
+            file_name: 被跳过的文件路径
+            reason: 跳过的原因
+        """
+        self.file_name = file_name
+        self.reason = reason
 
 
 class CompressionStartMessage(IMessage):
@@ -161,14 +231,43 @@ class CompressionStartMessage(IMessage):
 class CompressionCurrentProgressMessage(IMessage):
     """
     当前文件压缩进度
+
+    Attributes:
+        file_name: 正在处理的文件路径
+        current: 已经处理的媒体时长（秒）
+        total: 文件的媒体总时长（秒）
+        speed: 当前文件的编码速度（实时倍数），未知时为None
+        fps: 当前文件的编码帧率，未知时为None
+        output_size: 已经输出的字节数
+        projected_size: 预计的最终输出大小（字节），未知时为None
+        eta: 当前文件的预计剩余时间（秒），未知时为None
+        task_speed: 整个任务的编码速度（实时倍数），未知时为None
+        task_eta: 整个任务的预计剩余时间（秒），未知时为None
     """
 
     def __init__(
-        self, file_name: str, current: ProgressType, total: ProgressType
+        self,
+        file_name: str,
+        current: ProgressType,
+        total: ProgressType,
+        speed: Optional[float] = None,
+        fps: Optional[float] = None,
+        output_size: int = 0,
+        projected_size: Optional[int] = None,
+        eta: Optional[float] = None,
+        task_speed: Optional[float] = None,
+        task_eta: Optional[float] = None,
     ) -> None:
         self.file_name = file_name
         self.current = current
         self.total = total
+        self.speed = speed
+        self.fps = fps
+        self.output_size = output_size
+        self.projected_size = projected_size
+        self.eta = eta
+        self.task_speed = task_speed
+        self.task_eta = task_eta
 
 
 class CompressionTotalProgressMessage(IMessage):
@@ -177,8 +276,9 @@ class CompressionTotalProgressMessage(IMessage):
 
     Attributes:
         current: 当前正在处理的文件索引
-        total: 待处理的文件总数
+        total: 待处理的文件总数，扫描完成前为已发现的文件数
         file_name: 当前正在处理的文件名
+        scan_finished: 文件扫描是否已经完成，未完成时total只是估计值
     """
 
     def __init__(
@@ -186,16 +286,18 @@ class CompressionTotalProgressMessage(IMessage):
         current: int,
         total: int,
         file_name: str,
+        scan_finished: bool = True,
     ):
         """
         初始化压缩进度消息
 
         Args:
             current: 当前正在处理的文件索引（从1开始）
-            total: 待处理的文件总数
+            total: 待处理的文件总数，扫描完成前为已发现的文件数
             file_name: 当前正在处理的文件名（包含路径）
-            progress: 当前文件的压缩进度（0-1之间的浮点数）
+            scan_finished: 文件扫描是否已经完成
         """
         self.current = current
         self.total = total
         self.file_name = file_name
+        self.scan_finished = scan_finished
@@ -0,0 +1,161 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from pydantic import BaseModel, Field
+
+from src.model.video import TaskStatus
+
+
+class FileMetrics(BaseModel):
+    """
+    单个文件的压缩指标模型类
+
+    Attributes:
+        file_name: 文件路径
+        status: 处理结果
+        duration: 媒体时长（秒），未知时为0
+        input_size: 源文件大小（字节）
+        output_size: 输出文件大小（字节），没有输出时为0
+        wall_time: 处理耗时（秒）
+        speed: 平均编码速度（实时倍数）
+        fps: 平均编码帧率
+    """
+
+    file_name: str
+    status: TaskStatus
+    duration: float = 0.0
+    input_size: int = 0
+    output_size: int = 0
+    wall_time: float = 0.0
+    speed: Optional[float] = None
+    fps: Optional[float] = None
+
+
+class TaskMetrics(BaseModel):
+    """
+    压缩任务的指标记录模型类，任务结束时写入文件，用于评估批量压缩的吞吐量
+
+    Attributes:
+        started_at: 任务开始时间（ISO 格式）
+        finished_at: 任务结束时间（ISO 格式）
+        wall_time: 任务总耗时（秒）
+        workers: 并行压缩的文件数量
+        total_duration: 已处理文件的媒体总时长（秒）
+        total_input_size: 已处理文件的源文件总大小（字节）
+        total_output_size: 输出文件总大小（字节）
+        speed: 整个任务的平均编码速度（实时倍数）
+        files: 各文件的指标
+    """
+
+    started_at: str
+    finished_at: str = ""
+    wall_time: float = 0.0
+    workers: int = 1
+    total_duration: float = 0.0
+    total_input_size: int = 0
+    total_output_size: int = 0
+    speed: Optional[float] = None
+    files: list[FileMetrics] = Field(default_factory=list)
+
+
+class TaskTelemetry:
+    """
+    任务吞吐量统计类，用于在压缩过程中估算整个任务的速度和剩余时间
+
+    任务速度为已处理的媒体时长除以任务已经运行的时间，因此自然包含了并行压缩的效果。
+    被跳过的文件不计入已处理的时长，避免高估速度。该类是线程安全的。
+    """
+
+    def __init__(self, workers: int, total_duration: Callable[[], float]) -> None:
+        """
+        Args:
+            workers: 并行压缩的文件数量
+            total_duration: 返回任务中已发现文件的媒体总时长（秒）的函数，
+                            扫描过程中该值会不断增长
+        """
+        self.workers = workers
+        self._total_duration = total_duration
+
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._started_at = datetime.now().isoformat(timespec="seconds")
+        self._done_duration = 0.0
+        self._skipped_duration = 0.0
+        self._active: dict[str, float] = {}
+        self._files: list[FileMetrics] = []
+
+    def update_file(self, file_name: str, current: float):
+        """
+        更新正在处理的文件已经处理的媒体时长
+
+        Args:
+            file_name: 文件路径
+            current: 已经处理的媒体时长（秒）
+        """
+        with self._lock:
+            self._active[file_name] = current
+
+    def finish_file(self, metrics: FileMetrics):
+        """
+        记录一个处理结束的文件
+
+        Args:
+            metrics: 文件的压缩指标
+        """
+        with self._lock:
+            processed = self._active.pop(metrics.file_name, 0.0)
+            if metrics.status == TaskStatus.SKIPPED:
+                self._skipped_duration += metrics.duration
+            elif metrics.status == TaskStatus.FAILED:
+                self._done_duration += processed
+            else:
+                self._done_duration += metrics.duration
+
+            self._files.append(metrics)
+
+    def estimate(self) -> tuple[Optional[float], Optional[float]]:
+        """
+        估算整个任务的速度和剩余时间
+
+        扫描完成前，剩余时间只包含已发现的文件。
+
+        Returns:
+            tuple[Optional[float], Optional[float]]: 任务速度（实时倍数）和剩余时间（秒），
+                                                     数据不足时为None
+        """
+        with self._lock:
+            processed = self._done_duration + sum(self._active.values())
+            remaining = self._total_duration() - self._skipped_duration - processed
+
+        elapsed = time.time() - self._start_time
+        if processed <= 0 or elapsed <= 0:
+            return None, None
+
+        speed = processed / elapsed
+        return speed, max(remaining, 0.0) / speed
+
+    def to_metrics(self) -> TaskMetrics:
+        """
+        生成任务的指标记录
+
+        Returns:
+            TaskMetrics: 任务的指标记录
+        """
+        with self._lock:
+            files = list(self._files)
+            done_duration = self._done_duration
+
+        wall_time = time.time() - self._start_time
+        return TaskMetrics(
+            started_at=self._started_at,
+            finished_at=datetime.now().isoformat(timespec="seconds"),
+            wall_time=wall_time,
+            workers=self.workers,
+            total_duration=sum(f.duration for f in files),
+            total_input_size=sum(f.input_size for f in files),
+            total_output_size=sum(f.output_size for f in files),
+            speed=done_duration / wall_time if wall_time > 0 else None,
+            files=files,
+        )
@@ -0,0 +1,96 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class FFmpegProgress(BaseModel):
+    """
+    ffmpeg 进度记录模型类，对应 -progress 输出中的一组 key=value
+
+    Attributes:
+        frame: 已编码的帧数
+        fps: 当前编码速度（帧/秒）
+        bitrate: 当前输出码率（kbit/s），未知时为None
+        total_size: 已输出的字节数
+        out_time_us: 已输出的媒体时长（微秒）
+        speed: 相对于实时播放的编码速度倍数，未知时为None
+        finished: 是否为最后一条记录
+    """
+
+    frame: int = 0
+    fps: float = 0.0
+    bitrate: Optional[float] = None
+    total_size: int = 0
+    out_time_us: int = 0
+    speed: Optional[float] = None
+    finished: bool = False
+
+    @property
+    def out_time(self) -> float:
+        """
+        获取已输出的媒体时长
+
+        Returns:
+            float: 已输出的媒体时长（秒）
+        """
+        return self.out_time_us / 1_000_000
+
+
+class ProgressParser:
+    """
+    ffmpeg -progress 输出解析器
+
+    ffmpeg 以 key=value 的形式逐行输出进度，每组以 progress=continue 或
+    progress=end 结束。该类逐行累积字段，在一组结束时生成一条进度记录。
+    """
+
+    def __init__(self) -> None:
+        self._fields: dict[str, str] = {}
+
+    def feed(self, line: str) -> Optional[FFmpegProgress]:
+        """
+        输入一行进度输出
+
+        Args:
+            line: ffmpeg -progress 输出的一行
+
+        Returns:
+            Optional[FFmpegProgress]: 一组进度结束时返回解析得到的记录，否则返回None
+        """
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+
+        if key != "progress":
+            self._fields[key] = value.strip()
+            return None
+
+        fields, self._fields = self._fields, {}
+        return FFmpegProgress(
+            frame=_parse_number(fields.get("frame"), int) or 0,
+            fps=_parse_number(fields.get("fps"), float) or 0.0,
+            bitrate=_parse_number(
+                fields.get("bitrate", "").removesuffix("kbits/s"), float
+            ),
+            total_size=_parse_number(fields.get("total_size"), int) or 0,
+            out_time_us=max(_parse_number(fields.get("out_time_us"), int) or 0, 0),
+            speed=_parse_number(fields.get("speed", "").removesuffix("x"), float),
+            finished=value.strip() == "end",
+        )
+
+
+def _parse_number(value: Optional[str], number_type: type):
+    """
+    解析进度输出中的数值，"N/A" 等无法解析的值返回None
+
+    Args:
+        value: 待解析的字符串
+        number_type: 数值类型，int 或 float
+
+    Returns:
+        解析得到的数值，无法解析时返回None
+    """
+    try:
+        return number_type(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,145 @@
+import functools
+import os
+import re
+import subprocess
+from typing import Literal, Optional
+
+from src import meta
+from src.model.command import CommandRunner, FFmpegCommand, run_command
+from src.utils import get_creationflags
+
+type QualityMetric = Literal["psnr", "ssim", "vmaf"]
+
+# ffmpeg 在结束时输出到 stderr 的汇总行
+_SUMMARY_PATTERNS: dict[str, re.Pattern] = {
+    "psnr": re.compile(r"PSNR .*?average:(inf|[\d.]+)"),
+    "ssim": re.compile(r"SSIM .*?All:([\d.]+)"),
+    "vmaf": re.compile(r"VMAF score[:=]\s*([\d.]+)"),
+}
+
+# PSNR 为无穷大（两个视频完全相同）时使用的值
+MAX_PSNR = 100.0
+
+
+def quality_command(
+    distorted_path: str,
+    reference_path: str,
+    metric: QualityMetric,
+    threads: Optional[int] = None,
+    reference_filter: Optional[str] = None,
+) -> list[str]:
+    """
+    生成计算画质指标的命令
+
+    两个输入的时间戳都从0开始对齐，按帧比较后丢弃输出，结果在 stderr 的汇总行中。
+
+    Args:
+        distorted_path: 压缩后的视频路径
+        reference_path: 作为参考的源视频路径
+        metric: 画质指标
+        threads: 计算使用的线程数，为None时使用ffmpeg的默认值
+        reference_filter: 应用于参考视频的滤镜，压缩时缩放了画面或降低了帧率时
+                          传入相同的滤镜，只比较压缩造成的损失
+
+    Returns:
+        list[str]: 命令的参数列表
+    """
+    compare = metric
+    if metric == "vmaf":
+        compare = "libvmaf" if threads is None else f"libvmaf=n_threads={threads}"
+
+    reference_chain = "setpts=PTS-STARTPTS"
+    if reference_filter is not None:
+        reference_chain = f"{reference_filter},{reference_chain}"
+
+    graph = (
+        "[0:v]setpts=PTS-STARTPTS[distorted];"
+        f"[1:v]{reference_chain}[reference];"
+        f"[distorted][reference]{compare}"
+    )
+
+    command = FFmpegCommand().input(distorted_path).input(reference_path)
+    if threads is not None:
+        command.args("-filter_threads", str(threads))
+    return command.args("-lavfi", graph, "-f", "null").output(os.devnull).build()
+
+
+def parse_quality(metric: QualityMetric, output: str) -> float:
+    """
+    从 ffmpeg 的 stderr 中解析画质指标
+
+    Args:
+        metric: 画质指标
+        output: ffmpeg 的 stderr 输出
+
+    Returns:
+        float: 画质指标的值，PSNR 为 dB，SSIM 为0-1，VMAF 为0-100
+
+    Raises:
+        ValueError: 当输出中没有找到指标的汇总行时抛出
+    """
+    matches = _SUMMARY_PATTERNS[metric].findall(output)
+    if not matches:
+        raise ValueError(f"ffmpeg 的输出中没有 {metric} 的结果")
+
+    value = matches[-1]
+    return MAX_PSNR if value == "inf" else float(value)
+
+
+@functools.cache
+def libvmaf_available() -> bool:
+    """
+    检查 ffmpeg 是否编译了 libvmaf 滤镜
+
+    Returns:
+        bool: 可以计算 VMAF 时返回True
+    """
+    try:
+        result = subprocess.run(
+            [meta.FFMPEG_PATH, "-hide_banner", "-filters"],
+            capture_output=True,
+            text=True,
+            errors="replace",
+            stdin=subprocess.DEVNULL,
+            creationflags=get_creationflags(),
+        )
+    except OSError:
+        return False
+    return re.search(r"\slibvmaf\s", result.stdout) is not None
+
+
+def measure_quality(
+    distorted_path: str,
+    reference_path: str,
+    metric: QualityMetric,
+    threads: Optional[int] = None,
+    reference_filter: Optional[str] = None,
+    run: CommandRunner = run_command,
+) -> float:
+    """
+    计算压缩后的视频相对于源视频的画质指标
+
+    Args:
+        distorted_path: 压缩后的视频路径
+        reference_path: 作为参考的源视频路径
+        metric: 画质指标
+        threads: 计算使用的线程数，为None时使用ffmpeg的默认值
+        reference_filter: 应用于参考视频的滤镜，与压缩时使用的滤镜相同
+        run: 执行计算命令的函数
+
+    Returns:
+        float: 画质指标的值
+
+    Raises:
+        ValueError: 当指标为 vmaf 但 ffmpeg 不支持 libvmaf，或无法解析结果时抛出
+        subprocess.CalledProcessError: 当 ffmpeg 执行失败时抛出
+    """
+    if metric == "vmaf" and not libvmaf_available():
+        raise ValueError("ffmpeg 没有编译 libvmaf，无法计算 VMAF")
+
+    result = run(
+        quality_command(
+            distorted_path, reference_path, metric, threads, reference_filter
+        )
+    )
+    return parse_quality(metric, result.stderr)
@@ -0,0 +1,57 @@
+import os
+
+from src.model.command import CommandRunner, excerpt_command, run_command
+
+
+def sample_offsets(duration: float, count: int, length: float) -> list[float]:
+    """
+    在视频中均匀地选取若干个片段的开始时间
+
+    视频被等分为 count 份，每个片段位于对应部分的中间，
+    避开通常不具代表性的片头和片尾。视频短于所有片段的总长时只取一个从头开始的片段。
+
+    Args:
+        duration: 视频时长（秒）
+        count: 片段数量
+        length: 每个片段的时长（秒）
+
+    Returns:
+        list[float]: 各片段的开始时间（秒），按时间顺序排列
+    """
+    if count < 1 or duration <= length * count:
+        return [0.0]
+
+    step = duration / count
+    return [step * (index + 0.5) - length / 2 for index in range(count)]
+
+
+def extract_excerpts(
+    input_path: str,
+    directory: str,
+    offsets: list[float],
+    length: float,
+    run: CommandRunner = run_command,
+) -> list[str]:
+    """
+    按照开始时间截取视频片段
+
+    Args:
+        input_path: 输入文件路径
+        directory: 片段的输出目录
+        offsets: 各片段的开始时间（秒）
+        length: 每个片段的时长（秒）
+        run: 执行截取命令的函数
+
+    Returns:
+        list[str]: 片段文件路径
+
+    Raises:
+        subprocess.CalledProcessError: 当截取失败时抛出
+    """
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    paths = []
+    for index, start in enumerate(offsets):
+        path = os.path.join(directory, f"{name}_{index:02d}.mkv")
+        run(excerpt_command(input_path, path, start, length))
+        paths.append(path)
+    return paths
@@ -0,0 +1,148 @@
+from typing import Optional
+
+from src.model.config import ScaleConfigModel
+from src.model.media import MediaInfo
+
+# 帧率只比限制高出该值时不降低帧率，避免 30000/1001 之类的帧率被误判
+FPS_TOLERANCE = 0.01
+
+
+def _scale_factor(
+    width: float, height: float, config: ScaleConfigModel
+) -> Optional[float]:
+    """
+    计算把画面缩小到限制之内的比例
+
+    Args:
+        width: 画面宽度
+        height: 画面高度
+        config: 缩放配置
+
+    Returns:
+        Optional[float]: 缩放比例，不需要缩小时返回None
+    """
+    factors = []
+    if config.max_width is not None:
+        factors.append(config.max_width / width)
+    if config.max_height is not None:
+        factors.append(config.max_height / height)
+
+    factor = min(factors, default=1.0)
+    return factor if factor < 1 else None
+
+
+def output_format(
+    media: MediaInfo, config: ScaleConfigModel
+) -> tuple[Optional[tuple[int, int]], Optional[float]]:
+    """
+    根据媒体信息计算缩放后的画面尺寸和帧率
+
+    Args:
+        media: 源文件的媒体信息
+        config: 缩放配置
+
+    Returns:
+        tuple[Optional[tuple[int, int]], Optional[float]]:
+            缩放后的宽度和高度（不需要缩放或尺寸未知时为None），
+            以及降低后的帧率（不需要降低或帧率未知时为None）
+    """
+    video = media.video_stream
+    if video is None:
+        return None, None
+
+    size = None
+    display_size = video.display_size
+    if display_size is not None:
+        width, height = display_size
+        factor = _scale_factor(width, height, config)
+        if factor is not None:
+            size = (int(width * factor) // 2 * 2, int(height * factor) // 2 * 2)
+
+    fps = None
+    if (
+        config.max_fps is not None
+        and video.fps is not None
+        and video.fps > config.max_fps + FPS_TOLERANCE
+    ):
+        fps = config.max_fps
+
+    return size, fps
+
+
+def scale_filter(media: Optional[MediaInfo], config: ScaleConfigModel) -> Optional[str]:
+    """
+    生成把视频缩小到限制之内的滤镜
+
+    画面尺寸使用 ffmpeg 的表达式根据实际输入计算，保持宽高比并取偶数，
+    ffmpeg 自动旋转画面后的尺寸与媒体信息不一致时也不会拉伸画面。
+    先降低帧率再缩放，被丢弃的帧不需要缩放。
+
+    Args:
+        media: 源文件的媒体信息，为None时无法判断是否超过限制，不进行缩放
+        config: 缩放配置
+
+    Returns:
+        Optional[str]: 滤镜描述，已经在限制之内时返回None
+    """
+    if media is None:
+        return None
+
+    size, fps = output_format(media, config)
+    filters = []
+
+    if fps is not None:
+        filters.append(f"fps={fps:g}")
+
+    if size is not None:
+        limits = []
+        if config.max_width is not None:
+            limits.append(f"{config.max_width}/iw")
+        if config.max_height is not None:
+            limits.append(f"{config.max_height}/ih")
+        # ffmpeg 表达式中的 min 只接受两个参数，多个限制需要嵌套
+        factor = "1"
+        for limit in limits:
+            factor = f"min({factor},{limit})"
+
+        # 表达式中的逗号需要用引号包裹，否则会被当作滤镜的分隔符
+        width = f"'trunc(iw*{factor}/2)*2'"
+        height = f"'trunc(ih*{factor}/2)*2'"
+        if config.scaler == "zscale":
+            filters.append(f"zscale=w={width}:h={height}:filter={config.zscale_filter}")
+        else:
+            filters.append(f"scale=w={width}:h={height}:flags={config.swscale_flags}")
+
+    return ",".join(filters) or None
+
+
+def scaled_media(media: MediaInfo, config: ScaleConfigModel) -> MediaInfo:
+    """
+    生成缩放后的媒体信息，用于预测输出体积
+
+    Args:
+        media: 源文件的媒体信息
+        config: 缩放配置
+
+    Returns:
+        MediaInfo: 视频流的尺寸和帧率替换为缩放后的值的媒体信息，不需要缩放时返回原对象
+    """
+    size, fps = output_format(media, config)
+    video = media.video_stream
+    if video is None or (size is None and fps is None):
+        return media
+
+    update = {}
+    if size is not None:
+        # 缩放后的尺寸已经是播放时的方向
+        update.update(width=size[0], height=size[1], rotation=0)
+    if fps is not None:
+        update["fps"] = fps
+
+    scaled_video = video.model_copy(update=update)
+    return media.model_copy(
+        update={
+            "streams": [
+                scaled_video if stream is video else stream for stream in media.streams
+            ]
+        }
+    )
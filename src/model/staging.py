@@ -0,0 +1,275 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Empty, Full, Queue
+from typing import Callable, Iterator, Optional
+
+from src.model.video import VideoFile
+
+# 复制文件时每次读写的字节数
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class StagingCancelled(Exception):
+    """
+    暂存过程中收到停止信号时抛出的异常
+    """
+
+
+def copy_file(src: str, dst: str, stop_event: threading.Event):
+    """
+    分块复制文件并落盘，复制过程中可以响应停止信号
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+        stop_event: 停止信号
+
+    Raises:
+        StagingCancelled: 当复制过程中收到停止信号时抛出
+        OSError: 当读写失败时抛出
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        while chunk := fsrc.read(COPY_CHUNK_SIZE):
+            if stop_event.is_set():
+                raise StagingCancelled(f"复制 {src} 时收到停止信号")
+            fdst.write(chunk)
+        fdst.flush()
+        os.fsync(fdst.fileno())
+
+
+class StagingArea:
+    """
+    本地暂存区类，用于在慢速的网络存储和本地磁盘之间中转文件
+
+    压缩当前文件的同时，后台线程把接下来的若干个源文件预取到本地暂存目录；
+    压缩从本地读取并写入本地，完成后在后台把输出文件上传到原来的输出目录。
+    这样网络读写与编码重叠进行，ffmpeg 不再同时读写网络存储。
+
+    暂存区占用的磁盘空间受预算限制：每个文件按源文件大小的两倍（源文件和输出文件）预留，
+    预算不足时预取会等待已有的文件上传完成。单个文件超过预算时不暂存，直接从原位置压缩。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        prefetch_count: int,
+        upload_workers: int,
+        stop_event: threading.Event,
+    ):
+        """
+        Args:
+            directory: 暂存目录，为空时使用系统临时目录
+            max_bytes: 暂存区最多占用的磁盘空间（字节）
+            prefetch_count: 最多预取的文件数量
+            upload_workers: 并行上传输出文件的线程数
+            stop_event: 停止信号，设置后预取和上传都会尽快结束
+        """
+        base_dir = directory or os.path.join(tempfile.gettempdir(), "videoslim_staging")
+        os.makedirs(base_dir, exist_ok=True)
+
+        # 每次运行使用独立的子目录，结束时整体删除
+        self.directory = tempfile.mkdtemp(prefix="run_", dir=base_dir)
+        self.max_bytes = max_bytes
+        self.prefetch_count = prefetch_count
+
+        self._stop_event = stop_event
+        self._condition = threading.Condition()
+        self._used_bytes = 0
+        self._reserved: dict[str, int] = {}
+        self._uploader = ThreadPoolExecutor(
+            max_workers=upload_workers, thread_name_prefix="StagingUpload"
+        )
+        self._uploads: list[Future] = []
+
+    def prefetch(self, files: Iterator[VideoFile]) -> Iterator[VideoFile]:
+        """
+        在后台线程中把文件预取到暂存目录
+
+        Args:
+            files: 待处理的视频文件
+
+        Returns:
+            Iterator[VideoFile]: 按原顺序返回的视频文件，暂存成功的文件设置了
+                                 staged_path 和 staged_output_path
+        """
+        queue: Queue[Optional[VideoFile]] = Queue(maxsize=self.prefetch_count)
+
+        def put(item: Optional[VideoFile]) -> bool:
+            while not self._stop_event.is_set():
+                try:
+                    queue.put(item, timeout=0.5)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for video_file in files:
+                    if self._stop_event.is_set():
+                        return
+                    self._stage(video_file)
+                    if not put(video_file):
+                        self.release(video_file)
+                        return
+            except Exception as e:
+                logging.error(f"预取文件时出错: {e}")
+            finally:
+                put(None)
+
+        threading.Thread(target=produce, name="StagingPrefetch", daemon=True).start()
+
+        def consume() -> Iterator[VideoFile]:
+            while not self._stop_event.is_set():
+                try:
+                    item = queue.get(timeout=0.5)
+                except Empty:
+                    continue
+                if item is None:
+                    return
+                yield item
+
+        return consume()
+
+    def upload(
+        self, video_file: VideoFile, on_done: Callable[[Optional[Exception]], None]
+    ):
+        """
+        在后台把暂存的输出文件上传到原来的输出路径
+
+        先写入输出目录中的临时文件，校验大小后再原子地替换，
+        与直接压缩时一样，输出路径上的文件总是完整的。
+
+        Args:
+            video_file: 已经压缩完成的暂存文件
+            on_done: 上传结束后调用的函数，成功时参数为None，失败时为异常
+        """
+
+        def run():
+            error: Optional[Exception] = None
+            try:
+                self._upload(video_file)
+            except Exception as e:
+                error = e
+            finally:
+                self.release(video_file)
+            on_done(error)
+
+        with self._condition:
+            self._uploads = [f for f in self._uploads if not f.done()]
+            self._uploads.append(self._uploader.submit(run))
+
+    def release(self, video_file: VideoFile):
+        """
+        删除文件在暂存目录中的副本，并归还预留的磁盘空间
+
+        Args:
+            video_file: 视频文件，未被暂存时不执行任何操作
+        """
+        if video_file.staged_path is None:
+            return
+
+        shutil.rmtree(os.path.dirname(video_file.staged_path), ignore_errors=True)
+        with self._condition:
+            self._used_bytes -= self._reserved.pop(video_file.staged_path, 0)
+            self._condition.notify_all()
+
+    def close(self):
+        """
+        等待所有上传结束，关闭上传线程并删除暂存目录
+        """
+        with self._condition:
+            uploads = list(self._uploads)
+        for future in uploads:
+            future.result()
+        self._uploader.shutdown(wait=True)
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _stage(self, video_file: VideoFile):
+        """
+        把单个文件复制到暂存目录，失败时保持文件未暂存的状态
+
+        Args:
+            video_file: 视频文件
+        """
+        try:
+            size = os.path.getsize(video_file.file_path)
+        except OSError as e:
+            logging.warning(f"无法读取文件 {video_file.file_path} 的大小: {e}")
+            return
+
+        reserve = size * 2
+        if reserve > self.max_bytes:
+            logging.info(
+                f"文件 {video_file.file_path} 超过暂存区预算，直接从原位置压缩"
+            )
+            return
+
+        # 等待足够的空间；暂存区为空时总是允许，避免无法前进
+        with self._condition:
+            while self._used_bytes and self._used_bytes + reserve > self.max_bytes:
+                if self._stop_event.is_set():
+                    return
+                self._condition.wait(timeout=0.5)
+            self._used_bytes += reserve
+
+        stage_dir = tempfile.mkdtemp(prefix="job_", dir=self.directory)
+        staged_path = os.path.join(stage_dir, video_file.fullname)
+        with self._condition:
+            self._reserved[staged_path] = reserve
+
+        try:
+            copy_file(video_file.file_path, staged_path, self._stop_event)
+        except (OSError, StagingCancelled) as e:
+            logging.warning(
+                f"预取文件 {video_file.file_path} 失败，直接从原位置压缩: {e}"
+            )
+            video_file.staged_path = staged_path
+            self.release(video_file)
+            video_file.staged_path = None
+            return
+
+        video_file.staged_path = staged_path
+        video_file.staged_output_path = os.path.join(
+            stage_dir, video_file.output_fullname
+        )
+        logging.debug(f"已预取 {video_file.file_path} 到 {staged_path}")
+
+    def _upload(self, video_file: VideoFile):
+        """
+        上传暂存的输出文件
+
+        Args:
+            video_file: 已经压缩完成的暂存文件
+
+        Raises:
+            OSError: 当上传失败或上传后的大小与本地文件不一致时抛出
+            StagingCancelled: 当上传过程中收到停止信号时抛出
+        """
+        local_path = video_file.staged_output_path
+        assert local_path is not None
+
+        output_path = video_file.output_path
+        directory = os.path.dirname(output_path) or "."
+        name, ext = os.path.splitext(os.path.basename(output_path))
+        fd, temp_path = tempfile.mkstemp(
+            prefix=f".{name}.", suffix=f".part{ext}", dir=directory
+        )
+        os.close(fd)
+
+        try:
+            copy_file(local_path, temp_path, self._stop_event)
+            if os.path.getsize(temp_path) != os.path.getsize(local_path):
+                raise OSError(f"上传后的文件大小与本地文件不一致: {output_path}")
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        logging.debug(f"已上传 {local_path} 到 {output_path}")
@@ -1,11 +1,16 @@
 import logging
 import os
+import threading
 from enum import Enum
+from queue import Empty, Full, Queue
+from typing import Callable, Iterable, Iterator, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src import meta
-from src.utils import scan_directory
+from src.model.encoder import IEncoder
+from src.model.media import MediaInfo
+from src.utils import iter_directory
 
 
 class VideoFile:
@@ -16,19 +21,35 @@ class VideoFile:
     并实现了视频文件格式的检查功能。
     """
 
-    def __init__(self, file_path: str) -> None:
+    def __init__(self, file_path: str, verified: bool = False) -> None:
         """
         初始化视频文件对象
 
         Args:
             file_path: 视频文件的完整路径
+            verified: 调用方已经确认该文件是支持的视频文件时为True（例如来自目录扫描），
+                      此时不再访问文件系统检查
 
         Raises:
             ValueError: 当文件不是支持的视频格式时抛出
         """
         self.file_path = file_path
 
-        if not self.is_supported():
+        # 媒体信息，由 Task 在扫描时通过 ffprobe（或其缓存）填充
+        self.media_info: Optional[MediaInfo] = None
+
+        # 持久化任务队列中的任务编号，不使用任务队列时为None
+        self.job_id: Optional[int] = None
+
+        # 输出文件名的后缀和扩展名，由所用的编码器决定，扩展名为None时与源文件相同
+        self.output_suffix: str = "x264"
+        self.output_ext: Optional[str] = None
+
+        # 暂存到本地后的源文件和输出文件路径，未暂存时为None
+        self.staged_path: Optional[str] = None
+        self.staged_output_path: Optional[str] = None
+
+        if not verified and not self.is_supported():
             raise ValueError(f"文件 {self.file_path} 不是支持的视频文件")
 
     def __repr__(self) -> str:
@@ -72,7 +93,7 @@ class VideoFile:
         Returns:
             str: 压缩后的视频文件名（包含扩展名）
         """
-        return f"{self.filename}_x264{self.ext}"
+        return f"{self.filename}_{self.output_suffix}{self.output_ext or self.ext}"
 
     @property
     def output_path(self) -> str:
@@ -84,6 +105,27 @@ class VideoFile:
         """
         return os.path.join(os.path.dirname(self.file_path), self.output_fullname)
 
+    @property
+    def input_path(self) -> str:
+        """
+        获取压缩时读取的源文件路径，文件已暂存到本地时为本地副本
+
+        Returns:
+            str: 压缩时读取的源文件路径
+        """
+        return self.staged_path or self.file_path
+
+    @property
+    def write_path(self) -> str:
+        """
+        获取压缩时写入的输出文件路径，文件已暂存到本地时为暂存目录中的路径，
+        之后再上传到 output_path
+
+        Returns:
+            str: 压缩时写入的输出文件路径
+        """
+        return self.staged_output_path or self.output_path
+
     def is_supported(self) -> bool:
         """
         检查文件是否为支持的视频文件
@@ -107,6 +149,8 @@ class TaskStatus(Enum):
     PROCESSING = "processing"  # 任务正在处理中
     SUCCESS = "success"  # 任务处理成功
     FAILED = "failed"  # 任务处理失败
+    SKIPPED = "skipped"  # 预计压缩收益不足，未处理
+    DISCARDED = "discarded"  # 压缩后体积变大，输出已丢弃
 
 
 class TaskInfo(BaseModel):
@@ -119,6 +163,8 @@ class TaskInfo(BaseModel):
         delete_audio: 是否删除视频中的音频轨道，默认值为False
         delete_source: 是否在压缩完成后删除源文件，默认值为False
         recursive: 是否递归处理文件夹中的视频文件，默认值为False
+        max_parallel_jobs: 同时压缩的最大文件数量，为None时使用配置文件中的设置
+        scan_workers: 递归扫描文件夹时并行列举目录的线程数，默认值为1
     """
 
     targets: list[str]
@@ -126,74 +172,264 @@ class TaskInfo(BaseModel):
     delete_audio: bool = False
     delete_source: bool = False
     recursive: bool = False
+    max_parallel_jobs: Optional[int] = Field(default=None, ge=1)
+    scan_workers: int = Field(default=1, ge=1)
 
 
 class Task:
     """
-    视频处理任务类，用于管理视频压缩任务的执行状态和文件列表
+    视频处理任务类，用于管理视频压缩任务的执行状态和文件队列
+
+    该类是一个惰性的生产者：后台线程扫描并验证待处理的视频文件，
+    放入一个有界队列，压缩线程通过迭代任务领取文件。
+    因此第一个文件被找到后即可开始压缩，无需等待整个目录树扫描完成。
 
     该类负责：
     1. 解析任务配置信息
-    2. 扫描并验证待处理的视频文件
+    2. 在后台线程中扫描并验证待处理的视频文件
     3. 管理任务的处理状态
-    4. 提供任务文件列表和数量的访问方法
+    4. 提供已发现文件数量和扫描状态的访问方法
     """
 
-    def __init__(self, info: TaskInfo):
+    def __init__(
+        self,
+        info: TaskInfo,
+        probe: Optional[Callable[[str], MediaInfo]] = None,
+        is_completed: Optional[Callable[[str], bool]] = None,
+        queue_size: int = meta.TASK_QUEUE_SIZE,
+        source: Optional[Iterable[str]] = None,
+        enqueue: Optional[Callable[[str], int]] = None,
+        on_scan_finished: Optional[Callable[[], None]] = None,
+        encoder: Optional[IEncoder] = None,
+    ):
         """
         初始化视频处理任务
 
         Args:
             info: 任务配置信息对象，包含待处理文件列表和处理参数
-
-        该方法会：
-        1. 初始化任务状态为待处理
-        2. 遍历处理目标路径列表
-        3. 如果是文件夹且开启递归，则扫描文件夹中的所有视频文件
-        4. 验证每个文件是否为支持的视频格式
-        5. 将验证通过的视频文件添加到处理队列
-        6. 忽略不支持的视频文件并记录警告日志
+            probe: 读取媒体信息的函数，通常为 MediaService.probe，
+                   为None时不读取媒体信息
+            is_completed: 判断文件是否已经处理完成的函数，通常由任务台账提供，
+                          为None时处理所有文件
+            queue_size: 已发现但尚未被领取的文件的最大数量，
+                        队列满时扫描线程会暂停，避免扫描远远领先于压缩
+            source: 待处理文件路径的来源，为None时扫描 info.targets。
+                    监视模式下为一个持续产生新文件的迭代器，迭代结束时扫描完成
+            enqueue: 把文件加入持久化任务队列并返回任务编号的函数，
+                     为None时只在内存中排队
+            on_scan_finished: 扫描正常完成（未被取消）时调用的函数
+            encoder: 压缩使用的编码器，决定输出文件的后缀和扩展名，
+                     为None时沿用 x264 的命名
+
+        构造时不会扫描文件，扫描在第一次迭代或调用start时开始。
         """
         self.current_index: int = 0
         self.info = info
 
         self.status: TaskStatus = TaskStatus.PENDING
 
-        # 遍历展开文件夹
-        self.video_sequence: list[VideoFile] = []
-        for path in self.info.targets:
+        # 已发现的待处理文件数，扫描完成前只是一个不断增长的估计值
+        self.found_num: int = 0
+
+        # 之前已经处理完成而被略过的文件数
+        self.completed_num: int = 0
+
+        # 已发现文件的媒体总时长（秒），不包括没有媒体信息的文件
+        self.found_duration: float = 0.0
+
+        self._probe = probe
+        self._is_completed_func = is_completed
+        self._source = source
+        self._enqueue = enqueue
+        self._on_scan_finished = on_scan_finished
+        self._encoder = encoder
+
+        # 持久化任务队列中的批次编号，不使用任务队列时为None
+        self.batch_id: Optional[int] = None
+
+        self._queue: Queue[VideoFile] = Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._producer: Optional[threading.Thread] = None
+        self._scan_finished = threading.Event()
+        self._cancelled = threading.Event()
+
+    def __iter__(self) -> Iterator[VideoFile]:
+        """
+        依次领取待处理的视频文件，队列为空时等待扫描线程
+
+        Yields:
+            VideoFile: 待处理的视频文件
+
+        扫描完成且队列为空，或任务被取消时结束迭代。
+        """
+        self.start()
+
+        while not self._cancelled.is_set():
+            try:
+                yield self._queue.get(timeout=0.5)
+            except Empty:
+                if self._scan_finished.is_set() and self._queue.empty():
+                    return
+
+    def start(self):
+        """
+        启动后台扫描线程，重复调用不会重复扫描
+        """
+        with self._lock:
+            if self._producer is not None:
+                return
+
+            self._producer = threading.Thread(
+                target=self._produce, name="TaskScanner", daemon=True
+            )
+            self._producer.start()
+
+    def cancel(self):
+        """
+        取消任务，停止扫描并结束所有迭代
+        """
+        self._cancelled.set()
+
+    @property
+    def files_num(self) -> int:
+        """
+        获取任务中已发现的待处理文件数
+
+        扫描完成前，该值是到目前为止发现的文件数；扫描完成后即为总文件数。
+
+        Returns:
+            int: 已发现的待处理文件数
+        """
+        return self.found_num
+
+    @property
+    def is_scan_finished(self) -> bool:
+        """
+        判断文件扫描是否已经完成
+
+        Returns:
+            bool: 扫描完成时返回True
+        """
+        return self._scan_finished.is_set()
+
+    def _produce(self):
+        """
+        扫描线程的入口
+
+        该方法会：
+        1. 遍历处理目标路径列表
+        2. 如果是文件夹且开启递归，则扫描文件夹中的所有视频文件
+        3. 验证每个文件是否为支持的视频格式
+        4. 略过之前已经使用相同参数处理完成的文件
+        5. 读取视频文件的媒体信息，并根据编码器确定输出文件名
+        6. 将验证通过的视频文件加入持久化任务队列，并放入内存队列
+        7. 忽略不支持的视频文件并记录警告日志
+        """
+        try:
+            for video_file in self._iter_targets():
+                if self._is_completed(video_file):
+                    continue
+                self._attach_media_info(video_file)
+                if self._encoder is not None:
+                    video_file.output_suffix = self._encoder.suffix
+                    video_file.output_ext = self._encoder.output_extension(
+                        video_file.ext
+                    )
+
+                # 先持久化再交给压缩线程，程序中断后可以恢复
+                if self._enqueue is not None:
+                    video_file.job_id = self._enqueue(video_file.file_path)
+
+                # 先计数再入队，保证已领取的文件数不会超过已发现的文件数
+                self.found_num += 1
+                if video_file.media_info is not None:
+                    self.found_duration += video_file.media_info.duration
+
+                # 队列满时等待压缩线程领取，同时响应取消
+                while not self._cancelled.is_set():
+                    try:
+                        self._queue.put(video_file, timeout=0.5)
+                        break
+                    except Full:
+                        continue
+
+            if self._on_scan_finished is not None and not self._cancelled.is_set():
+                self._on_scan_finished()
+        except Exception as e:
+            logging.error(f"扫描任务文件时出错: {e}")
+        finally:
+            self._scan_finished.set()
+            logging.info(
+                f"扫描完成，发现 {self.found_num} 个待处理文件，"
+                f"略过 {self.completed_num} 个已完成文件"
+            )
+
+    def _iter_targets(self) -> Iterator[VideoFile]:
+        """
+        展开处理目标路径列表中的文件和文件夹
+
+        Yields:
+            VideoFile: 支持的视频文件
+        """
+        targets = self._source if self._source is not None else self.info.targets
+        for path in targets:
+            if self._cancelled.is_set():
+                return
+
             if not os.path.exists(path):
                 continue
 
             if os.path.isdir(path) and self.info.recursive:
-                _, video_files = scan_directory(path, meta.SUPPORTED_VIDEO_EXTENSIONS)
-                for file_path in video_files:
-                    try:
-                        video_file = VideoFile(file_path)
-                        self.video_sequence.append(video_file)
-                    except ValueError:
-                        logging.warning(
-                            f"文件 {file_path} 不是支持的视频文件, 已被略过"
-                        )
-                        continue
+                # 扫描时已经确认了文件类型和扩展名，无需再次检查
+                for entry in iter_directory(
+                    path, meta.SUPPORTED_VIDEO_EXTENSIONS, self.info.scan_workers
+                ):
+                    if self._cancelled.is_set():
+                        return
+                    yield VideoFile(entry.path, verified=True)
                 continue
 
             try:
-                video_file = VideoFile(path)
-                self.video_sequence.append(video_file)
+                yield VideoFile(path)
             except ValueError:
                 logging.warning(f"文件 {path} 不是支持的视频文件, 已被略过")
                 continue
 
-    @property
-    def files_num(self) -> int:
+    def _is_completed(self, video_file: VideoFile) -> bool:
         """
-        获取任务中的总文件数
+        判断视频文件是否已经处理完成，已完成时计入 completed_num
+
+        Args:
+            video_file: 视频文件对象
 
         Returns:
-            int: 任务中的总文件数
+            bool: 已经处理完成时返回True
         """
-        return len(self.video_sequence)
+        if self._is_completed_func is None or not self._is_completed_func(
+            video_file.file_path
+        ):
+            return False
+
+        logging.info(f"文件 {video_file.file_path} 已经处理完成, 已被略过")
+        self.completed_num += 1
+        return True
+
+    def _attach_media_info(self, video_file: VideoFile):
+        """
+        读取并保存视频文件的媒体信息
+
+        读取失败时只记录警告，压缩时会退回到从 ffmpeg 输出中解析时长。
+
+        Args:
+            video_file: 视频文件对象
+        """
+        if self._probe is None:
+            return
+
+        try:
+            video_file.media_info = self._probe(video_file.file_path)
+        except Exception as e:
+            logging.warning(f"读取文件 {video_file.file_path} 的媒体信息失败: {e}")
 
 
 def resolve_time_str(time_str: str) -> float:
@@ -211,16 +447,3 @@ def resolve_time_str(time_str: str) -> float:
 
     h, m, s = map(float, time_str.split(":"))
     return h * 3600 + m * 60 + s
-
-
-def is_progress_line(line: str) -> bool:
-    """
-    判断是否为进度行
-
-    Args:
-        line: 输入行字符串
-
-    Returns:
-        bool: 如果是进度行，则返回True
-    """
-    return "elapsed" in line
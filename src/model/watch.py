@@ -0,0 +1,531 @@
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional
+
+from src import meta
+from src.utils import iter_directory
+
+
+class IWatcher(ABC):
+    """
+    目录监视器接口类
+
+    监视器报告监视目录中新建或被修改的视频文件。第一次调用 wait_changes
+    时会返回目录中已有的所有视频文件，保证启动前就存在的文件也会被处理。
+    监视器只在创建它的线程中使用，不需要是线程安全的。
+    """
+
+    @abstractmethod
+    def wait_changes(self, timeout: float) -> set[str]:
+        """
+        等待目录中的文件发生变化
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            set[str]: 新建或被修改的视频文件路径，超时时为空集合
+        """
+
+    @abstractmethod
+    def close(self):
+        """
+        停止监视并释放资源
+        """
+
+
+def _scan_files(directories: list[str], recursive: bool) -> dict[str, tuple]:
+    """
+    扫描目录中的视频文件
+
+    Args:
+        directories: 目录路径列表
+        recursive: 是否扫描子目录
+
+    Returns:
+        dict[str, tuple]: 文件路径 -> (大小, 修改时间)
+    """
+    files = {}
+    for directory in directories:
+        if recursive:
+            entries = iter_directory(directory, meta.SUPPORTED_VIDEO_EXTENSIONS)
+        else:
+            entries = _list_files(directory)
+
+        for entry in entries:
+            if not _is_video(entry.path):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _list_files(directory: str) -> list[os.DirEntry]:
+    """
+    列举单个目录中的视频文件（不递归）
+
+    Args:
+        directory: 目录路径
+
+    Returns:
+        list[os.DirEntry]: 视频文件条目
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return [
+                entry for entry in entries if _is_video(entry.path) and entry.is_file()
+            ]
+    except OSError as e:
+        logging.warning(f"无法扫描目录 {directory}: {e}")
+        return []
+
+
+def _is_video(path: str) -> bool:
+    """
+    根据扩展名判断是否为需要处理的视频文件
+
+    以 . 开头的隐藏文件，以及隐藏目录中的文件会被忽略，
+    压缩过程中的临时输出文件和分段编码的临时目录都属于这种情况。
+
+    Args:
+        path: 文件名或路径
+
+    Returns:
+        bool: 扩展名受支持且不是隐藏文件时返回True
+    """
+    directory, name = os.path.split(path)
+    if name.startswith(".") or os.path.basename(directory).startswith("."):
+        return False
+    return os.path.splitext(name)[1].lower() in meta.SUPPORTED_VIDEO_EXTENSIONS
+
+
+class PollingWatcher(IWatcher):
+    """
+    轮询监视器，定期扫描目录并比较文件的大小和修改时间
+
+    不依赖操作系统的文件通知，适用于 inotify 无法工作的网络挂载目录（NFS、SMB 等）。
+    """
+
+    def __init__(self, directories: list[str], recursive: bool, interval: float):
+        """
+        Args:
+            directories: 监视的目录路径列表
+            recursive: 是否监视子目录
+            interval: 两次扫描之间的间隔（秒）
+        """
+        self.directories = directories
+        self.recursive = recursive
+        self.interval = interval
+
+        self._snapshot: dict[str, tuple] = {}
+        self._next_scan = 0.0
+
+    def wait_changes(self, timeout: float) -> set[str]:
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        if delay > 0:
+            time.sleep(delay)
+
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = _scan_files(self.directories, self.recursive)
+        changes = {
+            path
+            for path, signature in snapshot.items()
+            if self._snapshot.get(path) != signature
+        }
+        self._snapshot = snapshot
+        return changes
+
+    def close(self):
+        self._snapshot = {}
+
+
+# inotify 事件掩码，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher(IWatcher):
+    """
+    基于 Linux inotify 的监视器
+
+    通过 ctypes 调用 libc，不需要额外的依赖。文件变化时立即得到通知，
+    无需反复扫描目录；事件队列溢出时会重新扫描所有目录。
+    """
+
+    def __init__(self, directories: list[str], recursive: bool):
+        """
+        Args:
+            directories: 监视的目录路径列表
+            recursive: 是否监视子目录
+
+        Raises:
+            OSError: 当系统不支持 inotify 或无法创建监视时抛出
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 只在 Linux 上可用")
+
+        self.directories = directories
+        self.recursive = recursive
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 失败: {os.strerror(errno)}")
+
+        # 监视描述符 -> 目录路径
+        self._watches: dict[int, str] = {}
+        # 第一次调用 wait_changes 时返回的文件
+        self._pending: set[str] = set()
+
+        for directory in directories:
+            self._pending |= self._add_tree(directory)
+
+    def wait_changes(self, timeout: float) -> set[str]:
+        if self._pending:
+            changes, self._pending = self._pending, set()
+            return changes
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changes = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset : offset + name_len].rstrip(b"\0"))
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                logging.warning("inotify 事件队列溢出，重新扫描监视目录")
+                return set(_scan_files(self.directories, self.recursive))
+
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                # 新建或移入的子目录中可能已经有文件
+                if (
+                    self.recursive
+                    and mask & (IN_CREATE | IN_MOVED_TO)
+                    and not name.startswith(".")
+                ):
+                    changes |= self._add_tree(path)
+            elif _is_video(path):
+                changes.add(path)
+
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches = {}
+
+    def _add_tree(self, directory: str) -> set[str]:
+        """
+        监视目录（开启递归时包括所有子目录），并返回其中已有的视频文件
+
+        先添加监视再扫描，保证两者之间新建的文件不会被遗漏。
+
+        Args:
+            directory: 目录路径
+
+        Returns:
+            set[str]: 目录中已有的视频文件路径
+        """
+        files = set()
+        pending = deque([directory])
+        while pending:
+            current = pending.popleft()
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(current), _INOTIFY_MASK
+            )
+            if wd < 0:
+                errno = ctypes.get_errno()
+                logging.warning(f"无法监视目录 {current}: {os.strerror(errno)}")
+                continue
+            self._watches[wd] = current
+
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir():
+                                # 不监视隐藏目录，例如分段编码的临时目录
+                                if self.recursive and not entry.name.startswith("."):
+                                    pending.append(entry.path)
+                            elif _is_video(entry.path) and entry.is_file():
+                                files.add(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logging.warning(f"无法扫描目录 {current}: {e}")
+
+        return files
+
+
+def create_watcher(
+    backend: str, directories: list[str], recursive: bool, interval: float
+) -> IWatcher:
+    """
+    创建目录监视器
+
+    Args:
+        backend: 监视方式，"inotify"、"polling" 或 "auto"（优先使用 inotify，不可用时轮询）
+        directories: 监视的目录路径列表
+        recursive: 是否监视子目录
+        interval: 轮询监视器两次扫描之间的间隔（秒）
+
+    Returns:
+        IWatcher: 目录监视器
+
+    Raises:
+        OSError: 当指定使用 inotify 但系统不支持时抛出
+    """
+    if backend in ("inotify", "auto"):
+        try:
+            return InotifyWatcher(directories, recursive)
+        except OSError as e:
+            if backend == "inotify":
+                raise
+            logging.info(f"inotify 不可用，使用轮询监视目录: {e}")
+
+    return PollingWatcher(directories, recursive, interval)
+
+
+class StabilityTracker:
+    """
+    文件稳定性跟踪类
+
+    正在复制或上传的文件大小和修改时间会不断变化，只有在两者都保持不变
+    超过指定时间后，才认为文件已经写入完成，可以开始压缩。
+    """
+
+    def __init__(self, stable_seconds: float):
+        """
+        Args:
+            stable_seconds: 文件大小和修改时间保持不变的最短时间（秒）
+        """
+        self.stable_seconds = stable_seconds
+
+        # 文件路径 -> (大小, 修改时间, 开始保持不变的时间)
+        self._files: dict[str, tuple[int, int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def observe(self, path: str):
+        """
+        开始跟踪文件，文件已经在跟踪时检查其是否发生了变化
+
+        Args:
+            path: 文件路径
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._files.pop(path, None)
+            return
+
+        previous = self._files.get(path)
+        if previous is None or previous[:2] != (stat.st_size, stat.st_mtime_ns):
+            self._files[path] = (stat.st_size, stat.st_mtime_ns, time.monotonic())
+
+    def pop_stable(self) -> list[str]:
+        """
+        取出已经稳定的文件，不再跟踪它们
+
+        Returns:
+            list[str]: 已经稳定的文件路径
+        """
+        now = time.monotonic()
+        stable = []
+        for path in list(self._files):
+            self.observe(path)
+            entry = self._files.get(path)
+            if entry is not None and now - entry[2] >= self.stable_seconds:
+                del self._files[path]
+                stable.append(path)
+        return stable
+
+
+class WatchQueue:
+    """
+    监视模式的持久化文件队列
+
+    队列中的文件按照加入的顺序处理。每次加入和取出都以 JSON Lines 的形式
+    追加写入文件，程序重启后尚未取出的文件会恢复到队列中；
+    打开时会重写文件，只保留仍在队列中的文件。该类是线程安全的。
+
+    文件被取出后，是否处理完成由任务台账记录。
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 队列文件路径
+        """
+        self._file_path = file_path
+
+        self._condition = threading.Condition()
+        self._queue: deque[str] = deque()
+        self._queued: set[str] = set()
+
+    @property
+    def file_path(self) -> str:
+        """
+        获取队列文件路径
+
+        Returns:
+            str: 队列文件路径
+        """
+        return self._file_path
+
+    def open(self):
+        """
+        加载队列文件中尚未取出的文件，损坏的行会被忽略
+        """
+        with self._condition:
+            self._queue.clear()
+            self._queued.clear()
+
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            op, path = entry["op"], entry["path"]
+                        except (ValueError, KeyError, TypeError):
+                            logging.warning(f"忽略队列中损坏的记录: {line.strip()}")
+                            continue
+
+                        if op == "put" and path not in self._queued:
+                            self._queue.append(path)
+                            self._queued.add(path)
+                        elif op == "take" and path in self._queued:
+                            self._queue.remove(path)
+                            self._queued.discard(path)
+            except FileNotFoundError:
+                pass
+
+            if self._queue:
+                logging.info(f"恢复监视队列中的 {len(self._queue)} 个文件")
+
+            temp_path = f"{self.file_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for path in self._queue:
+                    f.write(self._format("put", path))
+            os.replace(temp_path, self.file_path)
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def __contains__(self, path: str) -> bool:
+        with self._condition:
+            return path in self._queued
+
+    def put(self, path: str) -> bool:
+        """
+        将文件加入队列
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            bool: 文件已经在队列中时返回False
+        """
+        with self._condition:
+            if path in self._queued:
+                return False
+
+            self._append("put", path)
+            self._queue.append(path)
+            self._queued.add(path)
+            self._condition.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        取出队首的文件，队列为空时等待
+
+        Args:
+            timeout: 最长等待时间（秒），为None时一直等待
+
+        Returns:
+            Optional[str]: 文件路径，超时时返回None
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._queue, timeout):
+                return None
+
+            path = self._queue.popleft()
+            self._queued.discard(path)
+            self._append("take", path)
+            return path
+
+    def _append(self, op: str, path: str):
+        """
+        追加一条记录到队列文件，调用方需持有锁
+
+        Args:
+            op: 操作，"put" 或 "take"
+            path: 文件路径
+        """
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.write(self._format(op, path))
+
+    @staticmethod
+    def _format(op: str, path: str) -> str:
+        """
+        格式化一条队列记录
+
+        Args:
+            op: 操作
+            path: 文件路径
+
+        Returns:
+            str: JSON Lines 格式的记录
+        """
+        return json.dumps({"op": op, "path": path}, ensure_ascii=False) + "\n"
@@ -6,7 +6,9 @@ VideoSlim - 服务模块
 
 import logging
 
+from src.service.adaptive import AdaptiveCrfService
 from src.service.config import ConfigService
+from src.service.media import MediaService
 from src.service.message import MessageService
 from src.service.store import StoreService
 from src.service.updater import UpdateService
@@ -17,16 +19,20 @@ def init_services():
     """
     初始化应用程序的所有服务
 
-    创建并初始化所有服务的单例实例，包括配置服务、消息服务、更新服务、存储服务和视频服务。
+    创建并初始化所有服务的单例实例，包括配置服务、消息服务、更新服务、存储服务、
+    媒体信息服务、自适应 CRF 服务和视频服务。
 
     Returns:
         None
     """
-    global config_service, message_service, update_service, store_service, video_service
+    global config_service, message_service, update_service, store_service
+    global media_service, adaptive_service, video_service
     logging.info("初始化服务")
 
     config_service = ConfigService.get_instance()
     message_service = MessageService.get_instance()
     update_service = UpdateService.get_instance()
     store_service = StoreService.get_instance()
+    media_service = MediaService.get_instance()
+    adaptive_service = AdaptiveCrfService.get_instance()
     video_service = VideoService.get_instance()
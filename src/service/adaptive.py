@@ -0,0 +1,212 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from statistics import mean
+from typing import Optional
+
+from src import meta
+from src.model.adaptive import CrfCache, adaptive_params_hash, search_crf
+from src.model.command import CommandRunner, run_command, segment_encode_command
+from src.model.config import ConfigModel
+from src.model.encoder import create_encoder
+from src.model.quality import QualityMetric, libvmaf_available, measure_quality
+from src.model.sample import extract_excerpts, sample_offsets
+from src.model.scale import scale_filter
+from src.model.video import VideoFile
+
+
+class AdaptiveCrfService:
+    """
+    自适应 CRF 服务类，用于按内容为每个文件选择 CRF
+
+    该类采用单例模式实现。压缩前从文件中截取几个短片段，以快速预设和不同的 CRF
+    试编码并测量画质，二分查找画质达到目标的最大 CRF。屏幕录制等容易压缩的内容
+    会得到较大的 CRF，颗粒较多的拍摄素材会得到较小的 CRF。
+    搜索结果按照（路径、大小、修改时间、参数）缓存到磁盘，重新运行时直接使用。
+    """
+
+    _instance: Optional["AdaptiveCrfService"] = None
+
+    def __init__(self) -> None:
+        """
+        初始化自适应 CRF 服务实例
+
+        Raises:
+            ValueError: 当尝试创建多个AdaptiveCrfService实例时抛出
+        """
+        if AdaptiveCrfService._instance is not None:
+            raise ValueError("AdaptiveCrfService already initialized")
+
+        self.cache = CrfCache(meta.CRF_CACHE_PATH, meta.CRF_CACHE_MAX_ENTRIES)
+        self.cache.open()
+
+        AdaptiveCrfService._instance = self
+
+    @staticmethod
+    def get_instance() -> "AdaptiveCrfService":
+        """
+        获取自适应 CRF 服务的单例实例
+
+        Returns:
+            AdaptiveCrfService: 自适应 CRF 服务的单例实例
+
+        该方法采用懒加载模式，只有在第一次调用时才会创建AdaptiveCrfService实例。
+        """
+        if AdaptiveCrfService._instance is None:
+            AdaptiveCrfService._instance = AdaptiveCrfService()
+
+        return AdaptiveCrfService._instance
+
+    def select_crf(
+        self,
+        file: VideoFile,
+        config: ConfigModel,
+        threads: Optional[int] = None,
+        run: CommandRunner = run_command,
+    ) -> Optional[int]:
+        """
+        为单个文件选择 CRF
+
+        该方法会：
+        1. 检查缓存，文件和参数都未变化时直接返回上次的结果
+        2. 从文件中均匀地截取几个片段
+        3. 以快速预设二分查找画质达到目标的最大 CRF，并缓存结果
+        试编码失败时记录警告并返回None，由调用方使用配置中的 CRF。
+
+        Args:
+            file: 视频文件对象，需要包含媒体信息
+            config: 压缩配置，adaptive.enabled 应为True
+            threads: 试编码使用的CPU线程数
+            run: 执行截取、试编码和画质计算命令的函数，
+                 传入登记子进程的函数后停止压缩时可以终止试编码
+
+        Returns:
+            Optional[int]: 选择的 CRF，视频过短、没有媒体信息或试编码失败时返回None
+        """
+        adaptive = config.adaptive
+        media = file.media_info
+        if media is None or media.duration < adaptive.min_duration:
+            return None
+
+        # 暂存到本地时缓存仍以原始文件为准，试编码读取本地副本
+        path = os.path.abspath(file.file_path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logging.warning(f"无法读取文件 {path}: {e}")
+            return None
+
+        params_hash = adaptive_params_hash(config)
+        crf = self.cache.get(path, stat.st_size, stat.st_mtime_ns, params_hash)
+        if crf is not None:
+            logging.info(f"{file.file_path}: 使用缓存的自适应 CRF {crf}")
+            return crf
+
+        metric: QualityMetric = adaptive.metric
+        if adaptive.metric == "auto":
+            metric = "vmaf" if libvmaf_available() else "ssim"
+        target = adaptive.target_vmaf if metric == "vmaf" else adaptive.target_ssim
+
+        directory = tempfile.mkdtemp(prefix="videoslim_probe_")
+        try:
+            offsets = sample_offsets(
+                media.duration, adaptive.samples, adaptive.sample_length
+            )
+            excerpts = extract_excerpts(
+                file.input_path, directory, offsets, adaptive.sample_length, run
+            )
+            min_crf, max_crf = adaptive.crf_range(config.encoder.type)
+
+            crf, score = search_crf(
+                lambda value: self._measure(
+                    excerpts,
+                    config,
+                    value,
+                    metric,
+                    threads,
+                    directory,
+                    scale_filter(media, config.scale),
+                    run,
+                ),
+                target,
+                min_crf,
+                max_crf,
+                adaptive.max_probes,
+            )
+        except (subprocess.CalledProcessError, ValueError) as e:
+            logging.warning(
+                f"{file.file_path}: 自适应 CRF 试编码失败，使用配置中的 CRF: {e}"
+            )
+            return None
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        logging.info(
+            f"{file.file_path}: 自适应 CRF {crf}（{metric} "
+            f"{'未达标' if score is None else f'{score:.4f}'}，目标 {target}）"
+        )
+        self.cache.set(path, stat.st_size, stat.st_mtime_ns, params_hash, crf, score)
+        return crf
+
+    @staticmethod
+    def _measure(
+        excerpts: list[str],
+        config: ConfigModel,
+        crf: int,
+        metric: QualityMetric,
+        threads: Optional[int],
+        directory: str,
+        video_filter: Optional[str],
+        run: CommandRunner,
+    ) -> float:
+        """
+        以指定的 CRF 试编码所有片段，返回平均画质
+
+        Args:
+            excerpts: 片段文件路径
+            config: 压缩配置
+            crf: 试编码的 CRF
+            metric: 画质指标
+            threads: 试编码使用的CPU线程数
+            directory: 试编码输出的临时目录
+            video_filter: 编码前应用于视频流的缩放滤镜
+            run: 执行试编码和画质计算命令的函数
+
+        Returns:
+            float: 所有片段的平均画质
+
+        Raises:
+            subprocess.CalledProcessError: 当试编码或计算画质失败时抛出
+            ValueError: 当无法计算画质指标时抛出
+        """
+        probe_config = config.model_copy(
+            update={"encoder": create_encoder(config.encoder).probe_config(crf)}
+        )
+
+        scores = []
+        for index, excerpt in enumerate(excerpts):
+            output_path = os.path.join(directory, f"probe_{crf}_{index:02d}.mkv")
+            run(
+                segment_encode_command(
+                    excerpt, output_path, probe_config, threads, video_filter
+                )
+            )
+            try:
+                # 参考片段经过相同的缩放，只比较压缩造成的损失
+                scores.append(
+                    measure_quality(
+                        output_path, excerpt, metric, threads, video_filter, run
+                    )
+                )
+            finally:
+                os.remove(output_path)
+
+        return mean(scores)
+
+    def dump(self):
+        """
+        将缓存的搜索结果保存到磁盘
+        """
+        self.cache.dump()
@@ -1,10 +1,13 @@
 import json
 import logging
+import os
 from typing import Optional
 
+from pydantic import ValidationError
+
 from src import meta
 from src.model.config import ConfigModel, ConfigsModel
-from src.model.message import ConfigLoadMessage
+from src.model.message import ConfigErrorMessage, ConfigLoadMessage
 from src.service.message import MessageService
 
 
@@ -24,40 +27,43 @@ class ConfigService:
 
         从配置文件加载配置数据，并使用ConfigModel解析配置。
 
+        配置文件不存在时生成并导出默认配置；配置文件无效（JSON 格式错误、
+        参数超出范围或包含未知的参数）时，本次使用默认配置运行，
+        但不会覆盖用户的配置文件，错误原因保存在 load_error 中并发送配置错误消息。
+
         Raises:
             ValueError: 当尝试创建多个ConfigService实例时抛出
-            FileNotFoundError: 当配置文件不存在时抛出
-            json.JSONDecodeError: 当配置文件格式错误时抛出
         """
         if ConfigService._instance is not None:
             raise ValueError("ConfigService already initialized")
 
         config_file_path = meta.CONFIG_FILE_PATH
 
+        # 配置文件无效时的错误原因
+        self.load_error: Optional[str] = None
+
         try:
             with open(config_file_path, "r", encoding="utf-8") as f:
                 configs = json.load(f)
 
-            self.configs_model = ConfigsModel(**configs)
-        except (TypeError, FileNotFoundError, ValueError) as e:
-            match e:
-                case FileNotFoundError():
-                    logging.warning(f"Config file not found: {config_file_path}")
-                case TypeError():
-                    logging.error(f"Decode config file error: {e}")
-                case ValueError():
-                    logging.error(f"ValueError occur when load config: {e}")
-                case _:
-                    logging.error(f"Error loading config file: {e}")
+            if not isinstance(configs, dict):
+                raise TypeError("配置文件的顶层必须是一个对象")
 
+            self.configs_model = ConfigsModel(**configs)
+        except FileNotFoundError:
+            logging.warning(f"Config file not found: {config_file_path}")
             logging.warning("generate default config.")
 
-            # 重新生成默认配置
+            # 生成并导出默认配置
             self.configs_model = ConfigsModel()
-
-            # 导出默认配置
             with open(config_file_path, "w", encoding="utf-8") as f:
                 f.write(self.configs_model.model_dump_json(indent=4))
+        except (TypeError, ValueError) as e:
+            self.load_error = self._describe_error(e)
+            logging.error(f"配置文件 {config_file_path} 无效: {self.load_error}")
+
+            # 使用默认配置运行，但保留用户的配置文件，修改后重新启动即可
+            self.configs_model = ConfigsModel()
 
         # 发送配置加载消息
         config_names = self.get_config_name_list()
@@ -68,6 +74,10 @@ class ConfigService:
         )
 
         MessageService.get_instance().send_message(ConfigLoadMessage(config_names))
+        if self.load_error is not None:
+            MessageService.get_instance().send_message(
+                ConfigErrorMessage(config_file_path, self.load_error)
+            )
 
     @staticmethod
     def get_instance() -> "ConfigService":
@@ -84,6 +94,28 @@ class ConfigService:
 
         return ConfigService._instance
 
+    @staticmethod
+    def _describe_error(error: Exception) -> str:
+        """
+        把配置文件的解析或校验错误转换为便于阅读的说明
+
+        Args:
+            error: 解析或校验配置文件时抛出的异常
+
+        Returns:
+            str: 错误说明，每个出错的参数占一行，包含参数在配置文件中的位置
+        """
+        match error:
+            case ValidationError():
+                return "\n".join(
+                    f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}"
+                    for e in error.errors()
+                )
+            case json.JSONDecodeError():
+                return f"JSON 格式错误（第 {error.lineno} 行第 {error.colno} 列）: {error.msg}"
+            case _:
+                return str(error)
+
     def get_config(self, name: str) -> Optional[ConfigModel]:
         """
         根据名称获取指定的配置对象
@@ -108,3 +140,34 @@ class ConfigService:
             list[str]: 所有配置名称的列表
         """
         return [c.name for c in self.configs_model.configs]
+
+    def save_configs(self, configs: list[ConfigModel]):
+        """
+        添加或替换配置并写回配置文件
+
+        同名的配置在原来的位置被替换，新配置追加在末尾。
+        配置文件先写入临时文件再原子地替换，写入中断时不会损坏原来的配置文件。
+
+        Args:
+            configs: 要保存的配置
+
+        Raises:
+            ValueError: 当配置文件无效时抛出，此时写回会覆盖用户的配置文件
+            OSError: 当写入配置文件失败时抛出
+        """
+        if self.load_error is not None:
+            raise ValueError(f"配置文件无效，请先修正后再保存: {self.load_error}")
+
+        replacements = {config.name: config for config in configs}
+        existing = [replacements.pop(c.name, c) for c in self.configs_model.configs]
+        self.configs_model.configs = existing + list(replacements.values())
+
+        config_file_path = meta.CONFIG_FILE_PATH
+        temp_path = f"{config_file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.configs_model.model_dump_json(indent=4))
+        os.replace(temp_path, config_file_path)
+
+        config_names = self.get_config_name_list()
+        logging.info(f"save config names: {config_names}")
+        MessageService.get_instance().send_message(ConfigLoadMessage(config_names))
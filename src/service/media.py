@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import subprocess
+from typing import Optional
+
+from src import meta
+from src.model.media import MediaInfo, MediaInfoCache
+from src.utils import get_creationflags
+
+
+class MediaService:
+    """
+    媒体信息服务类，用于读取并缓存媒体文件的信息
+
+    该类采用单例模式实现，每个文件只通过 ffprobe 读取一次媒体信息，
+    结果按照（路径、大小、修改时间）缓存到磁盘，文件未变化时重复使用。
+    """
+
+    _instance: Optional["MediaService"] = None
+
+    def __init__(self) -> None:
+        """
+        初始化媒体信息服务实例
+
+        Raises:
+            ValueError: 当尝试创建多个MediaService实例时抛出
+        """
+        if MediaService._instance is not None:
+            raise ValueError("MediaService already initialized")
+
+        self.cache = MediaInfoCache(meta.MEDIA_CACHE_PATH, meta.MEDIA_CACHE_MAX_ENTRIES)
+        self.cache.open()
+
+        MediaService._instance = self
+
+    @staticmethod
+    def get_instance() -> "MediaService":
+        """
+        获取媒体信息服务的单例实例
+
+        Returns:
+            MediaService: 媒体信息服务的单例实例
+
+        该方法采用懒加载模式，只有在第一次调用时才会创建MediaService实例。
+        """
+        if MediaService._instance is None:
+            MediaService._instance = MediaService()
+
+        return MediaService._instance
+
+    def probe(self, file_path: str) -> MediaInfo:
+        """
+        获取媒体文件的信息，文件未变化时直接使用缓存
+
+        Args:
+            file_path: 媒体文件路径
+
+        Returns:
+            MediaInfo: 媒体文件信息
+
+        Raises:
+            OSError: 当文件无法访问时抛出
+            subprocess.CalledProcessError: 当 ffprobe 执行失败时抛出
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+
+        info = self.cache.get(path, stat.st_size, stat.st_mtime_ns)
+        if info is not None:
+            return info
+
+        info = MediaInfo.from_ffprobe(MediaService.run_ffprobe(path))
+        logging.debug(f"probe {path}: {info}")
+
+        self.cache.set(path, stat.st_size, stat.st_mtime_ns, info)
+        return info
+
+    @staticmethod
+    def run_ffprobe(file_path: str) -> dict:
+        """
+        使用 ffprobe 读取媒体文件的格式和流信息
+
+        Args:
+            file_path: 媒体文件路径
+
+        Returns:
+            dict: ffprobe 输出的 JSON 数据，包含 format 和 streams
+
+        Raises:
+            subprocess.CalledProcessError: 当 ffprobe 执行失败时抛出
+        """
+        result = subprocess.run(
+            [
+                meta.FFPROBE_PATH,
+                "-v",
+                "error",
+                "-print_format",
+                "json",
+                "-show_format",
+                "-show_streams",
+                file_path,
+            ],
+            stdin=subprocess.DEVNULL,
+            creationflags=get_creationflags(),
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            check=True,
+        )
+        return json.loads(result.stdout)
+
+    def dump(self):
+        """
+        将缓存的媒体信息保存到磁盘
+        """
+        self.cache.dump()
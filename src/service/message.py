@@ -1,4 +1,4 @@
-from queue import Queue
+from queue import Empty, Queue
 from typing import Optional
 
 from src.model.message import IMessage
@@ -54,16 +54,22 @@ class MessageService:
         """
         self.queue.put(message)
 
-    def receive_message(self) -> IMessage:
+    def receive_message(self, timeout: Optional[float] = None) -> Optional[IMessage]:
         """
         从消息队列接收消息（阻塞式）
 
+        Args:
+            timeout: 最长等待时间（秒），为None时一直等待
+
         Returns:
-            IMessage: 接收到的消息对象
+            Optional[IMessage]: 接收到的消息对象，超时时返回None
 
         该方法会阻塞当前线程，直到有消息可用或超时。
         """
-        return self.queue.get()
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            return None
 
     def try_receive_message(self) -> Optional[IMessage]:
         """
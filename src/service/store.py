@@ -1,6 +1,8 @@
 from typing import Optional
 
 from src import meta
+from src.model.jobs import JobQueue
+from src.model.ledger import JobLedger
 from src.model.store import JSONStore
 
 
@@ -8,7 +10,7 @@ class StoreService:
     """
     存储服务类，用于管理应用程序的持久化存储
 
-    该类采用单例模式实现，封装了JSONStore的操作，
+    该类采用单例模式实现，封装了JSONStore、压缩任务台账和持久化任务队列的操作，
     提供了访问和管理应用程序数据的方法。
     """
 
@@ -18,7 +20,9 @@ class StoreService:
         """
         初始化存储服务实例
 
-        创建并打开JSONStore对象，用于持久化存储应用程序数据。
+        创建并打开JSONStore对象，用于持久化存储应用程序数据；
+        创建并打开压缩任务台账，用于记录已经处理完成的文件；
+        打开持久化任务队列，并恢复上次运行时被中断的任务。
 
         Raises:
             ValueError: 当尝试创建多个StoreService实例时抛出
@@ -31,6 +35,14 @@ class StoreService:
 
         self.store.open()
 
+        self.ledger: JobLedger = JobLedger(meta.LEDGER_PATH)
+
+        self.ledger.open()
+
+        self.jobs: JobQueue = JobQueue(meta.JOBS_DB_PATH)
+
+        self.jobs.open()
+
         StoreService._instance = self
 
     @staticmethod
@@ -57,10 +69,29 @@ class StoreService:
         """
         return self.store
 
+    def get_ledger(self) -> JobLedger:
+        """
+        获取压缩任务台账实例
+
+        Returns:
+            JobLedger: 压缩任务台账实例
+        """
+        return self.ledger
+
+    def get_job_queue(self) -> JobQueue:
+        """
+        获取持久化任务队列实例
+
+        Returns:
+            JobQueue: 持久化任务队列实例
+        """
+        return self.jobs
+
     def dump(self):
         """
         将内存中的数据保存到存储文件
 
-        该方法调用JSONStore的dump方法，将当前内存中的数据持久化到磁盘。
+        该方法调用JSONStore和台账的dump方法，将当前内存中的数据持久化到磁盘。
         """
         self.store.dump()
+        self.ledger.dump()
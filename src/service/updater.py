@@ -1,8 +1,6 @@
 import logging
 from typing import Optional
 
-import requests
-
 from src import meta
 from src.model.message import UpdateMessage
 from src.service.message import MessageService
@@ -57,9 +55,12 @@ class UpdateService:
 
         使用requests库发送HTTP请求获取最新版本信息，
         超时时间设置为10秒。如果检查失败，会记录警告日志。
+        requests 只在检查更新时导入，命令行模式不会加载它。
         """
         message_service = MessageService.get_instance()
         try:
+            import requests
+
             response = requests.get(meta.CHECK_UPDATE_URL, timeout=10)
             data = response.json()
 
@@ -1,21 +1,153 @@
 import logging
 import os
+import shutil
 import subprocess
+import tempfile
+import threading
 import time
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from queue import Queue
+from typing import Callable, Optional
 
 from src import meta
+from src.model.audio import output_audio_bit_rate
+from src.model.budget import ThreadBudget
+from src.model.command import (
+    audio_command,
+    concat_command,
+    encode_command,
+    first_pass_command,
+    segment_encode_command,
+    split_command,
+)
+from src.model.config import ConfigModel
+from src.model.encoder import PassSettings, create_encoder
+from src.model.estimate import (
+    bits_per_pixel,
+    estimate_output_size,
+    estimate_remux_size,
+    target_video_bit_rate,
+)
+from src.model.jobs import JobBatch
+from src.model.ledger import file_fingerprint, job_config_hash
+from src.model.media import MediaInfo
+from src.model.metrics import FileMetrics, TaskTelemetry
 from src.model.message import (
     CompressionCurrentProgressMessage,
     CompressionErrorMessage,
     CompressionFinishedMessage,
+    CompressionSkippedMessage,
     CompressionStartMessage,
     CompressionTotalProgressMessage,
 )
-from src.model.video import Task, VideoFile, is_progress_line, resolve_time_str
+from src.model.progress import FFmpegProgress, ProgressParser
+from src.model.scale import scale_filter, scaled_media
+from src.model.staging import StagingArea
+from src.model.video import (
+    Task,
+    TaskInfo,
+    TaskStatus,
+    VideoFile,
+    resolve_time_str,
+)
+from src.service.adaptive import AdaptiveCrfService
 from src.service.config import ConfigService
+from src.service.media import MediaService
 from src.service.message import MessageService
-from src.utils import timer
+from src.service.store import StoreService
+from src.utils import get_cpu_count, get_creationflags, timer
+
+
+class _ProgressReporter:
+    """
+    单个文件的压缩进度汇总器
+
+    文件可能由多个并行的命令共同处理（例如分段编码），
+    该类汇总各部分的进度记录，计算速度、预计输出大小和剩余时间，
+    并以不超过每秒一次的频率发送进度消息。
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        total: float = -1,
+        telemetry: Optional[TaskTelemetry] = None,
+        passes: int = 1,
+        expected_size: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            file_name: 正在处理的文件路径
+            total: 文件总时长（秒），未知时为-1
+            telemetry: 所属任务的吞吐量统计，为None时不计算任务级的速度和剩余时间
+            passes: 文件需要完整处理的遍数，两遍编码时为2，各遍依次作为不同的部分汇报
+            expected_size: 已知的输出大小（字节），例如目标体积，为None时根据进度推算
+        """
+        self.file_name = file_name
+        self.total = total
+        self.telemetry = telemetry
+        self.passes = passes
+        self.expected_size = expected_size
+
+        self._lock = threading.Lock()
+        self._parts: dict[int, FFmpegProgress] = {}
+        self._update_time = time.time()
+
+    def update(self, part: int, record: FFmpegProgress):
+        """
+        更新某一部分的进度
+
+        Args:
+            part: 部分的编号
+            record: 该部分最新的进度记录
+        """
+        with self._lock:
+            self._parts[part] = record
+
+            current = sum(r.out_time for r in self._parts.values())
+            if self.telemetry is not None:
+                # 任务的吞吐量按媒体时长统计，多遍处理时折算为一遍
+                self.telemetry.update_file(self.file_name, current / self.passes)
+
+            if self._update_time >= time.time() - 1:
+                return
+            self._update_time = time.time()
+
+            # 多遍处理时各遍依次进行，速度和输出大小只取当前这一遍
+            active = [record] if self.passes > 1 else list(self._parts.values())
+            output_size = sum(r.total_size for r in active)
+            fps = sum(r.fps for r in active)
+            speed = sum(r.speed or 0 for r in active)
+
+        total = self.total * self.passes if self.total > 0 else self.total
+        projected_size = self.expected_size
+        eta = None
+        if current > 0 and total > 0:
+            if projected_size is None:
+                projected_size = int(output_size / current * total)
+            if speed > 0:
+                eta = max(total - current, 0) / speed
+
+        task_speed, task_eta = (
+            self.telemetry.estimate() if self.telemetry else (None, None)
+        )
+
+        MessageService.get_instance().send_message(
+            CompressionCurrentProgressMessage(
+                file_name=self.file_name,
+                current=current,
+                total=total,
+                speed=speed or None,
+                fps=fps or None,
+                output_size=output_size,
+                projected_size=projected_size,
+                eta=eta,
+                task_speed=task_speed,
+                task_eta=task_eta,
+            )
+        )
 
 
 class VideoService:
@@ -23,7 +155,7 @@ class VideoService:
     视频处理服务类，提供视频压缩和处理的核心功能
 
     该类作为应用程序的核心服务之一，负责视频文件的压缩处理，支持单个文件处理和批量任务处理。
-    它使用FFmpeg、x264、NeroAACEnc等工具实现视频压缩，并通过消息服务发送处理状态和进度信息，
+    它使用FFmpeg及其中的x264、x265、SVT-AV1编码器实现视频压缩，并通过消息服务发送处理状态和进度信息，
     使UI能够实时更新处理进度。
     """
 
@@ -31,6 +163,18 @@ class VideoService:
 
     running_process: list[subprocess.Popen] = []
 
+    # 正在执行的任务，停止时需要取消它们的文件扫描
+    running_tasks: list[Task] = []
+
+    # 保护 running_process 和 running_tasks 的锁，多个压缩线程会同时增删其中的进程
+    _process_lock = threading.Lock()
+
+    # 停止信号，设置后正在排队的文件不再开始处理
+    _stop_event = threading.Event()
+
+    # 正在写入的临时输出文件，由 _process_lock 保护
+    _temp_files: set[str] = set()
+
     def __init__(self) -> None:
         if self._instance is not None:
             raise ValueError("VideoService 是单例类，不能重复实例化")
@@ -57,20 +201,36 @@ class VideoService:
         config_name: str,
         delete_audio: bool,
         delete_source: bool,
-    ):
+        threads: Optional[int] = None,
+        telemetry: Optional[TaskTelemetry] = None,
+    ) -> TaskStatus:
         """
         处理单个视频文件的压缩任务
 
+        压缩前会根据媒体信息预测压缩收益，收益不足时跳过该文件，
+        或者按照配置的 remux 策略改为直接复制视频流；
+        压缩后如果输出文件不比源文件小，则丢弃输出并保留源文件。
+
         Args:
             file: 视频文件对象，包含源文件路径和输出路径信息
             config_name: 压缩配置文件名，用于获取压缩参数
             delete_audio: 是否删除视频中的音频轨道
             delete_source: 是否在压缩完成后删除源文件
+            threads: 分配给该文件的CPU线程数，为None时使用ffmpeg的默认线程数
+            telemetry: 所属任务的吞吐量统计，用于在进度消息中附带任务的速度和剩余时间
+
+        Returns:
+            TaskStatus: SUCCESS 表示压缩成功，SKIPPED 表示预检后跳过，
+                        DISCARDED 表示输出变大已被丢弃
 
         Raises:
-            ValueError: 当配置文件不存在或媒体信息读取错误时抛出
+            ValueError: 当配置文件不存在、媒体信息读取错误或输出文件校验失败时抛出
             subprocess.CalledProcessError: 当压缩命令执行失败时抛出
+
+        编码结果先写入输出目录中的临时文件，校验通过后才原子地替换到输出路径，
+        因此输出路径上的文件总是完整的；源文件只会在输出文件就位后删除。
         """
+        message_service = MessageService.get_instance()
         config_service = ConfigService.get_instance()
 
         # 读取配置
@@ -80,233 +240,1178 @@ class VideoService:
             raise ValueError(f"配置文件 {config_name} 不存在")
 
         # Generate output filename
-        output_path = file.output_path
-
-        commands = []
-
-        ffmpeg_path = meta.FFMPEG_PATH
-
-        # Get preset string
-        preset = config.x264.preset
-        input_file = file.file_path
-
-        if not delete_audio:
-            # Process with audio using single ffmpeg command
-            commands.append(
-                f'"{ffmpeg_path}" -y -i "{input_file}" '
-                + f"-c:v libx264 -crf {config.x264.crf} -preset {preset} "
-                + f"-keyint_min {config.x264.I} -g {config.x264.I} "
-                + f"-refs {config.x264.r} -bf {config.x264.b} "
-                + "-me_method umh -sc_threshold 60 -b_strategy 1 -qcomp 0.5 -psy-rd 0.3:0 "
-                + "-aq-mode 2 -aq-strength 0.8 "
-                + "-c:a aac -b:a 128k "
-                + "-movflags faststart "
-                + ("-hwaccel auto " if config.x264.opencl_acceleration else "")
-                + f'-map 0: "{output_path}"'
+        # 文件已暂存到本地时读写本地副本，输出由调用方上传
+        output_path = file.write_path
+
+        input_file = file.input_path
+
+        # 媒体信息在构造 Task 时读取，读取失败时为None
+        media = file.media_info
+
+        # 超过最大分辨率或帧率时在编码前缩小，已经在限制之内的视频不经过缩放
+        video_filter = scale_filter(media, config.scale)
+
+        # 预检：预计压缩收益不足时跳过，或者改为直接复制视频流
+        # 需要缩放的视频不能直接复制视频流，否则输出会超过限制
+        remux = config.remux == "force"
+        if not remux:
+            skip_reason = VideoService.analyze(file, config, delete_audio)
+            if (
+                skip_reason is not None
+                and video_filter is None
+                and VideoService._remux_pays_off(file, config, delete_audio)
+            ):
+                logging.info(f"{file.file_path}: {skip_reason}，改为直接复制视频流")
+                remux = True
+            elif skip_reason is not None:
+                logging.info(f"跳过文件 {file.file_path}: {skip_reason}")
+                message_service.send_message(
+                    CompressionSkippedMessage(file.file_path, skip_reason)
+                )
+                return TaskStatus.SKIPPED
+
+        # 自适应 CRF：按内容试编码后选择 CRF，只影响本文件
+        if not remux and config.adaptive.enabled:
+            crf = AdaptiveCrfService.get_instance().select_crf(
+                file, config, threads, VideoService._run_captured
             )
-        else:
-            # Process without audio using single ffmpeg command
-            commands.append(
-                f'"{ffmpeg_path}" -y -i "{input_file}" '
-                + f"-c:v libx264 -crf {config.x264.crf} -preset {preset} "
-                + f"-keyint_min {config.x264.I} -g {config.x264.I} "
-                + f"-refs {config.x264.r} -bf {config.x264.b} "
-                + "-me_method umh -sc_threshold 60 -b_strategy 1 -qcomp 0.5 -psy-rd 0.3:0 "
-                + "-aq-mode 2 -aq-strength 0.8 "
-                + "-an "
-                + "-movflags faststart "
-                + ("-hwaccel auto " if config.x264.opencl_acceleration else "")
-                + f'-map 0: "{output_path}"'
+            if crf is not None:
+                config = config.model_copy(
+                    update={"encoder": config.encoder.model_copy(update={"crf": crf})}
+                )
+
+        if video_filter is not None and not remux:
+            logging.info(f"{file.file_path}: 编码前缩放 {video_filter}")
+
+        # 每个文件使用独立的临时文件，并行压缩时互不干扰
+        temp_path = VideoService._create_temp_output(output_path)
+        try:
+            # 时长足够长的视频按关键帧切分后并行编码
+            segmented = False
+            if (
+                not remux
+                and config.target_size_mb is None
+                and config.segment_count > 1
+                and media is not None
+                and media.duration >= config.segment_min_duration
+            ):
+                VideoService._process_segmented(
+                    file=file,
+                    config=config,
+                    duration=media.duration,
+                    with_audio=media.has_audio and not delete_audio,
+                    threads=threads,
+                    output_path=temp_path,
+                    telemetry=telemetry,
+                    video_filter=video_filter,
+                )
+                segmented = True
+
+            # 目标体积模式：根据时长计算码率后两遍编码
+            if not segmented and not remux and config.target_size_mb is not None:
+                VideoService._process_two_pass(
+                    file=file,
+                    config=config,
+                    delete_audio=delete_audio,
+                    threads=threads,
+                    output_path=temp_path,
+                    telemetry=telemetry,
+                    video_filter=video_filter,
+                )
+            elif not segmented:
+                # 直接复制视频流时只需要改写容器和音频，通常几秒即可完成
+                command = encode_command(
+                    input_file,
+                    temp_path,
+                    config,
+                    delete_audio,
+                    threads,
+                    remux,
+                    video_filter=video_filter,
+                    media=media,
+                )
+
+                reporter = _ProgressReporter(file.file_path, telemetry=telemetry)
+                if media is not None and media.duration > 0:
+                    reporter.total = media.duration
+
+                def on_progress(record: FFmpegProgress, total_time: float):
+                    # 没有媒体信息时，使用从 ffmpeg 输出中解析的时长
+                    if reporter.total <= 0:
+                        reporter.total = total_time
+                    reporter.update(0, record)
+
+                VideoService._run_command(command, on_progress)
+
+            # 输出文件没有变小时丢弃输出，保留源文件
+            output_size = os.path.getsize(temp_path)
+            source_size = os.path.getsize(input_file)
+            if output_size >= source_size:
+                reason = f"压缩后体积 {output_size} 字节不小于源文件 {source_size} 字节，已丢弃输出"
+                logging.info(f"{file.file_path}: {reason}")
+                message_service.send_message(
+                    CompressionSkippedMessage(file.file_path, reason)
+                )
+                return TaskStatus.DISCARDED
+
+            VideoService._verify_output(temp_path, media)
+            VideoService._commit_output(temp_path, output_path)
+        finally:
+            VideoService._remove_temp_output(temp_path)
+
+        # 输出文件已经完整写入并通过校验，可以安全地删除源文件
+        if delete_source:
+            logging.debug(f"输出文件 {output_path} 已就位，删除源文件: {input_file}")
+            os.remove(input_file)
+
+        return TaskStatus.SUCCESS
+
+    @staticmethod
+    def _create_temp_output(output_path: str) -> str:
+        """
+        在输出文件所在的目录中创建唯一的临时输出文件
+
+        临时文件与输出文件位于同一文件系统，保证之后的重命名是原子操作。
+        同时会删除之前的运行被强制结束时遗留的、同一输出文件的临时文件。
+
+        Args:
+            output_path: 最终的输出文件路径
+
+        Returns:
+            str: 临时文件路径，文件名以 . 开头，扩展名与输出文件相同
+        """
+        directory = os.path.dirname(output_path) or "."
+        name, ext = os.path.splitext(os.path.basename(output_path))
+        prefix, suffix = f".{name}.", f".part{ext}"
+
+        with VideoService._process_lock:
+            try:
+                for entry in os.scandir(directory):
+                    if (
+                        entry.name.startswith(prefix)
+                        and entry.name.endswith(suffix)
+                        and entry.path not in VideoService._temp_files
+                    ):
+                        logging.info(f"删除遗留的临时文件: {entry.path}")
+                        os.remove(entry.path)
+            except OSError as e:
+                logging.warning(f"清理遗留的临时文件失败: {e}")
+
+            fd, temp_path = tempfile.mkstemp(
+                prefix=prefix, suffix=suffix, dir=directory
             )
+            os.close(fd)
+            VideoService._temp_files.add(temp_path)
+
+        return temp_path
+
+    @staticmethod
+    def _remove_temp_output(temp_path: str):
+        """
+        删除临时输出文件（如果仍然存在），并取消登记
+
+        Args:
+            temp_path: 临时文件路径
+        """
+        with VideoService._process_lock:
+            VideoService._temp_files.discard(temp_path)
+
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError as e:
+                logging.warning(f"删除临时文件 {temp_path} 失败: {e}")
 
-        # Execute commands
-        # total_commands = len(commands)
-        for index, command in enumerate(commands):
-            logging.info(f"执行命令: {command}")
-
-            # 使用Popen创建子进程并添加到running_process列表
-            process = subprocess.Popen(
-                command,
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # 合并stdout和stderr到stdout
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
+    @staticmethod
+    def _verify_output(output_path: str, media: Optional[MediaInfo]):
+        """
+        快速校验输出文件的完整性
+
+        读取输出文件的媒体信息，确认其包含视频流，且时长与源文件一致。
+        被截断的文件通常无法读取或时长明显偏短。
+
+        Args:
+            output_path: 输出文件路径
+            media: 源文件的媒体信息，为None时只检查输出文件能否读取
+
+        Raises:
+            ValueError: 当输出文件校验失败时抛出
+        """
+        try:
+            output = MediaInfo.from_ffprobe(MediaService.run_ffprobe(output_path))
+        except Exception as e:
+            raise ValueError(f"无法读取输出文件 {output_path}: {e}") from e
+
+        if output.video_stream is None:
+            raise ValueError(f"输出文件 {output_path} 中没有视频流")
+
+        if media is None or media.duration <= 0:
+            return
+
+        # 容许编码器在首尾帧上产生的少量时长差异
+        tolerance = max(1.0, media.duration * 0.01)
+        if abs(output.duration - media.duration) > tolerance:
+            raise ValueError(
+                f"输出文件时长 {output.duration:.2f}s 与源文件 "
+                f"{media.duration:.2f}s 不一致"
             )
-            VideoService.running_process.append(process)
 
-            # 等待进程完成，同时解析进度
-            cur_time: float = -0.01  # 当前视频播放时间
-            total_time: float = -1  # 视频总时长
-            update_time = time.time()  # 上次更新进度的时间
-            while process.poll() is None:
-                line = ""
-                try:
-                    stdout = process.stdout
-                    if not stdout:
-                        continue
+    @staticmethod
+    def _commit_output(temp_path: str, output_path: str):
+        """
+        将临时文件落盘并原子地替换到输出路径
+
+        Args:
+            temp_path: 已经校验通过的临时文件路径
+            output_path: 最终的输出文件路径
+        """
+        with open(temp_path, "rb") as f:
+            os.fsync(f.fileno())
 
-                    line = stdout.readline()
+        os.replace(temp_path, output_path)
 
-                    if not is_progress_line(line):
-                        if total_time == -1 and "Duration" in line:
-                            # 解析视频总时长
-                            total_time = resolve_time_str(
-                                line.split("Duration: ")[1].split(",")[0]
-                            )
-                            logging.debug(f"视频总时长: {total_time}")
+        # 同步目录项，保证重命名本身在断电后也不会丢失（Windows 不支持对目录 fsync）
+        if os.name != "nt":
+            fd = os.open(os.path.dirname(output_path) or ".", os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
 
-                        if line.strip() == "":
-                            continue
+    @staticmethod
+    def analyze(
+        file: VideoFile, config: ConfigModel, delete_audio: bool
+    ) -> Optional[str]:
+        """
+        压缩前的预检，根据媒体信息预测压缩收益
 
-                        logging.debug(f"{line.strip()}")
-                        continue
+        Args:
+            file: 视频文件对象
+            config: 压缩配置
+            delete_audio: 是否删除音频轨道
+
+        Returns:
+            Optional[str]: 需要跳过时返回原因，否则返回None；
+                           媒体信息不足以做出预测时总是返回None
+        """
+        media = file.media_info
+        if media is None or media.size <= 0:
+            return None
+
+        # 目标体积模式下输出大小是确定的，只需要源文件比目标大
+        if config.target_size_mb is not None:
+            target_size = int(config.target_size_mb * 1024 * 1024)
+            if media.size <= target_size:
+                return f"源文件 {media.size} 字节已经不大于目标体积 {target_size} 字节"
+            return None
+
+        # 缩小分辨率或帧率后需要编码的像素更少，输出也更小
+        encoder = create_encoder(config.encoder)
+        predicted_size = estimate_output_size(
+            scaled_media(media, config.scale),
+            encoder.x264_crf,
+            delete_audio,
+            encoder.codec_name,
+            output_audio_bit_rate(media, config.audio),
+        )
+        if predicted_size is None:
+            return None
+
+        savings = 1 - predicted_size / media.size
+        logging.debug(
+            f"{file.file_path}: 预计输出 {predicted_size} 字节，节省 {savings:.1%}"
+        )
+
+        if savings >= config.min_savings:
+            return None
+
+        codec = media.video_stream.codec_name if media.video_stream else "unknown"
+        bpp = bits_per_pixel(media)
+        bpp_str = f"{bpp:.3f} bpp" if bpp is not None else "未知码率"
+        return (
+            f"源文件已经足够高效（{codec}，{bpp_str}），"
+            f"预计只能节省 {savings:.0%}，低于阈值 {config.min_savings:.0%}"
+        )
+
+    @staticmethod
+    def _remux_pays_off(
+        file: VideoFile, config: ConfigModel, delete_audio: bool
+    ) -> bool:
+        """
+        判断在 auto 策略下直接复制视频流能否节省足够的体积
+
+        只在重新编码收益不足时调用，例如源文件已经是高效的 H.264，
+        但需要删除音频或音频码率较高。
+
+        Args:
+            file: 视频文件对象
+            config: 压缩配置
+            delete_audio: 是否删除音频轨道
+
+        Returns:
+            bool: 策略为 auto 且预计节省的体积比例不低于 min_savings 时返回True
+        """
+        media = file.media_info
+        if config.remux != "auto" or media is None or media.size <= 0:
+            return False
+
+        predicted_size = estimate_remux_size(
+            media, delete_audio, output_audio_bit_rate(media, config.audio)
+        )
+        if predicted_size is None:
+            return False
+
+        savings = 1 - predicted_size / media.size
+        logging.debug(
+            f"{file.file_path}: 复制视频流预计输出 {predicted_size} 字节，节省 {savings:.1%}"
+        )
+        return savings > 0 and savings >= config.min_savings
+
+    @staticmethod
+    def _process_two_pass(
+        file: VideoFile,
+        config: ConfigModel,
+        delete_audio: bool,
+        threads: Optional[int],
+        output_path: str,
+        telemetry: Optional[TaskTelemetry] = None,
+        video_filter: Optional[str] = None,
+    ):
+        """
+        按目标体积两遍编码单个视频
+
+        该方法会：
+        1. 根据媒体时长和音频码率计算达到目标体积所需的视频码率
+        2. 第一遍只分析视频，把统计信息写入该文件独有的临时目录
+        3. 第二遍按照统计信息分配码率，输出视频和音频
+        两遍的进度作为同一个进度条汇报，结束后删除统计文件。
+
+        Args:
+            file: 视频文件对象
+            config: 压缩配置，target_size_mb 不能为None
+            delete_audio: 是否删除音频轨道
+            threads: 分配给该文件的CPU线程数
+            output_path: 输出路径
+            telemetry: 所属任务的吞吐量统计
+            video_filter: 编码前应用于视频流的滤镜，两遍使用相同的滤镜
 
-                    # 解析当前播放时间
-                    cur_time = resolve_time_str(line.split("time=")[1].split(" ")[0])
-
-                    # 发送进度
-                    if update_time < time.time() - 1:
-                        update_time = time.time()
-                        MessageService.get_instance().send_message(
-                            CompressionCurrentProgressMessage(
-                                file_name=file.file_path,
-                                current=cur_time,
-                                total=total_time,
-                            )
+        Raises:
+            ValueError: 当没有媒体信息或目标体积过小时抛出
+            subprocess.CalledProcessError: 当任一命令执行失败时抛出
+        """
+        assert config.target_size_mb is not None
+
+        media = file.media_info
+        if media is None:
+            raise ValueError("目标体积模式需要读取媒体信息，但读取失败")
+
+        target_size = int(config.target_size_mb * 1024 * 1024)
+        audio_bit_rate = (
+            0 if delete_audio else output_audio_bit_rate(media, config.audio)
+        )
+        bit_rate = target_video_bit_rate(target_size, media.duration, audio_bit_rate)
+        logging.info(
+            f"{file.file_path}: 目标体积 {target_size} 字节，视频码率 {bit_rate // 1000} kbps"
+        )
+
+        # 统计文件放在每个文件独有的临时目录中，并行压缩时互不干扰
+        stats_dir = tempfile.mkdtemp(prefix="videoslim_passlog_")
+        try:
+            reporter = _ProgressReporter(
+                file.file_path,
+                media.duration,
+                telemetry,
+                passes=2,
+                expected_size=target_size,
+            )
+
+            for pass_num in (1, 2):
+                settings = PassSettings(
+                    bit_rate=bit_rate // 1000,
+                    pass_num=pass_num,
+                    stats_path=os.path.join(stats_dir, "passlog"),
+                )
+                if pass_num == 1:
+                    command = first_pass_command(
+                        file.input_path, config, settings, threads, video_filter
+                    )
+                else:
+                    command = encode_command(
+                        file.input_path,
+                        output_path,
+                        config,
+                        delete_audio,
+                        threads,
+                        two_pass=settings,
+                        video_filter=video_filter,
+                        media=media,
+                    )
+
+                VideoService._run_command(
+                    command,
+                    lambda record, _, part=pass_num - 1: reporter.update(part, record),
+                )
+        finally:
+            shutil.rmtree(stats_dir, ignore_errors=True)
+
+    @staticmethod
+    def _process_segmented(
+        file: VideoFile,
+        config: ConfigModel,
+        duration: float,
+        with_audio: bool,
+        threads: Optional[int],
+        output_path: str,
+        telemetry: Optional[TaskTelemetry] = None,
+        video_filter: Optional[str] = None,
+    ):
+        """
+        分段并行压缩单个长视频
+
+        该方法会：
+        1. 在关键帧处把视频流无损切分为 segment_count 段
+        2. 使用相同的编码参数并行编码每一段，同时单独编码整段音频
+        3. 使用 concat demuxer 无损拼接各段视频，并合入音频
+
+        Args:
+            file: 视频文件对象
+            config: 压缩配置
+            duration: 视频总时长（秒）
+            with_audio: 输出是否包含音频
+            threads: 分配给该文件的CPU线程数，会在各段之间平分
+            output_path: 拼接结果的输出路径
+            telemetry: 所属任务的吞吐量统计
+            video_filter: 编码前应用于每一段视频的滤镜
+
+        Raises:
+            subprocess.CalledProcessError: 当任一命令执行失败时抛出
+        """
+        input_file = file.input_path
+        segment_count = config.segment_count
+
+        # 临时目录与输出文件位于同一文件系统
+        work_dir = tempfile.mkdtemp(
+            prefix=f".{file.filename}_segments_",
+            dir=os.path.dirname(output_path) or None,
+        )
+        try:
+            # 1. 按关键帧无损切分视频流
+            logging.info(f"将 {input_file} 切分为 {segment_count} 段并行编码")
+            VideoService._run_command(
+                split_command(
+                    input_file,
+                    duration / segment_count,
+                    os.path.join(work_dir, "part_%03d.mkv"),
+                )
+            )
+            parts = sorted(
+                name for name in os.listdir(work_dir) if name.startswith("part_")
+            )
+
+            # 2. 并行编码各段视频和整段音频
+            segment_threads = (
+                max(1, threads // len(parts)) if threads is not None else None
+            )
+            reporter = _ProgressReporter(file.file_path, duration, telemetry)
+
+            def encode_part(index: int, name: str):
+                VideoService._run_command(
+                    segment_encode_command(
+                        os.path.join(work_dir, name),
+                        os.path.join(work_dir, "enc_" + name),
+                        config,
+                        segment_threads,
+                        video_filter,
+                    ),
+                    lambda record, _: reporter.update(index, record),
+                )
+
+            # 复制的音频流可能是任意编码格式，中间文件使用 mka 容器
+            audio_path = os.path.join(work_dir, "audio.mka")
+            with ThreadPoolExecutor(max_workers=len(parts) + 1) as executor:
+                futures = [
+                    executor.submit(encode_part, index, name)
+                    for index, name in enumerate(parts)
+                ]
+                if with_audio:
+                    futures.append(
+                        executor.submit(
+                            VideoService._run_command,
+                            audio_command(
+                                input_file, audio_path, config, file.media_info
+                            ),
                         )
+                    )
+                for future in futures:
+                    future.result()
 
+            # 3. 无损拼接
+            list_path = os.path.join(work_dir, "concat.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for name in parts:
+                    escaped = os.path.join(work_dir, "enc_" + name).replace(
+                        "'", "'\\''"
+                    )
+                    f.write(f"file '{escaped}'\n")
+
+            VideoService._run_command(
+                concat_command(
+                    list_path, audio_path if with_audio else None, output_path
+                )
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _run_command(
+        command: list[str],
+        on_progress: Optional[Callable[[FFmpegProgress, float], None]] = None,
+    ):
+        """
+        执行一条 ffmpeg 命令并等待其结束，同时解析输出中的进度
+
+        进度由独立的读取线程从 stdout 中解析，当前线程阻塞等待进度记录，
+        子进程没有输出时不会空转；stderr 由另一个线程读取并记录到日志。
+
+        Args:
+            command: 要执行的命令的参数列表，由 src.model.command 中的函数生成
+            on_progress: 进度回调，参数为进度记录和输入总时长（秒，未知时为-1）
+
+        Raises:
+            subprocess.CalledProcessError: 当命令执行失败时抛出
+        """
+        logging.info(f"执行命令: {subprocess.list2cmdline(command)}")
+
+        # 使用Popen创建子进程并添加到running_process列表
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            creationflags=get_creationflags(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        VideoService._register_process(process)
+
+        records: Queue[Optional[FFmpegProgress]] = Queue()
+        stderr_tail: deque[str] = deque(maxlen=20)
+        total_time: list[float] = [-1]  # 视频总时长，由 stderr 读取线程解析
+
+        def read_progress():
+            parser = ProgressParser()
+            try:
+                for raw_line in iter(process.stdout.readline, b""):  # type: ignore[union-attr]
+                    record = parser.feed(raw_line.decode("utf-8", errors="replace"))
+                    if record is not None:
+                        records.put(record)
+            finally:
+                records.put(None)
+
+        def read_stderr():
+            for raw_line in iter(process.stderr.readline, b""):  # type: ignore[union-attr]
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if not line:
+                    continue
+
+                if total_time[0] == -1 and "Duration: " in line:
+                    # 没有媒体信息时，使用 ffmpeg 输出的时长
+                    try:
+                        total_time[0] = resolve_time_str(
+                            line.split("Duration: ")[1].split(",")[0]
+                        )
+                    except ValueError:
+                        pass
+
+                logging.debug(line)
+                stderr_tail.append(line)
+
+        readers = [
+            threading.Thread(target=read_progress, daemon=True),
+            threading.Thread(target=read_stderr, daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        # 等待进度记录，读取线程在 stdout 关闭后发送 None
+        while (record := records.get()) is not None:
+            if on_progress is not None:
+                try:
+                    on_progress(record, total_time[0])
                 except Exception as e:
-                    logging.error(f"读取 stdout 时出错:  {e} 输出: {line.strip()}")
+                    logging.error(f"处理进度时出错: {e}")
+
+        process.wait()
+        for reader in readers:
+            reader.join()
 
+        # 从running_process列表中移除已完成的进程
+        VideoService._unregister_process(process)
+
+        # Check return code
+        if process.returncode != 0:
+            logging.error(f"命令执行失败，退出码: {process.returncode}")
+            if stderr_tail:
+                logging.warning(f"command stderr: {chr(10).join(stderr_tail)}")
+            raise subprocess.CalledProcessError(process.returncode, command)
+
+    @staticmethod
+    def _run_captured(command: list[str]) -> subprocess.CompletedProcess[str]:
+        """
+        执行一条命令并等待其结束，捕获全部文本输出
+
+        用于自适应 CRF 的截取、试编码和画质计算等不需要进度的短命令。
+        子进程会登记到running_process中，停止压缩时可以被终止。
+
+        Args:
+            command: 要执行的命令的参数列表
+
+        Returns:
+            subprocess.CompletedProcess[str]: 执行结果，包含 stdout 和 stderr
+
+        Raises:
+            subprocess.CalledProcessError: 当命令执行失败或被终止时抛出
+        """
+        logging.debug(f"执行命令: {subprocess.list2cmdline(command)}")
+
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            creationflags=get_creationflags(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+        )
+        VideoService._register_process(process)
+        try:
             stdout, stderr = process.communicate()
+        finally:
+            VideoService._unregister_process(process)
 
-            # 从running_process列表中移除已完成的进程
-            if process in VideoService.running_process:
-                VideoService.running_process.remove(process)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(
+                process.returncode, command, stdout, stderr
+            )
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    @staticmethod
+    def create_task(info: TaskInfo, batch: Optional[JobBatch] = None) -> Task:
+        """
+        创建使用持久化任务队列的压缩任务
+
+        Args:
+            info: 任务配置信息
+            batch: 要恢复的被中断的批次，为None时创建新的批次
+
+        Returns:
+            Task: 压缩任务
+
+        该方法会：
+        1. 根据任务台账略过之前已经使用相同参数处理完成的文件
+        2. 在任务队列中创建批次（或沿用被中断的批次）
+        3. 被恢复的批次已经扫描完成时，只处理队列中剩余的文件，不再重新扫描
+        """
+        jobs = StoreService.get_instance().get_job_queue()
+        ledger = StoreService.get_instance().get_ledger()
 
-            # Log command output
-            if stdout:
-                logging.debug(f"command stdout: {stdout.strip()}")
-            if stderr:
-                logging.warning(f"command stderr: {stderr.strip()}")
+        config = ConfigService.get_instance().get_config(info.process_config_name)
+        is_completed = None
+        if config is not None:
+            config_hash = job_config_hash(config, info.delete_audio)
+            is_completed = partial(ledger.is_completed, config_hash=config_hash)
 
-            # Check return code
-            if process.returncode != 0:
-                logging.error(f"命令执行失败，退出码: {process.returncode}")
-                raise subprocess.CalledProcessError(process.returncode, command)
+        batch_id = batch.id if batch is not None else jobs.create_batch(info)
+        source = None
+        if batch is not None and batch.scan_finished:
+            source = jobs.iter_pending(batch.id)
 
-        # Delete source if requested
-        if delete_source and os.path.exists(output_path):
-            logging.debug(f"存在输出文件：{output_path}，删除源文件: {file.file_path}")
-            os.remove(file.file_path)
+        task = Task(
+            info=info,
+            probe=MediaService.get_instance().probe,
+            is_completed=is_completed,
+            source=source,
+            enqueue=partial(jobs.enqueue, batch_id),
+            on_scan_finished=partial(jobs.finish_scan, batch_id),
+            encoder=create_encoder(config.encoder) if config is not None else None,
+        )
+        task.batch_id = batch_id
+        return task
 
     @timer
     @staticmethod
     def process_task(task: Task):
         """
-        处理视频压缩任务，支持批量处理多个视频文件
+        处理视频压缩任务，支持批量并行处理多个视频文件
 
         Args:
             task: 视频处理任务对象，包含待处理文件列表和处理配置
 
         该方法会：
-        1. 发送任务开始消息
-        2. 遍历处理任务中的每个视频文件
-        3. 发送当前文件处理进度消息
-        4. 调用process_single_file处理单个文件
-        5. 处理可能出现的异常并发送错误消息
-        6. 发送任务完成消息
+        1. 发送任务开始消息，并启动任务的文件扫描
+        2. 启动 max_parallel_jobs 个工作线程，边扫描边从任务队列中领取视频文件
+        3. 每个工作线程调用process_single_file处理单个文件，并发送各自的进度消息
+        4. 处理可能出现的异常并发送错误消息
+        5. 所有工作线程结束后保存任务的吞吐量指标，并发送任务完成消息
         """
         message_service = MessageService.get_instance()
 
         logging.info(f"process task: {task.info}")
 
-        logging.debug(f"process task sequence: {task.video_sequence}")
+        # 处理完成的文件会记录到台账，再次运行时略过
+        ledger = StoreService.get_instance().get_ledger()
+        jobs = StoreService.get_instance().get_job_queue()
+        config = ConfigService.get_instance().get_config(task.info.process_config_name)
+        config_hash = (
+            job_config_hash(config, task.info.delete_audio) if config else None
+        )
 
-        if task.files_num == 0:
-            message_service.send_message(
-                CompressionErrorMessage("错误", "没有找到可处理的视频文件")
-            )
-            return
+        max_parallel_jobs = (
+            task.info.max_parallel_jobs
+            or ConfigService.get_instance().configs_model.max_parallel_jobs
+        )
+        workers_num = max_parallel_jobs
+        logging.info(f"使用 {workers_num} 个工作线程并行处理")
+
+        # 只有一个工作线程时不限制线程数，编码器自动选择的线程数（x264 约为核心数的
+        # 1.5 倍）比按核心数固定分配更快
+        budget: Optional[ThreadBudget] = None
+        if ConfigService.get_instance().configs_model.thread_budget and workers_num > 1:
+            budget = ThreadBudget(get_cpu_count(), workers_num)
+            logging.info(f"可分配的CPU线程数: {budget.total_threads}")
+
+        telemetry = TaskTelemetry(workers_num, lambda: task.found_duration)
+
+        VideoService._stop_event.clear()
+
+        with VideoService._process_lock:
+            VideoService.running_tasks.append(task)
 
         message_service.send_message(CompressionStartMessage(task.files_num))
 
-        # Process each file
-        for index, video_file in enumerate(task.video_sequence, 1):
-            logging.debug(
-                f"process file: {video_file.file_path}, index: {index}, total: {task.files_num}"
+        # 工作线程共享的文件队列和完成计数
+        # 领取文件时可能需要等待扫描，因此与计数使用不同的锁
+        pending = iter(task)
+        staging = VideoService._create_staging_area()
+        if staging is not None:
+            pending = staging.prefetch(pending)
+        pending_lock = threading.Lock()
+        state_lock = threading.Lock()
+        started_num = 0
+        finished_num = 0
+        skipped_num = 0
+        discarded_num = 0
+
+        def finish_file(
+            video_file: VideoFile,
+            status: TaskStatus,
+            input_fingerprint: Optional[str],
+            input_size: int,
+            start_time: float,
+        ):
+            """
+            记录单个文件的处理结果，并发送总进度消息
+            """
+            nonlocal finished_num, skipped_num, discarded_num
+
+            telemetry.finish_file(
+                VideoService._file_metrics(
+                    video_file, status, input_size, time.time() - start_time
+                )
             )
 
-            # Notify start of processing
+            if status != TaskStatus.FAILED and config_hash is not None:
+                try:
+                    ledger.record(
+                        video_file.file_path,
+                        input_fingerprint,
+                        config_hash,
+                        status,
+                        video_file.output_path,
+                    )
+                except OSError as e:
+                    logging.warning(f"写入任务台账失败: {e}")
+
+            if video_file.job_id is not None:
+                jobs.complete(video_file.job_id, status)
+
+            with state_lock:
+                finished_num += 1
+                current = finished_num
+                if status == TaskStatus.SKIPPED:
+                    skipped_num += 1
+                elif status == TaskStatus.DISCARDED:
+                    discarded_num += 1
+
             message_service.send_message(
                 CompressionTotalProgressMessage(
-                    index - 1,
+                    current,
                     task.files_num,
                     video_file.file_path,
+                    task.is_scan_finished,
                 )
             )
 
+        def on_uploaded(
+            video_file: VideoFile,
+            input_fingerprint: Optional[str],
+            input_size: int,
+            start_time: float,
+            error: Optional[Exception],
+        ):
+            """
+            暂存文件的输出上传结束后调用，在上传线程中执行
+            """
+            status = TaskStatus.SUCCESS
             try:
-                VideoService.clean_temp_files()
-                VideoService.process_single_file(
-                    file=video_file,
-                    config_name=task.info.process_config_name,
-                    delete_audio=task.info.delete_audio,
-                    delete_source=task.info.delete_source,
-                )
+                if error is not None:
+                    raise error
+
+                # 输出文件已经上传到位，可以安全地删除源文件
+                if task.info.delete_source:
+                    logging.debug(
+                        f"输出文件 {video_file.output_path} 已就位，"
+                        f"删除源文件: {video_file.file_path}"
+                    )
+                    os.remove(video_file.file_path)
             except Exception as e:
-                logging.error(f"处理文件 {video_file.file_path} 失败: {e}")
+                if VideoService._stop_event.is_set():
+                    logging.info(f"文件 {video_file.file_path} 的上传已被取消")
+                    if video_file.job_id is not None:
+                        jobs.release(video_file.job_id)
+                    return
+
+                status = TaskStatus.FAILED
+                logging.error(f"上传文件 {video_file.output_path} 失败: {e}")
                 message_service.send_message(
                     CompressionErrorMessage(
-                        "错误", f"处理文件 {video_file.file_path} 失败: {e}"
+                        "错误", f"上传文件 {video_file.output_path} 失败: {e}"
                     )
                 )
-            finally:
-                VideoService.clean_temp_files()
+
+            finish_file(video_file, status, input_fingerprint, input_size, start_time)
+
+        def worker():
+            nonlocal started_num, finished_num, skipped_num
+
+            while not VideoService._stop_event.is_set():
+                with pending_lock:
+                    video_file = next(pending, None)
+
+                if video_file is None:
+                    return
+
+                # 任务已经被其他地方领取或处理过时略过
+                if video_file.job_id is not None and not jobs.claim(video_file.job_id):
+                    logging.info(f"文件 {video_file.file_path} 已被处理, 已被略过")
+                    if staging is not None:
+                        staging.release(video_file)
+                    with state_lock:
+                        started_num += 1
+                        finished_num += 1
+                        skipped_num += 1
+                        current = finished_num
+
+                    message_service.send_message(
+                        CompressionSkippedMessage(video_file.file_path, "文件已被处理")
+                    )
+                    message_service.send_message(
+                        CompressionTotalProgressMessage(
+                            current,
+                            task.files_num,
+                            video_file.file_path,
+                            task.is_scan_finished,
+                        )
+                    )
+                    continue
+
+                with state_lock:
+                    # 扫描完成前无法知道剩余文件数，假设所有槽位都会被占用
+                    if task.is_scan_finished:
+                        queued_num = task.files_num - started_num
+                    else:
+                        queued_num = workers_num
+                    started_num += 1
+                    current = finished_num
+
+                threads = budget.acquire(queued_num) if budget else None
+
+                logging.debug(
+                    f"process file: {video_file.file_path}, "
+                    f"finished: {current}, total: {task.files_num}"
+                )
+
+                # Notify start of processing
+                message_service.send_message(
+                    CompressionTotalProgressMessage(
+                        current,
+                        task.files_num,
+                        video_file.file_path,
+                        task.is_scan_finished,
+                    )
+                )
+
+                # 暂存的文件在输出上传完成后才删除源文件
+                staged = video_file.staged_path is not None
+
+                status = TaskStatus.FAILED
+                input_fingerprint = file_fingerprint(video_file.file_path)
+                input_size = _file_size(video_file.file_path)
+                start_time = time.time()
+                try:
+                    status = VideoService.process_single_file(
+                        file=video_file,
+                        config_name=task.info.process_config_name,
+                        delete_audio=task.info.delete_audio,
+                        delete_source=task.info.delete_source and not staged,
+                        threads=threads,
+                        telemetry=telemetry,
+                    )
+                except Exception as e:
+                    if VideoService._stop_event.is_set():
+                        logging.info(f"文件 {video_file.file_path} 的处理已被取消")
+                        if staging is not None:
+                            staging.release(video_file)
+                        if video_file.job_id is not None:
+                            jobs.release(video_file.job_id)
+                        return
+
+                    logging.error(f"处理文件 {video_file.file_path} 失败: {e}")
+                    message_service.send_message(
+                        CompressionErrorMessage(
+                            "错误", f"处理文件 {video_file.file_path} 失败: {e}"
+                        )
+                    )
+                finally:
+                    if budget and threads is not None:
+                        budget.release(threads)
+
+                # 上传在后台进行，当前线程继续压缩下一个文件
+                if staging is not None and staged:
+                    if status == TaskStatus.SUCCESS:
+                        staging.upload(
+                            video_file,
+                            partial(
+                                on_uploaded,
+                                video_file,
+                                input_fingerprint,
+                                input_size,
+                                start_time,
+                            ),
+                        )
+                        continue
+                    staging.release(video_file)
+
+                finish_file(
+                    video_file, status, input_fingerprint, input_size, start_time
+                )
+
+        workers = [
+            threading.Thread(target=worker, name=f"VideoWorker-{i}")
+            for i in range(workers_num)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        # 等待剩余的上传完成，并删除暂存目录
+        if staging is not None:
+            staging.close()
+
+        task.cancel()
+        with VideoService._process_lock:
+            VideoService.running_tasks.remove(task)
+
+        MediaService.get_instance().dump()
+        AdaptiveCrfService.get_instance().dump()
+        VideoService._save_metrics(telemetry)
+
+        if VideoService._stop_event.is_set():
+            logging.info(f"任务已停止，已完成 {finished_num}/{task.files_num} 个文件")
+            return
+
+        # 批次已经全部处理完成，不再需要恢复
+        if task.batch_id is not None:
+            jobs.close_batch(task.batch_id)
+
+        if task.files_num == 0 and task.completed_num == 0:
+            message_service.send_message(
+                CompressionErrorMessage("错误", "没有找到可处理的视频文件")
+            )
+            return
+
+        # 之前已经处理完成的文件也计入跳过的数量
+        skipped_num += task.completed_num
+        total_num = task.files_num + task.completed_num
+
+        logging.info(
+            f"任务完成，共 {total_num} 个文件，"
+            f"跳过 {skipped_num} 个，丢弃输出 {discarded_num} 个"
+        )
 
         # Signal completion
         message_service.send_message(
-            CompressionFinishedMessage(len(task.video_sequence))
+            CompressionFinishedMessage(total_num, skipped_num, discarded_num)
         )
 
+    @staticmethod
+    def _create_staging_area() -> Optional[StagingArea]:
+        """
+        根据配置创建本地暂存区
+
+        Returns:
+            Optional[StagingArea]: 暂存区，未启用或暂存目录无法创建时返回None
+        """
+        staging_config = ConfigService.get_instance().configs_model.staging
+        if not staging_config.enabled:
+            return None
+
+        try:
+            staging = StagingArea(
+                directory=staging_config.directory,
+                max_bytes=int(staging_config.max_size_gb * 1024**3),
+                prefetch_count=staging_config.prefetch_count,
+                upload_workers=staging_config.upload_workers,
+                stop_event=VideoService._stop_event,
+            )
+        except OSError as e:
+            logging.warning(f"创建暂存目录失败，直接读写源文件所在的目录: {e}")
+            return None
+
+        logging.info(f"使用本地暂存目录: {staging.directory}")
+        return staging
+
+    @staticmethod
+    def _file_metrics(
+        file: VideoFile, status: TaskStatus, input_size: int, wall_time: float
+    ) -> FileMetrics:
+        """
+        生成单个文件的压缩指标
+
+        Args:
+            file: 处理完成的视频文件
+            status: 处理结果
+            input_size: 处理前的源文件大小（字节）
+            wall_time: 处理耗时（秒）
+
+        Returns:
+            FileMetrics: 文件的压缩指标
+        """
+        media = file.media_info
+        duration = media.duration if media else 0.0
+
+        metrics = FileMetrics(
+            file_name=file.file_path,
+            status=status,
+            duration=duration,
+            input_size=input_size,
+            wall_time=wall_time,
+        )
+
+        if status == TaskStatus.SUCCESS:
+            metrics.output_size = _file_size(file.output_path)
+            if duration > 0 and wall_time > 0:
+                metrics.speed = duration / wall_time
+                stream = media.video_stream if media else None
+                if stream and stream.fps:
+                    metrics.fps = duration * stream.fps / wall_time
+
+        return metrics
+
+    @staticmethod
+    def _save_metrics(telemetry: TaskTelemetry):
+        """
+        将任务的吞吐量指标保存到指标目录，文件名包含任务结束的时间
+
+        Args:
+            telemetry: 任务的吞吐量统计
+        """
+        metrics = telemetry.to_metrics()
+        if not metrics.files:
+            return
+
+        speed = f"{metrics.speed:.2f}x" if metrics.speed else "未知"
+        logging.info(
+            f"任务耗时 {metrics.wall_time:.1f}s，处理 {len(metrics.files)} 个文件，"
+            f"媒体时长 {metrics.total_duration:.1f}s，平均速度 {speed}"
+        )
+
+        path = os.path.join(
+            meta.METRICS_DIR, f"task_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        try:
+            os.makedirs(meta.METRICS_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(metrics.model_dump_json(indent=4))
+        except OSError as e:
+            logging.warning(f"保存任务指标失败: {e}")
+
+    @staticmethod
+    def _register_process(process: subprocess.Popen):
+        """
+        登记正在运行的子进程
+
+        如果此时已经收到停止信号，则立即终止该进程，避免与stop_process产生竞争。
+
+        Args:
+            process: 新创建的子进程
+        """
+        with VideoService._process_lock:
+            VideoService.running_process.append(process)
+
+        if VideoService._stop_event.is_set():
+            logging.debug(f"已收到停止信号，终止新启动的进程: {process.pid}")
+            process.terminate()
+
+    @staticmethod
+    def _unregister_process(process: subprocess.Popen):
+        """
+        移除已经结束的子进程
+
+        Args:
+            process: 已结束的子进程
+        """
+        with VideoService._process_lock:
+            if process in VideoService.running_process:
+                VideoService.running_process.remove(process)
+
     @staticmethod
     def clean_temp_files():
         """
         清理视频处理过程中生成的临时文件
 
-        该方法会遍历meta.TEMP_FILES中定义的所有临时文件路径，
-        并删除存在的临时文件。如果删除失败，会记录警告日志但不会抛出异常。
+        该方法会删除所有正在写入的临时输出文件，通常在停止处理后调用。
+        如果删除失败，会记录警告日志但不会抛出异常。
 
         Returns:
             None
         """
-        for temp_file in meta.TEMP_FILES:
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except Exception as e:
-                    logging.warning(f"删除临时文件 {temp_file} 失败: {e}")
+        with VideoService._process_lock:
+            temp_files = list(VideoService._temp_files)
+
+        for temp_file in temp_files:
+            VideoService._remove_temp_output(temp_file)
 
     @staticmethod
     def stop_process():
         """
         停止当前正在运行的视频处理进程
 
-        该方法会终止running_process中存储的子进程，
-        并等待其退出。如果进程未运行或已退出，
-        则不执行任何操作。
+        该方法会先设置停止信号并取消正在执行的任务，使排队中的文件不再开始处理，
+        然后终止running_process中存储的子进程，并等待其退出。
+        如果进程未运行或已退出，则不执行任何操作。
 
         Returns:
             None
         """
-        logging.info(
-            f"正在停止所有视频处理进程，共 {len(VideoService.running_process)} 个进程"
-        )
+        VideoService._stop_event.set()
 
         # 创建进程列表的副本，避免在遍历过程中修改原列表
-        processes_to_stop = list(VideoService.running_process)
+        with VideoService._process_lock:
+            processes_to_stop = list(VideoService.running_process)
+            for task in VideoService.running_tasks:
+                task.cancel()
+
+        logging.info(f"正在停止所有视频处理进程，共 {len(processes_to_stop)} 个进程")
 
         for process in processes_to_stop:
             try:
@@ -334,9 +1439,20 @@ class VideoService:
                 logging.error(f"处理进程 {process.pid} 时发生错误: {e}")
 
         # 清空进程列表
-        VideoService.running_process.clear()
+        with VideoService._process_lock:
+            VideoService.running_process.clear()
         logging.info("所有视频处理进程已停止")
 
+    @staticmethod
+    def is_stopped() -> bool:
+        """
+        检查是否已经收到停止信号
+
+        Returns:
+            bool: 调用stop_process之后、下一个任务开始之前返回True
+        """
+        return VideoService._stop_event.is_set()
+
     @staticmethod
     def is_processing() -> bool:
         """
@@ -345,4 +1461,21 @@ class VideoService:
         Returns:
             bool: 如果有正在运行的进程则返回True，否则返回False
         """
-        return len(VideoService.running_process) > 0
+        with VideoService._process_lock:
+            return len(VideoService.running_process) > 0
+
+
+def _file_size(path: str) -> int:
+    """
+    获取文件大小，文件不存在时返回0
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        int: 文件大小（字节）
+    """
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,162 @@
+import logging
+import threading
+from functools import partial
+from typing import Callable, Iterator, Optional
+
+from src import meta
+from src.model.encoder import create_encoder
+from src.model.ledger import job_config_hash
+from src.model.video import Task, TaskInfo
+from src.model.watch import IWatcher, StabilityTracker, WatchQueue, create_watcher
+from src.service.config import ConfigService
+from src.service.media import MediaService
+from src.service.store import StoreService
+from src.service.video import VideoService
+
+
+class WatchService:
+    """
+    监视服务类，持续监视目录并压缩其中新出现的视频文件
+
+    该类采用单例模式实现。监视线程把大小和修改时间已经稳定的新文件放入
+    持久化队列，压缩任务从队列中领取文件，直到监视被停止。
+    已经在队列中或已经处理完成（根据任务台账）的文件不会重复加入。
+    """
+
+    _instance: Optional["WatchService"] = None
+
+    def __init__(self) -> None:
+        """
+        初始化监视服务实例
+
+        Raises:
+            ValueError: 当尝试创建多个WatchService实例时抛出
+        """
+        if WatchService._instance is not None:
+            raise ValueError("WatchService already initialized")
+
+        self.queue = WatchQueue(meta.WATCH_QUEUE_PATH)
+        self.queue.open()
+
+        self._stop_event = threading.Event()
+
+        WatchService._instance = self
+
+    @staticmethod
+    def get_instance() -> "WatchService":
+        """
+        获取监视服务的单例实例
+
+        Returns:
+            WatchService: 监视服务的单例实例
+
+        该方法采用懒加载模式，只有在第一次调用时才会创建WatchService实例。
+        """
+        if WatchService._instance is None:
+            WatchService._instance = WatchService()
+
+        return WatchService._instance
+
+    def run(self, info: TaskInfo):
+        """
+        监视任务目标中的目录并压缩新文件，直到调用stop
+
+        Args:
+            info: 任务配置信息，targets 为监视的目录列表
+
+        该方法会：
+        1. 在后台线程中监视目录，把稳定的新文件放入队列
+        2. 创建以队列为文件来源的压缩任务，并调用VideoService.process_task处理
+        3. 停止后等待监视线程结束
+        """
+        watch_config = ConfigService.get_instance().configs_model.watch
+
+        ledger = StoreService.get_instance().get_ledger()
+        config = ConfigService.get_instance().get_config(info.process_config_name)
+        is_completed = None
+        if config is not None:
+            config_hash = job_config_hash(config, info.delete_audio)
+            is_completed = partial(ledger.is_completed, config_hash=config_hash)
+
+        watcher = create_watcher(
+            watch_config.backend,
+            info.targets,
+            info.recursive,
+            watch_config.poll_interval,
+        )
+        logging.info(f"开始监视目录 {info.targets}，监视方式: {type(watcher).__name__}")
+
+        self._stop_event.clear()
+        watch_thread = threading.Thread(
+            target=self._watch,
+            args=(watcher, StabilityTracker(watch_config.stable_seconds), is_completed),
+            name="DirectoryWatcher",
+            daemon=True,
+        )
+        watch_thread.start()
+
+        try:
+            task = Task(
+                info=info,
+                probe=MediaService.get_instance().probe,
+                is_completed=is_completed,
+                # 文件留在持久化队列中，直到压缩线程空闲时才领取
+                queue_size=1,
+                source=self._iter_queue(),
+                encoder=create_encoder(config.encoder) if config is not None else None,
+            )
+            VideoService.process_task(task)
+        finally:
+            self._stop_event.set()
+            watch_thread.join()
+            logging.info("已停止监视目录")
+
+    def stop(self):
+        """
+        停止监视，正在压缩的文件不受影响
+        """
+        self._stop_event.set()
+
+    def _watch(
+        self,
+        watcher: IWatcher,
+        tracker: StabilityTracker,
+        is_completed: Optional[Callable[[str], bool]],
+    ):
+        """
+        监视线程的入口
+
+        Args:
+            watcher: 目录监视器
+            tracker: 文件稳定性跟踪器
+            is_completed: 判断文件是否已经处理完成的函数，为None时不检查
+        """
+        try:
+            while not self._stop_event.is_set():
+                for path in watcher.wait_changes(timeout=1.0):
+                    tracker.observe(path)
+
+                for path in tracker.pop_stable():
+                    if path in self.queue:
+                        continue
+                    if is_completed is not None and is_completed(path):
+                        continue
+                    logging.info(f"发现新文件: {path}")
+                    self.queue.put(path)
+        except Exception as e:
+            logging.error(f"监视目录时出错: {e}")
+            self._stop_event.set()
+        finally:
+            watcher.close()
+
+    def _iter_queue(self) -> Iterator[str]:
+        """
+        从队列中依次领取文件，停止监视后结束
+
+        Yields:
+            str: 待处理的文件路径
+        """
+        while not self._stop_event.is_set():
+            path = self.queue.get(timeout=0.5)
+            if path is not None:
+                yield path
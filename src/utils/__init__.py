@@ -1,43 +1,94 @@
 import logging
+import math
 import os
+import subprocess
 import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from functools import wraps
+from typing import Iterator, Optional
 
 
-def scan_directory(
-    directory: str, extensions: list[str]
-) -> tuple[list[str], list[str]]:
+def iter_directory(
+    directory: str, extensions: list[str], max_workers: int = 1
+) -> Iterator[os.DirEntry]:
     """
-    递归扫描指定目录，返回子文件夹列表和符合指定扩展名的文件列表
+    迭代扫描指定目录及其所有子目录，逐个返回符合指定扩展名的文件
+
+    与一次性构建完整列表不同，该函数在找到文件时立即返回，调用方可以在扫描
+    完成之前开始处理文件。返回的 DirEntry 携带了扫描时得到的文件类型信息，
+    调用方无需再次访问文件系统确认其为文件。
 
     Args:
         directory: 要扫描的根目录路径
         extensions: 要匹配的文件扩展名列表，必须包含点号（如[".mp4", ".avi"]），
                     匹配时不区分大小写
+        max_workers: 并行列举目录的线程数。网络共享等高延迟文件系统上，
+                     多个线程同时列举目录可以显著缩短扫描时间；为1时在当前线程中扫描
+
+    Yields:
+        os.DirEntry: 符合扩展名的文件条目
+
+    无法访问的目录会被略过并记录警告日志。
+    """
+    extensions = [ext.lower() for ext in extensions]
+
+    if max_workers <= 1:
+        pending = deque([directory])
+        while pending:
+            subfolders, files = _list_directory(pending.popleft(), extensions)
+            pending.extend(subfolders)
+            yield from files
+        return
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="ScanWorker"
+    )
+    try:
+        running = {executor.submit(_list_directory, directory, extensions)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                subfolders, files = future.result()
+                for folder in subfolders:
+                    running.add(executor.submit(_list_directory, folder, extensions))
+                yield from files
+    finally:
+        # 调用方提前结束迭代时，取消尚未开始的扫描
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _list_directory(
+    directory: str, extensions: list[str]
+) -> tuple[list[str], list[os.DirEntry]]:
+    """
+    列举单个目录（不递归）
+
+    Args:
+        directory: 要列举的目录路径
+        extensions: 小写的文件扩展名列表
 
     Returns:
-        tuple[list[str], list[str]]: 第一个元素是所有子文件夹的路径列表，
-                                     第二个元素是符合扩展名的所有文件的路径列表
-
-    该函数会：
-    1. 扫描指定目录下的所有条目
-    2. 将子文件夹和符合条件的文件分别添加到列表中
-    3. 递归扫描每个子文件夹
-    4. 返回完整的子文件夹列表和文件列表
+        tuple[list[str], list[os.DirEntry]]: 第一个元素是子目录的路径列表，
+                                            第二个元素是符合扩展名的文件条目列表
     """
     subfolders, files = [], []
 
-    for entry in os.scandir(directory):
-        if entry.is_dir():
-            subfolders.append(entry.path)
-        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions:
-            files.append(entry.path)
-
-    # Recursively scan subfolders
-    for folder in list(subfolders):
-        sf, f = scan_directory(folder, extensions)
-        subfolders.extend(sf)
-        files.extend(f)
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        subfolders.append(entry.path)
+                    elif (
+                        os.path.splitext(entry.name)[1].lower() in extensions
+                        and entry.is_file()
+                    ):
+                        files.append(entry)
+                except OSError as e:
+                    logging.warning(f"无法访问 {entry.path}: {e}")
+    except OSError as e:
+        logging.warning(f"无法扫描目录 {directory}: {e}")
 
     return subfolders, files
 
@@ -81,3 +132,71 @@ def get_path(path: str):
     else:
         # Running in a development environment
         return os.path.join(os.getcwd(), path)
+
+
+def get_creationflags() -> int:
+    """
+    获取创建子进程时使用的平台相关标志
+
+    Windows 上不为命令行程序弹出控制台窗口；其他平台不需要任何标志，
+    subprocess 在这些平台上只接受 0。
+
+    Returns:
+        int: 传给 subprocess 的 creationflags
+    """
+    if sys.platform == "win32":
+        return subprocess.CREATE_NO_WINDOW
+    return 0
+
+
+def get_cpu_count() -> int:
+    """
+    获取当前进程实际可用的CPU核心数
+
+    在容器中运行时，os.cpu_count()返回的是宿主机的核心数，
+    因此还会参考进程的CPU亲和性和cgroup的CPU配额，取其中最小的值。
+
+    Returns:
+        int: 可用的CPU核心数，至少为1
+    """
+    count = os.cpu_count() or 1
+
+    if hasattr(os, "sched_getaffinity"):
+        count = min(count, len(os.sched_getaffinity(0)))
+
+    quota = _read_cgroup_cpu_quota()
+    if quota is not None:
+        count = min(count, max(1, math.ceil(quota)))
+
+    return max(1, count)
+
+
+def _read_cgroup_cpu_quota() -> Optional[float]:
+    """
+    读取cgroup限制的CPU配额（以核心数计）
+
+    Returns:
+        Optional[float]: CPU配额，没有限制或无法读取时返回None
+    """
+    # cgroup v2: "<quota> <period>" 或 "max <period>"
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "r") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "r") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+
+    return None
@@ -3,6 +3,7 @@ import tkinter as tk
 import tkinter.ttk as ttk
 import webbrowser
 from queue import Queue
+from typing import Optional
 from tkinter import END, NE, TOP, BooleanVar, StringVar, W, messagebox
 
 import windnd
@@ -35,6 +36,10 @@ class View:
         self.queue = Queue()
         self.configs_name_list = []
         self.configs_dict = {}
+        # 并行压缩时各个正在处理的文件的进度（0-1），时长未知时为None
+        self.files_progress: dict[str, Optional[float]] = {}
+        # 总进度的标题文本，当前进度消息会在其后附加任务的速度和剩余时间
+        self.progress_title = ""
 
         self._setup_ui()
 
@@ -215,6 +220,17 @@ class View:
                 case message.ErrorMessage(title=t, message=m):
                     # Display error message
                     messagebox.showerror(t, m)
+                case message.ResumeTaskMessage(
+                    tasks_num=tasks_num, files_num=files_num
+                ):
+                    if messagebox.askyesno(
+                        "继续任务",
+                        f"上次有 {tasks_num} 个压缩任务被中断，"
+                        f"还有 {files_num} 个已发现的文件尚未处理，是否继续？",
+                    ):
+                        self.controller.resume_tasks()
+                    else:
+                        self.controller.discard_interrupted_tasks()
                 case message.ExitMessage():
                     # Exit application
                     self.root.destroy()
@@ -222,26 +238,63 @@ class View:
                     # 将加载的配置显示在选项框，并自动选中第一个
                     self.config_combobox.config(values=config_names)
                     self.select_config_name.set(config_names[0])
+                case message.ConfigErrorMessage(file_path=file_path, message=m):
+                    # 配置文件无效时使用默认配置运行，提示用户修改
+                    messagebox.showerror(
+                        "配置错误",
+                        f"配置文件 {file_path} 无效，本次使用默认配置运行，"
+                        f"配置文件未被修改：\n\n{m}",
+                    )
                 case message.CompressionStartMessage():
                     # Disable button
                     self.compress_btn.config(state=tk.DISABLED)
-                    self.cur_bar["value"] = 0
-                    self.cur_bar.update()
+                    self.files_progress.clear()
+                    self.progress_title = ""
+                    self._update_current_bar()
                     self.total_bar["value"] = 0
                     self.total_bar.update()
                 case message.CompressionCurrentProgressMessage(
-                    file_name=_, current=current, total=total
+                    file_name=file_name,
+                    current=current,
+                    total=total,
+                    task_speed=task_speed,
+                    task_eta=task_eta,
                 ):
-                    self.cur_bar["value"] = current / total * 100
-                    self.cur_bar.update()
+                    # 时长未知时 total 不大于0，无法计算该文件的进度
+                    self.files_progress[file_name] = (
+                        min(max(current / total, 0.0), 1.0) if total > 0 else None
+                    )
+                    self._update_current_bar()
+
+                    if task_speed is not None and self.progress_title:
+                        status = f"速度：{task_speed:.2f}x"
+                        if task_eta is not None:
+                            minutes, seconds = divmod(int(task_eta), 60)
+                            status += f"，剩余：{minutes}:{seconds:02d}"
+                        self.title_var.set(f"{self.progress_title}，{status}")
+                        self.title_label.update()
                 case message.CompressionTotalProgressMessage(
-                    current=current, total=total, file_name=file_name
+                    current=current,
+                    total=total,
+                    file_name=file_name,
+                    scan_finished=scan_finished,
                 ):
+                    # 文件处理结束后不再计入当前进度
+                    self.files_progress.pop(file_name, None)
+                    self._update_current_bar()
+
                     # Update progress display
-                    self.title_var.set(
-                        f"[{current}/{total}] "
-                        f"当前处理文件：{file_name}，进度：{current / total * 100: .2f}%"
-                    )
+                    if scan_finished:
+                        self.progress_title = (
+                            f"[{current}/{total}] "
+                            f"当前处理文件：{file_name}，进度：{current / total * 100: .2f}%"
+                        )
+                    else:
+                        # 扫描尚未完成，总数只是到目前为止发现的文件数
+                        self.progress_title = (
+                            f"[{current}/已发现 {total}] 当前处理文件：{file_name}"
+                        )
+                    self.title_var.set(self.progress_title)
                     self.title_label.update()
                     self.total_bar["value"] = (current / total) * 100
                     self.total_bar.update()
@@ -249,15 +302,25 @@ class View:
                     # Display error message
                     messagebox.showerror(t, m)
                     self.compress_btn.config(state=tk.NORMAL)
-                case message.CompressionFinishedMessage(total=total):
+                case message.CompressionSkippedMessage(file_name=file_name):
+                    self.files_progress.pop(file_name, None)
+                    self._update_current_bar()
+                    self.title_var.set(f"已跳过：{file_name}")
+                    self.title_label.update()
+                case message.CompressionFinishedMessage(
+                    total=total, skipped=skipped, discarded=discarded
+                ):
                     # All files processed
                     messagebox.showinfo("提示", "转换结束")
-                    self.title_var.set(f"处理完成！已经处理 {total} 个文件")
+                    self.title_var.set(
+                        f"处理完成！已经处理 {total} 个文件，"
+                        f"跳过 {skipped} 个，丢弃 {discarded} 个"
+                    )
                     self.title_label.update()
                     self.compress_btn.config(state=tk.NORMAL)
 
-                    self.cur_bar["value"] = 0
-                    self.cur_bar.update()
+                    self.files_progress.clear()
+                    self._update_current_bar()
                     self.total_bar["value"] = 100
                     self.total_bar.update()
                 case _:
@@ -266,6 +329,28 @@ class View:
         # Schedule next check
         self.root.after(1000, self._check_message_queue)
 
+    def _update_current_bar(self):
+        """
+        根据正在处理的文件的进度更新当前进度条
+
+        显示所有已知进度的文件的平均进度；正在处理的文件都不知道时长时，
+        进度条切换为不确定状态，来回滚动表示仍在处理。
+        """
+        known = [value for value in self.files_progress.values() if value is not None]
+        indeterminate = str(self.cur_bar["mode"]) == "indeterminate"
+
+        if self.files_progress and not known:
+            if not indeterminate:
+                self.cur_bar.config(mode="indeterminate")
+                self.cur_bar.start(20)
+        else:
+            if indeterminate:
+                self.cur_bar.stop()
+                self.cur_bar.config(mode="determinate")
+            self.cur_bar["value"] = sum(known) / len(known) * 100 if known else 0
+
+        self.cur_bar.update()
+
     def _start_compression(self):
         """
         启动视频压缩过程
@@ -0,0 +1,102 @@
+from src.model.audio import output_audio_bit_rate, plan_audio
+from src.model.command import audio_args
+from src.model.config import AudioConfigModel, ConfigModel
+from src.model.media import MediaInfo, StreamInfo
+
+
+def _audio(index: int, codec: str, bit_rate=None, channels=2, sample_rate=48000):
+    return StreamInfo(
+        index=index,
+        codec_type="audio",
+        codec_name=codec,
+        bit_rate=bit_rate,
+        channels=channels,
+        sample_rate=sample_rate,
+    )
+
+
+def _media(*audio_streams: StreamInfo) -> MediaInfo:
+    video = StreamInfo(index=0, codec_type="video", codec_name="h264")
+    return MediaInfo(duration=60, streams=[video, *audio_streams])
+
+
+def test_acceptable_aac_is_copied():
+    plans = plan_audio(_media(_audio(1, "aac", 130_000)), AudioConfigModel())
+    assert [(plan.action, plan.bit_rate) for plan in plans] == [("copy", 130)]
+
+
+def test_high_bitrate_or_other_codec_is_encoded():
+    media = _media(_audio(1, "aac", 256_000), _audio(2, "ac3", 448_000))
+    plans = plan_audio(media, AudioConfigModel())
+    assert [(plan.index, plan.action, plan.bit_rate) for plan in plans] == [
+        (1, "encode", 128),
+        (2, "encode", 128),
+    ]
+
+
+def test_encode_never_exceeds_source_bitrate():
+    plans = plan_audio(_media(_audio(1, "mp3", 64_000)), AudioConfigModel())
+    assert (plans[0].action, plans[0].bit_rate) == ("encode", 64)
+
+
+def test_unknown_bitrate_is_not_copied():
+    plans = plan_audio(_media(_audio(1, "aac")), AudioConfigModel())
+    assert (plans[0].action, plans[0].bit_rate) == ("encode", 128)
+
+
+def test_encode_policy_never_copies():
+    config = AudioConfigModel(policy="encode")
+    plans = plan_audio(_media(_audio(1, "aac", 96_000)), config)
+    assert plans[0].action == "encode"
+
+
+def test_downmix_and_sample_rate_cap():
+    config = AudioConfigModel(max_channels=1, max_sample_rate=44100)
+    media = _media(
+        _audio(1, "aac", 96_000, channels=6),
+        _audio(2, "aac", 64_000, channels=1, sample_rate=32000),
+    )
+    plans = plan_audio(media, config)
+
+    assert (plans[0].action, plans[0].channels, plans[0].sample_rate) == (
+        "encode",
+        1,
+        44100,
+    )
+    assert plans[1].action == "copy"
+
+
+def test_audio_args_map_each_stream_by_index():
+    config = ConfigModel(audio=AudioConfigModel(max_channels=2))
+    media = _media(_audio(1, "aac", 96_000), _audio(3, "ac3", 448_000, channels=6))
+
+    assert audio_args(config, media) == [
+        "-map",
+        "0:1",
+        "-map",
+        "0:3",
+        "-c:a:0",
+        "copy",
+        "-c:a:1",
+        "aac",
+        "-b:a:1",
+        "128k",
+        "-ac:a:1",
+        "2",
+    ]
+
+
+def test_audio_args_without_media_info():
+    assert audio_args(ConfigModel()) == [
+        "-map",
+        "0:a?",
+        "-c:a",
+        "aac",
+        "-b:a",
+        "128k",
+    ]
+
+
+def test_output_audio_bit_rate_sums_planned_streams():
+    media = _media(_audio(1, "aac", 96_000), _audio(2, "flac", 900_000))
+    assert output_audio_bit_rate(media, AudioConfigModel()) == 96_000 + 128_000
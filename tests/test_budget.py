@@ -0,0 +1,29 @@
+from src.model.budget import ThreadBudget
+
+
+def test_threads_split_between_running_jobs():
+    budget = ThreadBudget(total_threads=8, max_jobs=4)
+    assert [budget.acquire(queued_jobs=10) for _ in range(4)] == [2, 2, 2, 2]
+
+
+def test_last_jobs_in_queue_get_more_threads():
+    budget = ThreadBudget(total_threads=8, max_jobs=4)
+    assert budget.acquire(queued_jobs=2) == 4
+    assert budget.acquire(queued_jobs=1) == 4
+
+
+def test_released_threads_go_to_next_job():
+    budget = ThreadBudget(total_threads=8, max_jobs=2)
+    first = budget.acquire(queued_jobs=5)
+    second = budget.acquire(queued_jobs=4)
+    assert (first, second) == (4, 4)
+
+    budget.release(first)
+    assert budget.acquire(queued_jobs=3) == 4
+
+
+def test_at_least_one_thread():
+    budget = ThreadBudget(total_threads=2, max_jobs=4)
+    assert [budget.acquire(queued_jobs=4) for _ in range(4)] == [1, 1, 1, 1]
+
+    assert ThreadBudget(total_threads=0, max_jobs=0).acquire(queued_jobs=0) == 1
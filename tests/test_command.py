@@ -0,0 +1,135 @@
+import os
+import sys
+
+import pytest
+
+from src.model.command import (
+    FFmpegCommand,
+    concat_command,
+    encode_command,
+    first_pass_command,
+)
+from src.model.config import ConfigModel
+from src.model.encoder import PassSettings
+from src.utils import get_creationflags
+
+
+def _config(opencl_acceleration: bool = True) -> ConfigModel:
+    return ConfigModel(
+        encoder={"type": "x264", "opencl_acceleration": opencl_acceleration}
+    )
+
+
+def _after(command: list[str], option: str) -> str:
+    return command[command.index(option) + 1]
+
+
+def test_hwaccel_is_an_input_option():
+    command = encode_command("in.mp4", "out.mp4", _config(), delete_audio=False)
+    assert _after(command, "-hwaccel") == "auto"
+    assert command.index("-hwaccel") < command.index("-i")
+
+
+def test_no_hwaccel_when_disabled():
+    config = _config(opencl_acceleration=False)
+    command = encode_command("in.mp4", "out.mp4", config, delete_audio=False)
+    assert "-hwaccel" not in command
+
+
+def test_encode_maps_first_video_stream():
+    command = encode_command("in.mp4", "out.mp4", _config(), delete_audio=False)
+    assert _after(command, "-map") == "0:V:0"
+    assert "0:" not in command
+    assert _after(command, "-c:v") == "libx264"
+    assert command[-1] == "out.mp4"
+
+
+def test_remux_copies_video_without_encoder_args():
+    command = encode_command(
+        "in.mp4",
+        "out.mp4",
+        _config(),
+        delete_audio=False,
+        remux=True,
+        video_filter="scale=1280:-2",
+    )
+    assert _after(command, "-c:v") == "copy"
+    assert "-hwaccel" not in command
+    assert "-vf" not in command
+    assert "libx264" not in command
+    assert "-crf" not in command
+
+
+def test_delete_audio_drops_audio_mapping():
+    command = encode_command("in.mp4", "out.mp4", _config(), delete_audio=True)
+    assert "-an" in command
+    assert "0:a?" not in command
+    assert "-c:a" not in command
+
+
+def test_video_filter_precedes_encoder_args():
+    command = encode_command(
+        "in.mp4", "out.mp4", _config(), delete_audio=False, video_filter="fps=30"
+    )
+    assert _after(command, "-vf") == "fps=30"
+    assert command.index("-vf") < command.index("-c:v")
+
+
+def test_first_pass_discards_output():
+    two_pass = PassSettings(bit_rate=1500, pass_num=1, stats_path="passlog")
+    command = first_pass_command("in.mp4", _config(), two_pass)
+    assert command.index("-hwaccel") < command.index("-i")
+    assert _after(command, "-pass") == "1"
+    assert _after(command, "-f") == "null"
+    assert "-an" in command
+    assert command[-1] == os.devnull
+
+
+def test_concat_with_and_without_audio():
+    command = concat_command("list.txt", "audio.m4a", "out.mp4")
+    assert command.index("concat") < command.index("list.txt")
+    assert command.count("-i") == 2
+    maps = [command[i + 1] for i, arg in enumerate(command) if arg == "-map"]
+    assert maps == ["0:v", "1:a"]
+
+    command = concat_command("list.txt", None, "out.mp4")
+    assert command.count("-i") == 1
+    assert "1:a" not in command
+    assert _after(command, "-c") == "copy"
+
+
+def test_build_orders_inputs_before_output_options():
+    command = (
+        FFmpegCommand("ffmpeg")
+        .input("a.mp4", "-ss", "5")
+        .args("-c", "copy")
+        .output("b.mp4")
+        .build()
+    )
+    assert command == [
+        "ffmpeg",
+        "-y",
+        "-nostdin",
+        "-nostats",
+        "-progress",
+        "pipe:1",
+        "-ss",
+        "5",
+        "-i",
+        "a.mp4",
+        "-c",
+        "copy",
+        "b.mp4",
+    ]
+
+
+def test_build_requires_input_and_output():
+    with pytest.raises(ValueError):
+        FFmpegCommand("ffmpeg").output("out.mp4").build()
+    with pytest.raises(ValueError):
+        FFmpegCommand("ffmpeg").input("in.mp4").build()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Windows 上会隐藏控制台窗口")
+def test_no_creationflags_off_windows():
+    assert get_creationflags() == 0
@@ -0,0 +1,27 @@
+import os
+
+from src.model.config import X265ConfigModel
+from src.model.encoder import PassSettings, X265Encoder, _escape_x265_param
+
+
+def test_escape_windows_path_for_x265_params():
+    path = r"C:\Users\me\AppData\Local\Temp\videoslim_passlog_1\passlog"
+    assert _escape_x265_param(path) == (
+        r"C\:\\Users\\me\\AppData\\Local\\Temp\\videoslim_passlog_1\\passlog"
+    )
+
+
+def test_escape_leaves_plain_posix_path_unchanged():
+    assert _escape_x265_param("/tmp/videoslim_passlog_1/passlog") == (
+        "/tmp/videoslim_passlog_1/passlog"
+    )
+
+
+def test_x265_two_pass_uses_absolute_stats_path():
+    settings = PassSettings(bit_rate=1500, pass_num=2, stats_path="passlog")
+    args = X265Encoder(X265ConfigModel()).video_args(None, settings)
+
+    params = args[args.index("-x265-params") + 1]
+    expected = _escape_x265_param(os.path.abspath("passlog"))
+    assert f"pass=2:stats={expected}" in params
+    assert args[args.index("-b:v") + 1] == "1500k"
@@ -0,0 +1,113 @@
+import pytest
+
+from src.model.jobs import JobQueue
+from src.model.video import TaskInfo, TaskStatus
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+@pytest.fixture
+def queue(queue_path):
+    queue = JobQueue(queue_path)
+    queue.open()
+    yield queue
+    queue.close()
+
+
+def _info() -> TaskInfo:
+    return TaskInfo(targets=["/videos"], process_config_name="default")
+
+
+def test_enqueue_is_idempotent(queue):
+    batch = queue.create_batch(_info())
+    first = queue.enqueue(batch, "/videos/a.mp4")
+    assert queue.enqueue(batch, "/videos/a.mp4") == first
+    assert queue.status_counts(batch) == {TaskStatus.PENDING: 1}
+
+
+def test_claim_only_once(queue):
+    batch = queue.create_batch(_info())
+    job = queue.enqueue(batch, "/videos/a.mp4")
+
+    assert queue.claim(job)
+    assert not queue.claim(job)
+    assert queue.status_counts(batch) == {TaskStatus.PROCESSING: 1}
+
+
+def test_release_returns_job_to_pending(queue):
+    batch = queue.create_batch(_info())
+    job = queue.enqueue(batch, "/videos/a.mp4")
+    queue.claim(job)
+
+    queue.release(job)
+    assert queue.status_counts(batch) == {TaskStatus.PENDING: 1}
+    assert queue.claim(job)
+
+    # 已经完成的任务不会被放回队列
+    queue.complete(job, TaskStatus.SUCCESS)
+    queue.release(job)
+    assert queue.status_counts(batch) == {TaskStatus.SUCCESS: 1}
+
+
+def test_iter_pending_in_enqueue_order(queue):
+    batch = queue.create_batch(_info())
+    jobs = [queue.enqueue(batch, f"/videos/{name}.mp4") for name in "abcde"]
+    queue.claim(jobs[1])
+
+    assert list(queue.iter_pending(batch, page_size=2)) == [
+        "/videos/a.mp4",
+        "/videos/c.mp4",
+        "/videos/d.mp4",
+        "/videos/e.mp4",
+    ]
+
+
+def test_reopen_recovers_interrupted_jobs(queue_path):
+    queue = JobQueue(queue_path)
+    queue.open()
+    batch = queue.create_batch(_info())
+    done = queue.enqueue(batch, "/videos/a.mp4")
+    interrupted = queue.enqueue(batch, "/videos/b.mp4")
+    queue.finish_scan(batch)
+    queue.claim(done)
+    queue.complete(done, TaskStatus.SUCCESS)
+    queue.claim(interrupted)
+    # 模拟程序在处理过程中崩溃
+    queue.close()
+
+    reopened = JobQueue(queue_path)
+    reopened.open()
+    try:
+        assert reopened.status_counts(batch) == {
+            TaskStatus.SUCCESS: 1,
+            TaskStatus.PENDING: 1,
+        }
+        batches = reopened.interrupted_batches()
+        assert [(b.id, b.scan_finished, b.pending_num) for b in batches] == [
+            (batch, True, 1)
+        ]
+        assert batches[0].info == _info()
+    finally:
+        reopened.close()
+
+
+def test_finished_batches_removed_on_open(queue_path):
+    queue = JobQueue(queue_path)
+    queue.open()
+    batch = queue.create_batch(_info())
+    job = queue.enqueue(batch, "/videos/a.mp4")
+    queue.finish_scan(batch)
+    queue.claim(job)
+    queue.complete(job, TaskStatus.SKIPPED)
+    queue.close()
+
+    reopened = JobQueue(queue_path)
+    reopened.open()
+    try:
+        assert reopened.interrupted_batches() == []
+        assert reopened.status_counts(batch) == {}
+    finally:
+        reopened.close()
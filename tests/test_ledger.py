@@ -0,0 +1,81 @@
+import os
+
+from src.model.config import ConfigModel
+from src.model.ledger import JobLedger, file_fingerprint, job_config_hash
+from src.model.video import TaskStatus
+
+
+def _write(path, content: bytes, mtime_ns: int):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_fingerprint_tracks_size_and_mtime(tmp_path):
+    path = tmp_path / "a.mp4"
+    _write(path, b"abc", 1_000_000_000)
+    assert file_fingerprint(str(path)) == "3:1000000000"
+
+    _write(path, b"abc", 2_000_000_000)
+    assert file_fingerprint(str(path)) == "3:2000000000"
+    assert file_fingerprint(str(tmp_path / "missing.mp4")) is None
+
+
+def test_config_hash_depends_on_parameters():
+    base = job_config_hash(ConfigModel(), False)
+    assert base == job_config_hash(ConfigModel(), False)
+    assert base != job_config_hash(ConfigModel(), True)
+    assert base != job_config_hash(
+        ConfigModel(encoder={"type": "x264", "crf": 20}), False
+    )
+
+
+def test_completed_until_input_or_output_changes(tmp_path):
+    source = tmp_path / "a.mp4"
+    output = tmp_path / "a_x264.mp4"
+    _write(source, b"source", 1_000_000_000)
+    _write(output, b"out", 1_000_000_000)
+
+    ledger = JobLedger(str(tmp_path / "ledger.jsonl"))
+    ledger.open()
+    ledger.record(
+        str(source),
+        file_fingerprint(str(source)),
+        "hash",
+        TaskStatus.SUCCESS,
+        str(output),
+    )
+
+    assert ledger.is_completed(str(source), "hash")
+    assert not ledger.is_completed(str(source), "other")
+    # 之前压缩生成的输出文件本身也不需要再次处理
+    assert ledger.is_completed(str(output), "other")
+
+    _write(output, b"changed", 2_000_000_000)
+    assert not ledger.is_completed(str(source), "hash")
+    assert not ledger.is_completed(str(output), "hash")
+
+
+def test_records_survive_reopen(tmp_path):
+    source = tmp_path / "a.mp4"
+    _write(source, b"source", 1_000_000_000)
+    path = str(tmp_path / "ledger.jsonl")
+
+    ledger = JobLedger(path)
+    ledger.open()
+    ledger.record(
+        str(source),
+        file_fingerprint(str(source)),
+        "hash",
+        TaskStatus.SKIPPED,
+        str(tmp_path / "a_x264.mp4"),
+    )
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+
+    reopened = JobLedger(path)
+    reopened.open()
+    assert reopened.is_completed(str(source), "hash")
+
+    _write(source, b"source2", 1_000_000_000)
+    assert not reopened.is_completed(str(source), "hash")
@@ -0,0 +1,73 @@
+from src.model.progress import ProgressParser
+
+
+def _feed(parser: ProgressParser, text: str):
+    records = [parser.feed(line) for line in text.strip().splitlines()]
+    return [record for record in records if record is not None]
+
+
+def test_record_emitted_at_end_of_block():
+    parser = ProgressParser()
+    records = _feed(
+        parser,
+        """
+        frame=240
+        fps=59.8
+        bitrate=1234.5kbits/s
+        total_size=1048576
+        out_time_us=8000000
+        speed=1.99x
+        progress=continue
+        """,
+    )
+
+    assert len(records) == 1
+    record = records[0]
+    assert record.frame == 240
+    assert record.fps == 59.8
+    assert record.bitrate == 1234.5
+    assert record.total_size == 1048576
+    assert record.out_time == 8.0
+    assert record.speed == 1.99
+    assert not record.finished
+
+
+def test_unavailable_values_and_end_marker():
+    parser = ProgressParser()
+    records = _feed(
+        parser,
+        """
+        frame=0
+        bitrate=N/A
+        total_size=N/A
+        out_time_us=-9223372036854775807
+        speed=N/A
+        progress=end
+        """,
+    )
+
+    assert len(records) == 1
+    record = records[0]
+    assert record.bitrate is None
+    assert record.speed is None
+    assert record.total_size == 0
+    assert record.out_time_us == 0
+    assert record.finished
+
+
+def test_fields_do_not_leak_between_blocks():
+    parser = ProgressParser()
+    records = _feed(
+        parser,
+        """
+        frame=10
+        speed=2.0x
+        progress=continue
+        frame=20
+        progress=continue
+        not a progress line
+        """,
+    )
+
+    assert [record.frame for record in records] == [10, 20]
+    assert records[1].speed is None
@@ -0,0 +1,68 @@
+from src.model.config import ScaleConfigModel
+from src.model.media import MediaInfo, StreamInfo
+from src.model.scale import scale_filter, scaled_media
+
+
+def _media(width: int, height: int, fps: float = 30.0, rotation: int = 0) -> MediaInfo:
+    return MediaInfo(
+        duration=60,
+        streams=[
+            StreamInfo(
+                index=0,
+                codec_type="video",
+                codec_name="h264",
+                width=width,
+                height=height,
+                fps=fps,
+                rotation=rotation,
+            )
+        ],
+    )
+
+
+def test_width_limit_only():
+    config = ScaleConfigModel(max_width=1280)
+    assert scale_filter(_media(1920, 1080), config) == (
+        "scale=w='trunc(iw*min(1,1280/iw)/2)*2'"
+        ":h='trunc(ih*min(1,1280/iw)/2)*2':flags=bicubic"
+    )
+
+
+def test_height_limit_only():
+    config = ScaleConfigModel(max_height=720, scaler="zscale")
+    assert scale_filter(_media(1920, 1080), config) == (
+        "zscale=w='trunc(iw*min(1,720/ih)/2)*2'"
+        ":h='trunc(ih*min(1,720/ih)/2)*2':filter=bilinear"
+    )
+
+
+def test_both_limits_nest_two_argument_min():
+    config = ScaleConfigModel(max_width=1920, max_height=1080)
+    result = scale_filter(_media(3840, 2160), config)
+
+    factor = "min(min(1,1920/iw),1080/ih)"
+    assert result == (
+        f"scale=w='trunc(iw*{factor}/2)*2':h='trunc(ih*{factor}/2)*2':flags=bicubic"
+    )
+
+
+def test_fps_runs_before_scale():
+    config = ScaleConfigModel(max_height=1080, max_fps=30)
+    result = scale_filter(_media(3840, 2160, fps=60), config)
+    assert result is not None
+    assert result.startswith("fps=30,scale=")
+
+
+def test_within_limits_bypasses_filter():
+    config = ScaleConfigModel(max_width=1920, max_height=1080, max_fps=30)
+    assert scale_filter(_media(1280, 720, fps=30000 / 1001), config) is None
+    assert scale_filter(None, config) is None
+
+
+def test_rotated_source_fits_display_box():
+    config = ScaleConfigModel(max_width=1920, max_height=1080)
+    video = scaled_media(_media(3840, 2160, rotation=90), config).video_stream
+
+    assert video is not None
+    assert (video.width, video.height) == (606, 1080)
+    assert video.rotation == 0
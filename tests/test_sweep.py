@@ -0,0 +1,34 @@
+from scripts.sweep import VariantResult, pareto_front
+from src.model.config import X264ConfigModel
+
+
+def _result(name: str, size: int, encode_time: float, quality: float):
+    return VariantResult(
+        name=name,
+        encoder=X264ConfigModel(),
+        size=size,
+        encode_time=encode_time,
+        duration=10,
+        quality=quality,
+    )
+
+
+def test_dominates_requires_strictly_better_somewhere():
+    a = _result("a", 100, 5, 95)
+    assert not a.dominates(_result("same", 100, 5, 95))
+    assert a.dominates(_result("bigger", 120, 5, 95))
+    assert not a.dominates(_result("faster", 120, 2, 95))
+
+
+def test_pareto_front_drops_dominated_and_sorts_by_size():
+    small = _result("small", 80, 10, 90)
+    fast = _result("fast", 150, 1, 93)
+    best = _result("best", 120, 5, 96)
+    dominated = _result("dominated", 130, 6, 95)
+
+    front = pareto_front([dominated, best, fast, small])
+    assert [r.name for r in front] == ["small", "best", "fast"]
+
+
+def test_speed_without_encode_time():
+    assert _result("x", 1, 0, 1).speed == 0